@@ -0,0 +1,182 @@
+import asyncio
+import copy
+import functools
+import inspect
+import queue
+import threading
+from typing import Callable
+
+from SuperProDesigner import CoInitialize, SuperProDesigner, SuperProDesignerDocument
+
+# Document methods whose calls can be answered from an identical call earlier in the same batch
+READ_METHODS = frozenset(name for name in dir(SuperProDesignerDocument) if name.startswith(("Get","Is")))|{"ReadOutputs","Snapshot","EnumerateAll","EnumerateMany"}
+
+class _ComThread(threading.Thread):
+    """
+    The one thread that creates and calls the COM objects of an AsyncSuperProDesigner.
+    Requests are (future, loop, call, read_key, release) tuples, executed in order in batches of whatever is queued, the results of a batch being handed back to each event loop in one callback.
+    """
+    def __init__(self, factory:Callable, apartment:Callable, batch_size:int):
+        super().__init__(daemon=True,name="SuperProDesigner COM")
+        self.factory = factory
+        self.apartment = apartment
+        self.batch_size = batch_size
+        self.requests:queue.SimpleQueue = queue.SimpleQueue()
+        self.app:SuperProDesigner|None = None
+        self.error:BaseException|None = None
+        self.batches = 0
+        self.coalesced = 0  # Reads answered by an identical read of the same batch
+
+    def run(self):
+        try:
+            self.apartment()
+            self.app = self.factory()
+        except BaseException as e:
+            self.error = e
+        stop = False
+        while not stop:
+            batch = [self.requests.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.requests.get_nowait())
+                except queue.Empty:
+                    break
+            stop = self._execute(batch)
+
+    def _execute(self, batch:list) -> bool:
+        stop = False
+        reads = {}
+        results:dict[asyncio.AbstractEventLoop,list] = {}
+        for request in batch:
+            if request is None:
+                stop = True
+                continue
+            future,loop,call,read_key,release = request
+            result = error = None
+            if future.cancelled():
+                pass
+            elif self.error is not None:
+                error = RuntimeError(f"SuperPro Designer failed to start: {self.error!r}")
+            elif read_key is not None and read_key in reads:
+                result = copy.deepcopy(reads[read_key])  # Every caller gets a result of its own, e.g. the arrays of a Snapshot
+                self.coalesced += 1
+            else:
+                try:
+                    result = call()
+                    if read_key is not None: reads[read_key] = result
+                except BaseException as e:
+                    error = e
+                if read_key is None: reads.clear()  # Anything else may have changed the values
+            results.setdefault(loop,[]).append((future,result,error,release))
+        self.batches += 1
+        for loop,items in results.items():
+            try:
+                loop.call_soon_threadsafe(_deliver,items)
+            except RuntimeError:
+                pass  # The loop was closed
+        return stop
+
+def _deliver(items:list):
+    for future,result,error,release in items:
+        release()
+        if future.done(): continue
+        if error is not None: future.set_exception(error)
+        else: future.set_result(result)
+
+class AsyncSuperProDesigner:
+    """
+    asyncio front end of SuperProDesigner: every call runs on one dedicated thread that owns the COM objects (a single threaded apartment) and is awaited without blocking the event loop.
+    factory(*args, **kwargs) creates the SuperProDesigner on that thread, e.g. FakeDesigner.FakeSuperProDesigner.
+    At most max_pending calls can be queued, further callers wait for a slot. Identical reads queued together on a document are executed once, each caller getting its own copy of the result.
+    A COM call cannot be interrupted: a call that times out or is cancelled is dropped if it has not started yet, otherwise the thread finishes it and discards the result.
+    """
+    def __init__(self, *args, factory:Callable=SuperProDesigner, max_pending:int=1000, batch_size:int=256, apartment:Callable=CoInitialize, **kwargs):
+        self.max_pending = max_pending
+        self._slots:asyncio.Semaphore|None = None
+        self._closed = False
+        self._thread = _ComThread(functools.partial(factory,*args,**kwargs),apartment,batch_size)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of queued or running calls.
+        """
+        return 0 if self._slots is None else self.max_pending-self._slots._value
+
+    async def call(self, func:Callable, *args, timeout:float|None=None, read_key=None, **kwargs):
+        """
+        Runs func(*args, **kwargs) on the COM thread and returns its result, raising asyncio.TimeoutError after timeout seconds.
+        Use it for compound work that must not interleave with other calls, e.g. a function running a doc.transaction().
+        """
+        if self._closed: raise RuntimeError("AsyncSuperProDesigner is closed")
+        if self._slots is None: self._slots = asyncio.Semaphore(self.max_pending)
+        slots = self._slots
+        await slots.acquire()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._thread.requests.put((future,loop,functools.partial(func,*args,**kwargs),read_key,slots.release))
+        if timeout is None: return await future
+        return await asyncio.wait_for(future,timeout)
+
+    def __getattr__(self, name:str):
+        if not inspect.isfunction(getattr(SuperProDesigner,name,None)) or name.startswith("_"): raise AttributeError(name)
+        async def method(*args, timeout:float|None=None, **kwargs):
+            return await self.call(lambda: getattr(self._thread.app,name)(*args,**kwargs),timeout=timeout)
+        method.__name__ = name
+        return method
+
+    async def OpenDoc(self, fileName:str, timeout:float|None=None) -> "AsyncDocument":
+        return AsyncDocument(self,await self.call(lambda: self._thread.app.OpenDoc(fileName),timeout=timeout))
+
+    async def SetActiveDoc(self, fileName:str, timeout:float|None=None) -> "AsyncDocument":
+        return AsyncDocument(self,await self.call(lambda: self._thread.app.SetActiveDoc(fileName),timeout=timeout))
+
+    async def close(self, closeApp:bool=True):
+        """
+        Waits for the queued calls, closes SuperPro Designer (unless closeApp is False) and stops the COM thread.
+        """
+        if self._closed: return
+        if closeApp and self._thread.app is not None: await self.call(self._thread.app.CloseApp)
+        self._closed = True
+        self._thread.requests.put(None)
+        await asyncio.get_running_loop().run_in_executor(None,self._thread.join)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+class AsyncDocument:
+    """
+    Coroutine version of a SuperProDesignerDocument living on the COM thread of app: await adoc.DoMEBalances(timeout=600), await adoc.GetStreamVarVal(...), ...
+    Every method takes an extra keyword timeout. Enumerator, transaction and profile are only available through run(), as are the objects returned by the document (Stream, Flowsheet, ...).
+    """
+    def __init__(self, app:AsyncSuperProDesigner, doc:SuperProDesignerDocument):
+        self.app = app
+        self.doc = doc
+
+    async def run(self, func:Callable, *args, timeout:float|None=None, **kwargs):
+        """
+        Runs func(doc, *args, **kwargs) on the COM thread.
+        """
+        return await self.app.call(func,self.doc,*args,timeout=timeout,**kwargs)
+
+    def __getattr__(self, name:str):
+        attr = getattr(SuperProDesignerDocument,name,None)
+        if not inspect.isfunction(attr) or inspect.isgeneratorfunction(inspect.unwrap(attr)) or name.startswith("_"): raise AttributeError(name)
+        doc = self.doc
+        read = name in READ_METHODS
+        async def method(*args, timeout:float|None=None, **kwargs):
+            read_key = None
+            if read:
+                read_key = (id(doc),name,args,tuple(sorted(kwargs.items())))
+                try:
+                    hash(read_key)
+                except TypeError:
+                    read_key = None
+            return await self.app.call(lambda: getattr(doc,name)(*args,**kwargs),timeout=timeout,read_key=read_key)
+        method.__name__ = name
+        setattr(self,name,method)
+        return method
@@ -0,0 +1,258 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Callable
+
+from SuperProDesigner import SuperProDesigner, SuperProDesignerDocument
+
+def _healthy(doc:SuperProDesignerDocument) -> bool:
+    try:
+        doc.IsCOMSimDataComplete()
+        return True
+    except Exception:
+        return False
+
+class _Slot:
+    """
+    One SuperPro Designer instance of a DocumentPool and the documents open in it, least recently used first.
+    """
+    def __init__(self, slot_id:int):
+        self.id = slot_id
+        self.app:SuperProDesigner|None = None
+        self.docs:OrderedDict[str,SuperProDesignerDocument] = OrderedDict()  # Case path -> document
+        self.paths:dict[str,str] = {}  # Case path -> path of the file actually opened
+        self.active:str|None = None
+        self.leased = True
+        self.idleSince = time.monotonic()
+
+class Lease:
+    """
+    A document of a DocumentPool, returned to the pool (and reset) by Release() or at the end of a with block.
+    """
+    def __init__(self, pool:"DocumentPool", slot:_Slot, case_path:str, doc:SuperProDesignerDocument):
+        self.pool = pool
+        self.slot = slot
+        self.case_path = case_path
+        self.doc = doc
+        self.released = False
+
+    def Release(self, failed:bool=False):
+        if self.released: return
+        self.released = True
+        self.pool._release(self,failed)
+
+    def __enter__(self):
+        return self.doc
+
+    def __exit__(self, exc_type, exc, tb):
+        self.Release(failed=exc_type is not None)
+
+class DocumentPool:
+    """
+    Keeps up to size SuperPro Designer instances (made by factory) with their case files open, and hands the documents out as leases:
+
+        with pool.Lease(case_path) as doc: ...
+
+    A returned document is brought back to the state it was opened in, by undoing its variable writes (reset "undo", see SuperProDesignerDocument.Undo)
+    or, when that is not possible or with reset "reopen", by closing it and opening a fresh copy of the case file.
+    With copy_files the case files are read into memory once and every instance opens its own copy, so a lessee saving the document cannot alter the pristine case.
+    An instance holds at most docs_per_app documents (switching between them with SetActiveDoc), instances idle for idle_timeout seconds are closed,
+    and an instance whose COM server no longer answers is dropped and replaced.
+    """
+    def __init__(self, size:int=1, factory:Callable=SuperProDesigner, docs_per_app:int=4, idle_timeout:float|None=None,
+                 reset:str="undo", copy_files:bool=True, directory:str|None=None):
+        if reset not in ("undo","reopen"): raise ValueError(f"Unknown reset {reset}")
+        self.size = size
+        self.factory = factory
+        self.docs_per_app = docs_per_app
+        self.idle_timeout = idle_timeout
+        self.reset = reset
+        self.copy_files = copy_files
+        self.stats:Counter[str] = Counter()
+        self._slots:list[_Slot] = []
+        self._slot_ids = iter(range(1<<62))
+        self._images:dict[str,bytes] = {}
+        self._directory = directory
+        self._cond = threading.Condition()
+        self._closed = False
+
+    # Leases
+    def Lease(self, case_path:str, timeout:float|None=None) -> Lease:
+        """
+        Leases the document of case_path, preferring an idle instance that already has it open and waiting up to timeout seconds (forever if None) for one to be free.
+        Raises TimeoutError when none became free.
+        """
+        case_path = os.path.abspath(case_path)
+        deadline = None if timeout is None else time.monotonic()+timeout
+        evicted = []
+        try:
+            with self._cond:
+                while True:
+                    if self._closed: raise RuntimeError("DocumentPool is closed")
+                    evicted += self._evict_idle()
+                    slot = self._take(case_path)
+                    if slot is not None: break
+                    remaining = None if deadline is None else deadline-time.monotonic()
+                    if remaining is not None and remaining <= 0: raise TimeoutError(f"No free document for {case_path}")
+                    self._cond.wait(remaining)
+        finally:
+            # Closing an instance can take long, it is not done under the lock
+            for old in evicted: self._close_app(old)
+        try:
+            return Lease(self,slot,case_path,self._open(slot,case_path))
+        except BaseException:
+            self._drop(slot)
+            raise
+
+    def _take(self, case_path:str) -> _Slot|None:
+        idle = [slot for slot in self._slots if not slot.leased]
+        slot = next((slot for slot in idle if case_path in slot.docs),None) or (idle[0] if idle else None)
+        if slot is None and len(self._slots) < self.size:
+            slot = _Slot(next(self._slot_ids))
+            self._slots.append(slot)
+        if slot is not None: slot.leased = True
+        return slot
+
+    def _open(self, slot:_Slot, case_path:str) -> SuperProDesignerDocument:
+        if slot.app is None:
+            slot.app = self.factory()
+            self.stats["apps"] += 1
+        doc = slot.docs.get(case_path)
+        if doc is not None and not _healthy(doc):
+            self.stats["unhealthy"] += 1
+            self._close_app(slot)
+            slot.app = self.factory()
+            self.stats["apps"] += 1
+            doc = None
+        if doc is None:
+            while len(slot.docs) >= self.docs_per_app:
+                _,old = slot.docs.popitem(last=False)
+                self._close_doc(old)
+                self.stats["evictedDocs"] += 1
+            doc = self._open_doc(slot,case_path)
+        else:
+            if slot.active != case_path: slot.app.SetActiveDoc(slot.paths[case_path])
+            self.stats["reused"] += 1
+        slot.docs.move_to_end(case_path)
+        slot.active = case_path
+        return doc
+
+    def _open_doc(self, slot:_Slot, case_path:str) -> SuperProDesignerDocument:
+        path = case_path
+        if self.copy_files:
+            image = self._images.get(case_path)
+            if image is None:
+                with open(case_path,'rb') as f: image = self._images[case_path] = f.read()
+            if self._directory is None: self._directory = tempfile.mkdtemp(prefix="spd-pool-")
+            directory = os.path.join(self._directory,f"app-{slot.id}")
+            os.makedirs(directory,exist_ok=True)
+            path = os.path.join(directory,f"{len(slot.paths)}-{os.path.basename(case_path)}") if case_path not in slot.paths else slot.paths[case_path]
+            with open(path,'wb') as f: f.write(image)
+        doc = slot.app.OpenDoc(path)
+        doc.StartUndoLog()
+        slot.docs[case_path] = doc
+        slot.paths[case_path] = path
+        self.stats["opened"] += 1
+        return doc
+
+    def _release(self, lease:Lease, failed:bool):
+        slot,doc = lease.slot,lease.doc
+        try:
+            if failed and not _healthy(doc):
+                self.stats["unhealthy"] += 1
+                self._drop(slot)
+                return
+            if self.reset == "undo" and doc.Undo():
+                self.stats["undone"] += 1
+            else:
+                slot.docs.pop(lease.case_path,None)
+                self._close_doc(doc)
+                self._open_doc(slot,lease.case_path)
+                slot.active = lease.case_path
+                self.stats["reopened"] += 1
+        except Exception:
+            self._drop(slot)
+            raise
+        with self._cond:
+            slot.leased = False
+            slot.idleSince = time.monotonic()
+            self._cond.notify()
+
+    # Instances
+    def _drop(self, slot:_Slot):
+        self._close_app(slot)
+        with self._cond:
+            if slot in self._slots: self._slots.remove(slot)
+            self._cond.notify()
+
+    def _close_doc(self, doc:SuperProDesignerDocument):
+        try:
+            doc.CloseDoc(False)
+        except Exception:
+            pass
+
+    def _close_app(self, slot:_Slot):
+        if slot.app is not None:
+            try:
+                slot.app.CloseAllDocs(False)
+                slot.app.CloseApp()
+            except Exception:
+                pass
+        slot.app = None
+        slot.docs.clear()
+        slot.paths.clear()
+        slot.active = None
+
+    def _evict_idle(self) -> list[_Slot]:
+        # Called with the lock held, takes the instances idle for too long out of the pool and returns them for the caller to close after releasing the lock
+        if self.idle_timeout is None: return []
+        now = time.monotonic()
+        evicted = [slot for slot in self._slots if not slot.leased and now-slot.idleSince > self.idle_timeout]
+        for slot in evicted: self._slots.remove(slot)
+        self.stats["evictedApps"] += len(evicted)
+        return evicted
+
+    def HealthCheck(self) -> int:
+        """
+        Drops the idle instances whose COM server does not answer and evicts those idle for too long. Returns the number of instances dropped as unhealthy.
+        """
+        with self._cond:
+            evicted = self._evict_idle()
+            idle = [slot for slot in self._slots if not slot.leased]
+            for slot in idle: slot.leased = True
+        for slot in evicted: self._close_app(slot)
+        dropped = 0
+        for slot in idle:
+            if slot.docs and not all(_healthy(doc) for doc in slot.docs.values()):
+                self.stats["unhealthy"] += 1
+                self._drop(slot)
+                dropped += 1
+                continue
+            with self._cond:
+                slot.leased = False
+                self._cond.notify()
+        return dropped
+
+    @property
+    def apps(self) -> int:
+        return len(self._slots)
+
+    def close(self):
+        """
+        Closes every instance (waiting for none of the leased ones) and deletes the case file copies.
+        """
+        with self._cond:
+            self._closed = True
+            slots,self._slots = self._slots,[]
+            self._cond.notify_all()
+        for slot in slots: self._close_app(slot)
+        if self._directory is not None and self.copy_files: shutil.rmtree(self._directory,ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,265 @@
+import csv
+import json
+import math
+import os
+from typing import Iterable, Iterator
+
+from SuperProDesigner import COMPONENT_STREAM_VARS
+
+# Columns of the rows produced by ExportRows, one row per (object, variable, component), and their Parquet types
+EXPORT_FIELDS = ("kind","name","component","variable","value","text")
+EXPORT_TYPES = {"kind":"string","name":"string","component":"string","variable":"string","value":"double","text":"string"}
+
+class _Sink:
+    """
+    Append-only writer of row dicts, buffering row_group_size rows per chunk.
+    After every chunk a checkpoint file (path + ".checkpoint.json") records what has been written, so that a restarted job can resume after the last chunk.
+    The columns are fields, or else the keys of the first row; sinks with fixed columns raise ValueError for a row with other keys.
+    types declares the pyarrow type alias ("double", "string", "int64", ...) of columns, see ParquetSink.
+    """
+    fixed_fields = True
+
+    def __init__(self, path:str, row_group_size:int=10000, fields:Iterable[str]|None=None, types:dict[str,str]|None=None):
+        self.path = path
+        self.row_group_size = row_group_size
+        self._checkpoint_path = path.rstrip("/\\") + ".checkpoint.json"
+        try:
+            with open(self._checkpoint_path,encoding='utf-8') as f: self.checkpoint = json.load(f)
+        except FileNotFoundError:
+            self.checkpoint = {"rows":0}
+        if fields is not None: self.checkpoint.setdefault("fields",list(fields))
+        self.DeclareTypes(types or {})
+        self._buffer:list[dict] = []
+        self._columns:frozenset[str]|None = None
+        self._before_checkpoint:list = []  # Called with the chunk's rows just before the checkpoint is saved
+        self._open()
+
+    @property
+    def rows(self) -> int:
+        """
+        Number of rows safely written, i.e. covered by the checkpoint.
+        """
+        return self.checkpoint["rows"]
+
+    @property
+    def fields(self) -> list[str]|None:
+        return self.checkpoint.get("fields")
+
+    @property
+    def types(self) -> dict[str,str]:
+        return self.checkpoint["types"]
+
+    def DeclareTypes(self, types:dict[str,str]):
+        """
+        Declares the types of columns that have none yet.
+        """
+        declared = self.checkpoint.setdefault("types",{})
+        if isinstance(declared,list): declared = self.checkpoint["types"] = dict(zip(self.fields,declared))  # Checkpoints of older versions
+        for field,t in types.items(): declared.setdefault(field,t)
+
+    def write(self, row:dict):
+        if self.fields is None: self.checkpoint["fields"] = list(row)
+        if self.fixed_fields:
+            if self._columns is None: self._columns = frozenset(self.fields)
+            if not row.keys() <= self._columns: raise ValueError(f"{sorted(row.keys()-self._columns)} are not columns of {self.path}, declare every column with fields")
+        self._buffer.append(row)
+        if len(self._buffer) >= self.row_group_size: self.flush()
+
+    def flush(self):
+        if not self._buffer: return
+        self._write_chunk(self._buffer)
+        self.checkpoint["rows"] += len(self._buffer)
+        for hook in self._before_checkpoint: hook(self._buffer)
+        self._buffer = []
+        with open(self._checkpoint_path+".tmp",'w',encoding='utf-8') as f: json.dump(self.checkpoint,f)
+        os.replace(self._checkpoint_path+".tmp",self._checkpoint_path)
+
+    def close(self):
+        self.flush()
+        self._close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _open(self): pass
+    def _write_chunk(self, rows:list[dict]): raise NotImplementedError()
+    def _close(self): pass
+
+class _TextSink(_Sink):
+    def _open(self):
+        # Anything after the last checkpoint is a partially written chunk
+        size = self.checkpoint.setdefault("size",0)
+        self._file = open(self.path,'a+' if size else 'w',encoding='utf-8',newline='')
+        self._file.truncate(size)
+        self._file.seek(size)
+
+    def _write_chunk(self, rows:list[dict]):
+        self._write_rows(rows)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.checkpoint["size"] = self._file.tell()
+
+    def _close(self):
+        self._file.close()
+
+class CSVSink(_TextSink):
+    """
+    Writes rows to a CSV file, the columns being fields or else the keys of the first row. Columns a row leaves out are empty.
+    """
+    def _write_rows(self, rows:list[dict]):
+        writer = csv.DictWriter(self._file,self.fields)
+        if self._file.tell() == 0: writer.writeheader()
+        writer.writerows(rows)
+
+class NDJSONSink(_TextSink):
+    """
+    Writes rows as newline delimited JSON, whatever their keys.
+    """
+    fixed_fields = False
+
+    def _write_rows(self, rows:list[dict]):
+        self._file.writelines(json.dumps(row)+"\n" for row in rows)
+
+class ParquetSink(_Sink):
+    """
+    Writes every chunk as one Parquet file (part-00000.parquet, ...) in the directory path. Needs pyarrow.
+    Every part has the same schema, so that the parts read back as one dataset: the declared types (see _Sink), the others being inferred from the first chunk
+    (a column without a declared type must then hold a value).
+    """
+    def _open(self):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("ParquetSink needs pyarrow, use CSVSink or NDJSONSink without it") from e
+        self._pa = pyarrow
+        os.makedirs(self.path,exist_ok=True)
+        parts = self.checkpoint.setdefault("parts",0)
+        for name in os.listdir(self.path):
+            if name.startswith("part-") and name.endswith(".parquet") and int(name[5:-8]) >= parts: os.remove(os.path.join(self.path,name))
+
+    def _write_chunk(self, rows:list[dict]):
+        pa = self._pa
+        columns = {field:[row.get(field) for row in rows] for field in self.fields}
+        types = self.types
+        undeclared = [field for field in self.fields if field not in types]
+        if undeclared:
+            inferred = pa.table({field:columns[field] for field in undeclared}).schema
+            nulls = [field for field in undeclared if pa.types.is_null(inferred.field(field).type)]
+            if nulls: raise ValueError(f"The columns {nulls} of {self.path} have no values to infer their types from, declare them with types")
+            self.DeclareTypes({field:str(inferred.field(field).type) for field in undeclared})
+        table = pa.table(columns,schema=pa.schema([(field,pa.type_for_alias(types[field])) for field in self.fields]))
+        pa.parquet.write_table(table,os.path.join(self.path,f"part-{self.checkpoint['parts']:05d}.parquet"))
+        self.checkpoint["parts"] += 1
+
+def ExportPlan(doc, what:Iterable[str]=("stream","procedure","equipment","component"), stream_vars:Iterable[str]|None=None,
+               procedure_vars:Iterable[str]|None=None, equipment_vars:Iterable[str]|None=None, component_var:str="componentMassFlow_VID") -> Iterator[tuple]:
+    """
+    Yields (kind, name, var_keys, components) for every object to export, in a stable order.
+    Each object gives len(var_keys) * max(1, len(components)) rows.
+    """
+    app = doc.app
+    what = set(what)
+    if "stream" in what or "component" in what:
+        streams = doc.EnumerateAll("flowsheet_CID.stream_LID",memo=True)
+        stream_vars = tuple(key for key in app.stream_vars if key not in COMPONENT_STREAM_VARS) if stream_vars is None else tuple(stream_vars)
+        components = doc.EnumerateAll("flowsheet_CID.pureComp_LID",memo=True) if "component" in what else ()
+        for name in streams:
+            if "stream" in what: yield ("stream",name,stream_vars,())
+            if components: yield ("stream",name,(component_var,),components)
+    if "procedure" in what:
+        procedure_vars = tuple(app.procedure_vars) if procedure_vars is None else tuple(procedure_vars)
+        for name in doc.EnumerateAll("flowsheet_CID.unitProc_LID",memo=True): yield ("procedure",name,procedure_vars,())
+    if "equipment" in what:
+        equipment_vars = tuple(app.equipment_vars) if equipment_vars is None else tuple(equipment_vars)
+        for name in doc.EnumerateAll("flowsheet_CID.equipment_LID",memo=True): yield ("equipment",name,equipment_vars,())
+
+def ExportRows(doc, plan:Iterable[tuple], skip:int=0) -> Iterator[dict]:
+    """
+    Reads the objects of plan (see ExportPlan) one at a time through doc.Snapshot and yields EXPORT_FIELDS rows, leaving out the first skip rows without reading them.
+    """
+    for kind,name,var_keys,components in plan:
+        count = len(var_keys)*max(1,len(components))
+        if skip >= count:
+            skip -= count
+            continue
+        if kind == "stream": table = doc.Snapshot(streams=[name],stream_vars=var_keys,components=components)["stream"]
+        elif kind == "procedure": table = doc.Snapshot(procedures=[name],procedure_vars=var_keys)["procedure"]
+        else: table = doc.Snapshot(equipment=[name],equipment_vars=var_keys)["equipment"]
+        rows = (_row(kind,name,comp,key,table[key][0] if not components else table[key][0,j]) for key in var_keys for j,comp in enumerate(components or ('',)))
+        for row in rows:
+            if skip:
+                skip -= 1
+                continue
+            yield row
+
+def _row(kind:str, name:str, component:str, variable:str, val) -> dict:
+    if isinstance(val,str): return {"kind":kind,"name":name,"component":component,"variable":variable,"value":None,"text":val}
+    val = None if val is None or math.isnan(val) else float(val)
+    return {"kind":kind,"name":name,"component":component,"variable":variable,"value":val,"text":None}
+
+def Export(doc, sink:_Sink, what:Iterable[str]=("stream","procedure","equipment","component"), **plan_options) -> int:
+    """
+    Streams the rows of ExportPlan(doc, what, **plan_options) into sink, resuming after the rows the sink has already checkpointed.
+    Returns the number of rows written by this call.
+    """
+    sink.DeclareTypes(EXPORT_TYPES)
+    written = 0
+    for row in ExportRows(doc,ExportPlan(doc,what,**plan_options),skip=sink.rows):
+        sink.write(row)
+        written += 1
+    sink.flush()
+    return written
+
+class SweepSink:
+    """
+    Writes ScenarioResult rows (index, error, attempts, then one column per input and output address) to a sink and remembers the successful scenarios in its checkpoint.
+    Pass completed to ScenarioRunner.run(skip=...) to resume a sweep, the failed scenarios being run again.
+    When the scenarios do not all set the same addresses, list every input address in inputs so that the columns are known from the start.
+    The address columns are "double" for ParquetSink unless types gives {address: type alias}.
+    """
+    def __init__(self, sink:_Sink, outputs:list, inputs:list|None=None, types:dict|None=None):
+        self.sink = sink
+        self.outputs = list(outputs)
+        self.types = dict(types or {})
+        columns = {"index":"int64","error":"string","attempts":"int64"}
+        if inputs is not None:
+            columns.update({_column("in",address):self.types.get(address,"double") for address in inputs})
+            columns.update({_column("out",address):self.types.get(address,"double") for address in self.outputs})
+            sink.checkpoint.setdefault("fields",list(columns))
+        sink.DeclareTypes(columns)
+        sink.checkpoint.setdefault("completed",[])
+        sink._before_checkpoint.append(lambda rows: sink.checkpoint["completed"].extend(row["index"] for row in rows if row["error"] is None))
+
+    @property
+    def completed(self) -> set[int]:
+        return set(self.sink.checkpoint["completed"])
+
+    def write(self, result):
+        row = {"index":result.index,"error":result.error,"attempts":result.attempts}
+        addresses = list(result.inputs.items())+list(zip(self.outputs,result.outputs or [None]*len(self.outputs)))
+        columns = {_column("in" if i < len(result.inputs) else "out",address):val for i,(address,val) in enumerate(addresses)}
+        self.sink.DeclareTypes({column:self.types.get(address,"double") for column,(address,_) in zip(columns,addresses)})
+        row.update(columns)
+        self.sink.write(row)
+
+    def flush(self):
+        self.sink.flush()
+
+    def close(self):
+        self.flush()
+        self.sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def _column(prefix:str, address:tuple) -> str:
+    kind,name,var,*comp = address
+    name = "/".join(name) if isinstance(name,tuple) else name
+    return ":".join([prefix,kind,name,str(var)]+[c for c in comp if c])
@@ -0,0 +1,515 @@
+import random
+import threading
+import time
+from collections import Counter
+
+from SuperProDesigner import BuildVarTables, SuperProDesigner
+
+class FakeTypeLib:
+    """
+    Stands in for the comtypes module generated from Designer.tlb, every constant (flowsheet_CID, massFlow_VID, ...) gets a distinct integer.
+    """
+    def __init__(self):
+        self._ids:dict[str,int] = {}
+
+    def __getattr__(self, name:str) -> int:
+        if name.startswith("__"): raise AttributeError(name)
+        return self._ids.setdefault(name,len(self._ids)+1)
+
+def FakeTables() -> dict[str,dict]:
+    return BuildVarTables(FakeTypeLib())
+
+def _spin(seconds:float):
+    # time.sleep is too coarse for sub-millisecond COM latencies
+    if seconds <= 0: return
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end: pass
+
+class FakeDesignerDocument:
+    """
+    Pure-Python stand-in for the COM Document object, implementing the methods SuperProDesignerDocument calls.
+    Every COM call waits latency seconds and DoMEBalances waits solve_latency seconds; calls counts the calls per method.
+    Values are kept per (kind, name, VarID, compLocalName) and lists per (containerID, listID, container names); see BuildFlowsheet for a synthetic case.
+    DoMEBalances splits the total input component flows over the other streams by their share (so the balances close), and DoEconomicCalculations scales the equipment purchase costs with throughput.
+    model(doc), when given, is called at the end of DoMEBalances to compute further outputs from the inputs (see QuadraticModel).
+    """
+    def __init__(self, tables:dict[str,dict]|None=None, latency:float=0.0, solve_latency:float=0.0, model=None):
+        self.tables = tables or FakeTables()
+        self.latency = latency
+        self.solve_latency = solve_latency
+        self.model = model
+        self.values:dict[tuple,object] = {}
+        self.lists:dict[tuple,list[str]] = {}
+        self.objects:dict[str,set] = {"stream":set(),"procedure":set(),"equipment":set()}
+        self.shares:dict[str,float] = {}  # Non-input stream -> share of the total input flow after DoMEBalances
+        self.basePC:dict[str,float] = {}
+        self.calls:Counter[str] = Counter()
+        self.complete = True
+        self.error = ""
+        self.closed = False
+        self.application:FakeApplication|None = None  # Set by FakeApplication.OpenDoc, whose faults then apply to the document's calls
+
+    def _call(self, method:str):
+        self.calls[method] += 1
+        if self.application is not None: self.application._fault(method)
+        _spin(self.latency)
+
+    def _vid(self, key:str) -> int:
+        return self.tables["stream_vars"].get(key) or self.tables["procedure_vars"].get(key) or self.tables["equipment_vars"].get(key) or self.tables["operation_vars"][key]
+
+    def _list(self, path:str, *containers:str) -> list[str]:
+        cid,lid = path.split('.')
+        return self.lists.setdefault(self.tables["enum_vars"][cid][lid]+(containers or ('',)),[])
+
+    def _get(self, key:tuple, ref) -> bool:
+        if key[1] not in self.objects[key[0]]:
+            self.error = f"Unknown {key[0]} {key[1]}"
+            return False
+        ref._obj.value = self.values.get(key,0.0)
+        return True
+
+    def _set(self, key:tuple, val) -> bool:
+        if key[1] not in self.objects.get(key[0],()) and key[0] != "operation":
+            self.error = f"Unknown {key[0]} {key[1]}"
+            return False
+        self.values[key] = val
+        return True
+
+    # Document
+    def CloseDoc(self, bSaveIfNeeded:bool):
+        self._call("CloseDoc")
+        self.closed = True
+
+    def SaveDoc(self):
+        self._call("SaveDoc")
+
+    # Simulation
+    def DoMEBalances(self, val):
+        self._call("DoMEBalances")
+        time.sleep(self.solve_latency)
+        massFlow,compFlow,compFrac = self._vid("massFlow_VID"),self._vid("componentMassFlow_VID"),self._vid("compMassFrac_VID")
+        inputs = [name for name in self.objects["stream"] if self.values.get(("stream",name,self._vid("isInputStream_VID"),''))]
+        components = self._list("flowsheet_CID.pureComp_LID")
+        totals = {comp:sum(self.values.get(("stream",name,compFlow,comp),0.0) for name in inputs) for comp in components}
+        for name,share in self.shares.items():
+            for comp,total in totals.items(): self.values[("stream",name,compFlow,comp)] = share*total
+            flow = self.values[("stream",name,massFlow,'')] = share*sum(totals.values())
+            for comp,total in totals.items(): self.values[("stream",name,compFrac,comp)] = share*total/flow if flow else 0.0
+        if self.model is not None: self.model(self)
+        return self.complete
+
+    def DoEconomicCalculations(self):
+        self._call("DoEconomicCalculations")
+        massFlow,equipPC = self._vid("massFlow_VID"),self._vid("equipPC_VID")
+        throughput = sum(self.values.get(("stream",name,massFlow,''),0.0) for name in self._list("flowsheet_CID.inStream_LID"))
+        for name,base in self.basePC.items(): self.values[("equipment",name,equipPC,'')] = base*(max(throughput,0.0)/1000.0)**0.6
+        return self.complete
+
+    def ScaleUpThroughput(self, VarID:int, val) -> bool:
+        self._call("ScaleUpThroughput")
+        if not isinstance(val,float) or val <= 0: return False
+        for name in self._list("flowsheet_CID.inStream_LID"):
+            for key in [key for key in self.values if key[0] == "stream" and key[1] == name and key[2] in (self._vid("massFlow_VID"),self._vid("componentMassFlow_VID"))]:
+                self.values[key] *= val
+        return True
+
+    def IsCOMSimDataComplete(self) -> bool:
+        self._call("IsCOMSimDataComplete")
+        return self.complete
+
+    def GetCOMErrorMsg(self, val) -> bool:
+        self._call("GetCOMErrorMsg")
+        val._obj.value = self.error
+        return True
+
+    # Renames
+    def _rename(self, kind:str, oldName, newName) -> bool:
+        names = self.objects[kind]
+        if oldName not in names or newName in names: return False
+        names.discard(oldName)
+        names.add(newName)
+        self.values = {(key[0],newName)+key[2:] if key[:2] == (kind,oldName) else key:val for key,val in self.values.items()}
+        self.lists = {key[:2]+tuple(newName if name == oldName else name for name in key[2:]):[newName if name == oldName else name for name in items] for key,items in self.lists.items()}
+        return True
+
+    def RenameStream(self, oldName:str, newName:str) -> bool:
+        self._call("RenameStream")
+        if not self._rename("stream",oldName,newName): return False
+        if oldName in self.shares: self.shares[newName] = self.shares.pop(oldName)
+        return True
+
+    def RenameProcedure(self, oldName:str, newName:str) -> bool:
+        self._call("RenameProcedure")
+        if not self._rename("procedure",oldName,newName): return False
+        self.values = {("operation",(newName,key[1][1]))+key[2:] if key[0] == "operation" and key[1][0] == oldName else key:val for key,val in self.values.items()}
+        return True
+
+    def RenameEquipment(self, oldName:str, newName:str) -> bool:
+        self._call("RenameEquipment")
+        if not self._rename("equipment",oldName,newName): return False
+        if oldName in self.basePC: self.basePC[newName] = self.basePC.pop(oldName)
+        equipmentName = self._vid("equipmentName_VID")
+        for key,val in self.values.items():
+            if key[2] == equipmentName and val == oldName: self.values[key] = newName
+        return True
+
+    def RenameOperation(self, procedureName:str, oldName:str, newName:str) -> bool:
+        self._call("RenameOperation")
+        operations = self._list("unitProc_CID.operation_LID",procedureName)
+        if oldName not in operations or newName in operations: return False
+        operations[operations.index(oldName)] = newName
+        self.values = {("operation",(procedureName,newName))+key[2:] if key[:2] == ("operation",(procedureName,oldName)) else key:val for key,val in self.values.items()}
+        return True
+
+    # Procedures, equipment and operations
+    def GetUPVarVal(self, procName:str, VarID:int, val) -> bool:
+        self._call("GetUPVarVal")
+        return self._get(("procedure",procName,VarID,''),val)
+
+    def SetUPVarVal(self, procName:str, VarID:int, val) -> bool:
+        self._call("SetUPVarVal")
+        return self._set(("procedure",procName,VarID,''),val)
+
+    def GetUPVarVal2(self, procName:str, VarID:int, val, val2) -> bool:
+        self._call("GetUPVarVal2")
+        return self._get(("procedure",procName,VarID,val2),val)
+
+    def SetUPVarVal2(self, procName:str, VarID:int, val, val2) -> bool:
+        self._call("SetUPVarVal2")
+        return self._set(("procedure",procName,VarID,val2),val)
+
+    def GetUPEmptiedContentsVarVal(self, procName:str, VarID:int, val, val2) -> bool:
+        self._call("GetUPEmptiedContentsVarVal")
+        return self._get(("procedure",procName,VarID,("emptied",val2)),val)
+
+    def GetEquipVarVal(self, equipName:str, VarID:int, val) -> bool:
+        self._call("GetEquipVarVal")
+        return self._get(("equipment",equipName,VarID,''),val)
+
+    def SetEquipVarVal(self, equipName:str, VarID:int, val) -> bool:
+        self._call("SetEquipVarVal")
+        return self._set(("equipment",equipName,VarID,''),val)
+
+    def GetEquipVarVal3(self, equipName:str, VarID:int, val, val2, val3) -> bool:
+        self._call("GetEquipVarVal3")
+        return self._get(("equipment",equipName,VarID,(val2,val3)),val)
+
+    def SetEquipVarVal3(self, equipName:str, VarID:int, val, val2, val3) -> bool:
+        self._call("SetEquipVarVal3")
+        return self._set(("equipment",equipName,VarID,(val2,val3)),val)
+
+    def _getOper(self, procName:str, operName:str, VarID:int, qualifier, ref) -> bool:
+        if operName not in self._list("unitProc_CID.operation_LID",procName):
+            self.error = f"Unknown operation {operName} in {procName}"
+            return False
+        ref._obj.value = self.values.get(("operation",(procName,operName),VarID,qualifier),0.0)
+        return True
+
+    def GetOperVarVal(self, procName:str, operName:str, VarID:int, val) -> bool:
+        self._call("GetOperVarVal")
+        return self._getOper(procName,operName,VarID,'',val)
+
+    def GetOperVarVal2(self, procName:str, operName:str, VarID:int, val, val2) -> bool:
+        self._call("GetOperVarVal2")
+        return self._getOper(procName,operName,VarID,val2,val)
+
+    def GetOperVarVal3(self, procName:str, operName:str, VarID:int, val, val2, val3) -> bool:
+        self._call("GetOperVarVal3")
+        return self._getOper(procName,operName,VarID,(val2,val3),val)
+
+    def SetOperVarVal(self, procName:str, operName:str, VarID:int, val) -> bool:
+        self._call("SetOperVarVal")
+        if operName not in self._list("unitProc_CID.operation_LID",procName): return False
+        return self._set(("operation",(procName,operName),VarID,''),val)
+
+    def SetOperVarVal2(self, procName:str, operName:str, VarID:int, val, val2) -> bool:
+        self._call("SetOperVarVal2")
+        if operName not in self._list("unitProc_CID.operation_LID",procName): return False
+        return self._set(("operation",(procName,operName),VarID,val2),val)
+
+    def SetOperVarVal3(self, procName:str, operName:str, VarID:int, val, val2, val3) -> bool:
+        self._call("SetOperVarVal3")
+        if operName not in self._list("unitProc_CID.operation_LID",procName): return False
+        return self._set(("operation",(procName,operName),VarID,(val2,val3)),val)
+
+    # Streams
+    def GetStreamVarVal(self, streamName:str, VarID:int, val, compLocalName:str) -> bool:
+        self._call("GetStreamVarVal")
+        return self._get(("stream",streamName,VarID,compLocalName),val)
+
+    def SetStreamVarVal(self, streamName:str, VarID:int, val, compLocalName:str) -> bool:
+        self._call("SetStreamVarVal")
+        if not self.values.get(("stream",streamName,self._vid("isInputStream_VID"),'')):
+            self.error = f"{streamName} is not an input stream"
+            return False
+        if not self._set(("stream",streamName,VarID,compLocalName),val): return False
+        massFlow,compFlow,compFrac = self._vid("massFlow_VID"),self._vid("componentMassFlow_VID"),self._vid("compMassFrac_VID")
+        if VarID == massFlow and compLocalName == '':
+            # Like SPD, setting the total flow keeps the composition
+            for comp in self._list("stream_CID.pureComp_LID",streamName): self.values[("stream",streamName,compFlow,comp)] = val*self.values.get(("stream",streamName,compFrac,comp),0.0)
+        return True
+
+    def AddIngredientToInputStream(self, streamName:str, ingredientName:str, VarID:int, val) -> bool:
+        self._call("AddIngredientToInputStream")
+        if streamName not in self.objects["stream"]: return False
+        if ingredientName in self._list("flowsheet_CID.pureComp_LID"): ingredients = self._list("stream_CID.pureComp_LID",streamName)
+        elif ingredientName in self._list("flowsheet_CID.stockMix_LID"): ingredients = self._list("stream_CID.stockMix_LID",streamName)
+        else: return False
+        if ingredientName not in ingredients: ingredients.append(ingredientName)
+        self.values[("stream",streamName,VarID,ingredientName)] = val
+        self._compose(streamName,VarID)
+        return True
+
+    def RemoveIngredientFromInputStream(self, streamName:str, ingredientName:str) -> bool:
+        self._call("RemoveIngredientFromInputStream")
+        ingredients = next((ingredients for ingredients in (self._list("stream_CID.pureComp_LID",streamName),self._list("stream_CID.stockMix_LID",streamName)) if ingredientName in ingredients),None)
+        if ingredients is None: return False
+        ingredients.remove(ingredientName)
+        for key in [key for key in self.values if key[0] == "stream" and key[1] == streamName and key[3] == ingredientName]: del self.values[key]
+        self._compose(streamName,self._vid("componentMassFlow_VID"))
+        return True
+
+    def _compose(self, streamName:str, VarID:int):
+        # Keeps the total flow, ingredient flows and mass fractions of an input stream consistent after an ingredient change (a stock mixture counts as one ingredient)
+        massFlow,compFlow,compFrac = self._vid("massFlow_VID"),self._vid("componentMassFlow_VID"),self._vid("compMassFrac_VID")
+        ingredients = self._list("stream_CID.pureComp_LID",streamName)+self._list("stream_CID.stockMix_LID",streamName)
+        if VarID == compFrac:
+            total = self.values.get(("stream",streamName,massFlow,''),0.0)
+            for comp in ingredients: self.values[("stream",streamName,compFlow,comp)] = total*self.values.get(("stream",streamName,compFrac,comp),0.0)
+        else:
+            total = self.values[("stream",streamName,massFlow,'')] = sum(self.values.get(("stream",streamName,compFlow,comp),0.0) for comp in ingredients)
+            for comp in ingredients: self.values[("stream",streamName,compFrac,comp)] = self.values.get(("stream",streamName,compFlow,comp),0.0)/total if total else 0.0
+
+    def IsInputStreamCompositionValid(self, streamName:str) -> bool:
+        self._call("IsInputStreamCompositionValid")
+        compFrac = self._vid("compMassFrac_VID")
+        return abs(sum(self.values.get(("stream",streamName,compFrac,comp),0.0) for comp in self._list("stream_CID.pureComp_LID",streamName)+self._list("stream_CID.stockMix_LID",streamName))-1.0) < 1e-6
+
+    # Initialization
+    def SetStreamAutoInitOptions(self, streamName:str, varID:int, val) -> bool:
+        self._call("SetStreamAutoInitOptions")
+        return self._set(("stream",streamName,varID,'init'),val)
+
+    def AutoInitStream(self, streamName:str) -> bool:
+        self._call("AutoInitStream")
+        return streamName in self.objects["stream"]
+
+    # Enumeration
+    def StartEnumeration(self, pos, listID:int, containerID:int, containerName:str) -> bool:
+        self._call("StartEnumeration")
+        pos._obj.value = 0
+        return bool(self.lists.get((containerID,listID,containerName)))
+
+    def GetNextItemName(self, pos, itemName, listID:int, containerID:int, containerName:str) -> bool:
+        self._call("GetNextItemName")
+        return self._next(pos,itemName,(containerID,listID,containerName))
+
+    def StartEnumeration2(self, pos, listID:int, containerID:int, containerName1:str, containerName2:str) -> bool:
+        self._call("StartEnumeration2")
+        pos._obj.value = 0
+        return bool(self.lists.get((containerID,listID,containerName1,containerName2)))
+
+    def GetNextItemName2(self, pos, itemName, listID:int, containerID:int, containerName1:str, containerName2:str) -> bool:
+        self._call("GetNextItemName2")
+        return self._next(pos,itemName,(containerID,listID,containerName1,containerName2))
+
+    def _next(self, pos, itemName, key:tuple) -> bool:
+        names = self.lists.get(key,())
+        index = pos._obj.value
+        if index >= len(names): return False
+        itemName._obj.value = names[index]
+        pos._obj.value = index+1
+        return True
+
+class QuadraticModel:
+    """
+    Analytic solve model for optimizer tests: output (kind, name, variable key) becomes offset + sum(((x - optimum) / scale)**2) over the inputs {(kind, name, variable key): (optimum, scale)}.
+    """
+    def __init__(self, inputs:dict[tuple,tuple[float,float]], output:tuple=("procedure","P-0","cycleTime_VID"), offset:float=1.0):
+        self.inputs = inputs
+        self.output = output
+        self.offset = offset
+
+    def __call__(self, doc:FakeDesignerDocument):
+        val = self.offset
+        for (kind,name,key),(optimum,scale) in self.inputs.items():
+            x = doc.values.get((kind,name,doc._vid(key),''),0.0)
+            val += ((x-optimum)/scale)**2
+        kind,name,key = self.output
+        doc.values[(kind,name,doc._vid(key),'')] = val
+
+def BuildFlowsheet(doc:FakeDesignerDocument, n_streams:int=100, n_components:int=5, seed:int=0) -> FakeDesignerDocument:
+    """
+    Fills doc with a synthetic, already solved flowsheet of n_streams streams: a chain of procedures (one per three streams) each with its own equipment and three operations.
+    The first third of the streams are inputs and the last third are outputs (alternately waste and revenue).
+    """
+    rng = random.Random(seed)
+    vid = doc._vid
+    components = [f"C-{i}" for i in range(n_components)]
+    doc._list("flowsheet_CID.pureComp_LID").extend(components)
+    n_procs = max(1,n_streams//3)
+    n_inputs = max(1,n_streams//3)
+    n_outputs = max(1,n_streams//3)
+    streams = [f"S-{i}" for i in range(n_streams)]
+    for i in range(n_procs):
+        proc,equip = f"P-{i}",f"E-{i}"
+        doc.objects["procedure"].add(proc)
+        doc.objects["equipment"].add(equip)
+        doc._list("flowsheet_CID.unitProc_LID").append(proc)
+        doc._list("flowsheet_CID.equipment_LID").append(equip)
+        doc._list("equipment_CID.unitProc_LID",equip).append(proc)
+        start = 2.0*i
+        cycles = rng.randint(1,4)
+        opStart = start
+        for oper,duration in (("Charge-1",0.5),("Agitate-1",2.0),("Transfer Out-1",0.5)):
+            doc._list("unitProc_CID.operation_LID",proc).append(oper)
+            for key,val in (("startTime_VID",opStart),("processTime_VID",duration),("setUpTime_VID",0.0),("turnaroundTime_VID",0.0),
+                            ("holdupTime_VID",0.0),("endTime_VID",opStart+duration),("heatingDuty_VID",rng.uniform(0.0,100.0) if oper == "Agitate-1" else 0.0)):
+                doc.values[("operation",(proc,oper),vid(key),'')] = val
+            opStart += duration
+        for key,val in (("equipmentName_VID",equip),("description_VID",f"Procedure {i}"),("startTime_VID",start),("cycleTime_VID",3.0),
+                        ("numberOfCycles_VID",float(cycles)),("endTime_VID",start+3.0*cycles),("isBatchMode_VID",True)):
+            doc.values[("procedure",proc,vid(key),'')] = val
+        doc.basePC[equip] = rng.uniform(1e4,1e6)
+        for key,val in (("description_VID",f"Equipment {i}"),("equipPC_VID",doc.basePC[equip]),("noHostedProcedures_VID",1.0),
+                        ("busyTime_VID",3.0*cycles),("occupancyTime_VID",3.0*cycles)):
+            doc.values[("equipment",equip,vid(key),'')] = val
+    outputs = streams[n_streams-n_outputs:] if n_streams > n_inputs else []
+    for i,name in enumerate(streams):
+        doc.objects["stream"].add(name)
+        doc._list("flowsheet_CID.stream_LID").append(name)
+        is_input,is_output = i < n_inputs,name in outputs
+        proc = f"P-{i%n_procs}"
+        if is_input: doc._list("flowsheet_CID.inStream_LID").append(name)
+        if is_output: doc._list("flowsheet_CID.outStream_LID").append(name)
+        doc._list("unitProc_CID.inStream_LID" if not is_output else "unitProc_CID.outStream_LID",proc).append(name)
+        doc._list("stream_CID.pureComp_LID",name).extend(components if not is_input else rng.sample(components,max(1,n_components//2)))
+        flags = {"isInputStream_VID":is_input,"isOutputStream_VID":is_output,"isRawMaterial_VID":is_input,
+                 "isWaste_VID":is_output and i%2 == 0,"isRevenue_VID":is_output and i%2 == 1}
+        for key,val in flags.items(): doc.values[("stream",name,vid(key),'')] = val
+        doc.values[("stream",name,vid("temperature_VID"),'')] = 25.0
+        doc.values[("stream",name,vid("pressure_VID"),'')] = 1.01325
+        if is_input:
+            for comp in doc._list("stream_CID.pureComp_LID",name): doc.values[("stream",name,vid("componentMassFlow_VID"),comp)] = rng.uniform(1.0,100.0)
+            doc._compose(name,vid("componentMassFlow_VID"))
+    others = streams[n_inputs:]
+    intermediates = [name for name in others if name not in outputs]
+    weights = [rng.uniform(0.5,1.5) for _ in outputs]
+    doc.shares = {name:w/sum(weights) for name,w in zip(outputs,weights)}
+    doc.shares.update({name:rng.uniform(0.1,1.0) for name in intermediates})
+    doc.DoMEBalances(None)
+    doc.DoEconomicCalculations()
+    doc.calls.clear()
+    return doc
+
+class FakeCOMError(Exception):
+    """
+    Raised by the fake COM objects of a dead FakeApplication, as comtypes raises COMError when the COM server is gone.
+    """
+
+class FakeFaults:
+    """
+    Faults to inject into the calls of FakeApplications (and their documents), shared by the applications made with it so that a schedule survives restarts:
+    Hang(method) makes the next call of method block until the application is killed (see KillFakeApp), Crash(method) makes it fail and the application die.
+    """
+    def __init__(self):
+        self.scheduled:dict[str,list[str]] = {}
+        self.injected:Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def Hang(self, method:str, times:int=1):
+        with self._lock: self.scheduled.setdefault(method,[]).extend(["hang"]*times)
+
+    def Crash(self, method:str, times:int=1):
+        with self._lock: self.scheduled.setdefault(method,[]).extend(["crash"]*times)
+
+    def Take(self, method:str) -> str|None:
+        with self._lock:
+            faults = self.scheduled.get(method)
+            if not faults: return None
+            self.injected[faults[0]] += 1
+            return faults.pop(0)
+
+class FakeApplication:
+    """
+    Stand-in for the COM Application object, OpenDoc returns a new FakeDesignerDocument built by BuildFlowsheet(**flowsheet) and counts the opened and closed documents.
+    faults (a FakeFaults) makes calls hang or crash; once the application is dead (crashed or killed with Kill) every call raises FakeCOMError.
+    """
+    def __init__(self, tables:dict[str,dict]|None=None, latency:float=0.0, solve_latency:float=0.0, open_latency:float=0.0, model=None, faults:FakeFaults|None=None, **flowsheet):
+        self.tables = tables or FakeTables()
+        self.latency = latency
+        self.solve_latency = solve_latency
+        self.open_latency = open_latency
+        self.model = model
+        self.faults = faults
+        self.flowsheet = flowsheet
+        self.docs:dict[str,FakeDesignerDocument] = {}
+        self.active:FakeDesignerDocument|None = None
+        self.opened = 0
+        self.closed = False
+        self.dead = False
+        self._killed = threading.Event()
+
+    def _fault(self, method:str):
+        if self.dead: raise FakeCOMError(f"{method}: the RPC server is unavailable")
+        fault = self.faults.Take(method) if self.faults is not None else None
+        if fault == "hang":
+            self._killed.wait()
+            raise FakeCOMError(f"{method}: the RPC server is unavailable")
+        if fault == "crash":
+            self.dead = True
+            raise FakeCOMError(f"{method}: the RPC server is unavailable")
+
+    def Kill(self):
+        """
+        Kills the fake process: hung calls return with FakeCOMError, as do all later ones.
+        """
+        self.dead = True
+        self._killed.set()
+
+    def ShowApp(self):
+        self._fault("ShowApp")
+
+    def CloseApp(self):
+        self._fault("CloseApp")
+        self.closed = True
+        self.docs.clear()
+
+    def OpenDoc(self, fileName:str) -> FakeDesignerDocument:
+        self._fault("OpenDoc")
+        time.sleep(self.open_latency)
+        self.opened += 1
+        doc = self.docs[fileName] = self.active = BuildFlowsheet(FakeDesignerDocument(self.tables,self.latency,self.solve_latency,self.model),**self.flowsheet)
+        doc.application = self
+        return doc
+
+    def SetActiveDoc(self, fileName:str) -> FakeDesignerDocument:
+        self._fault("SetActiveDoc")
+        self.active = self.docs[fileName]
+        return self.active
+
+    def CloseAllDocs(self, bSaveIfNeeded:bool):
+        self._fault("CloseAllDocs")
+        for doc in self.docs.values(): doc.closed = True
+        self.docs.clear()
+        self.active = None
+
+def FakeSuperProDesigner(**options) -> SuperProDesigner:
+    """
+    A SuperProDesigner on a FakeApplication(**options), usable without SuperPro Designer or comtypes.
+    """
+    app = FakeApplication(**options)
+    return SuperProDesigner(app=app,tables=app.tables)
+
+def KillFakeApp(app:SuperProDesigner) -> bool:
+    """
+    Watchdog.Supervisor kill for FakeSuperProDesigner instances.
+    """
+    app.app.Kill()
+    return True
+
+def OpenFakeCase(case_path:str, **options):
+    """
+    ScenarioRunner backend opening case_path in a FakeSuperProDesigner(**options), e.g. functools.partial(OpenFakeCase, n_streams=50, solve_latency=0.1).
+    """
+    return FakeSuperProDesigner(**options).OpenDoc(case_path)
@@ -0,0 +1,259 @@
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+class Variable(NamedTuple):
+    """
+    Decision variable: an input address (kind, name, variable key[, compLocalName]) varied between lower and upper.
+    initial is the starting value, by default the value the document holds.
+    """
+    address:tuple
+    lower:float
+    upper:float
+    initial:float|None = None
+
+class Objective(NamedTuple):
+    """
+    An output address whose value is minimized (sense "min") or maximized ("max"), several objectives being summed with their weights.
+    """
+    address:tuple
+    sense:str = "min"
+    weight:float = 1.0
+
+class Evaluation(NamedTuple):
+    x:tuple[float,...]
+    value:float  # Weighted objective, to be minimized; inf when the solve failed
+    outputs:list|None
+    error:str|None
+
+class OptimizationResult(NamedTuple):
+    x:dict  # {address: value} of the best point
+    value:float
+    outputs:dict  # {address: value} read at the best point
+    status:str  # "converged", "maxiter", "budget" or "failed" (the solves around the point failed, or none succeeded)
+    solves:int
+    evaluations:int  # Points asked for, including those answered from the cache of evaluated points
+    history:list[Evaluation]
+
+class BudgetExhausted(Exception):
+    pass
+
+class Optimizer:
+    """
+    Minimizes weighted objectives over bounded decision variables by solving the case, either one point at a time on doc or in parallel batches on a ScenarioRunner.
+    The runner should be used as a context manager so that its workers stay open between batches, and its outputs must include the objective addresses.
+    Every distinct point is solved at most once (points closer than resolution, relative to the variable ranges, are the same point) and at most budget solves are made.
+    Points of a batch solved on doc are ordered so that each starts from the solution of a nearby point.
+    The methods work on the variables scaled to [0, 1]; fun and jac can also be handed to scipy.optimize.minimize.
+    """
+    def __init__(self, variables:list[Variable], objectives:list[Objective], doc=None, runner=None, outputs:list=(), budget:int|None=None,
+                 economics:bool=True, resolution:float=1e-9, step:float=1e-3):
+        if (doc is None) == (runner is None): raise ValueError("Give either doc or runner")
+        self.variables = list(variables)
+        self.objectives = list(objectives)
+        self.doc = doc
+        self.runner = runner
+        self.budget = budget
+        self.economics = economics
+        self.resolution = resolution
+        self.step = step  # Finite difference step, relative to the variable ranges
+        if runner is None:
+            self.outputs = list(dict.fromkeys([objective.address for objective in self.objectives]+list(outputs)))
+        else:
+            missing = [objective.address for objective in self.objectives if objective.address not in runner.outputs]
+            if missing: raise ValueError(f"The runner does not read the objectives {missing}")
+            self.outputs = list(runner.outputs)
+        self._objective = [(self.outputs.index(objective.address),objective.weight*(1.0 if objective.sense == "min" else -1.0)) for objective in self.objectives]
+        self.lower = np.array([variable.lower for variable in self.variables],dtype=float)
+        self.upper = np.array([variable.upper for variable in self.variables],dtype=float)
+        self.evaluated:dict[tuple,Evaluation] = {}
+        self.history:list[Evaluation] = []
+        self.solves = 0
+        self.evaluations = 0
+        self._last:np.ndarray|None = None  # Scaled point last solved on doc
+
+    # Points
+    def _scale(self, x) -> np.ndarray:
+        return (np.asarray(x,dtype=float)-self.lower)/(self.upper-self.lower)
+
+    def _unscale(self, u:np.ndarray) -> np.ndarray:
+        return self.lower+np.clip(u,0.0,1.0)*(self.upper-self.lower)
+
+    def _id(self, u:np.ndarray) -> tuple:
+        return tuple(np.round(np.clip(u,0.0,1.0)/self.resolution).astype(np.int64).tolist())
+
+    def Start(self) -> np.ndarray:
+        """
+        The initial point (scaled): the variables' initial values, else the values in the document, else the middle of the bounds.
+        """
+        x = []
+        for i,variable in enumerate(self.variables):
+            val = variable.initial
+            if val is None and self.doc is not None:
+                val = self.doc.ReadOutputs([variable.address])[0]
+            x.append((self.lower[i]+self.upper[i])/2 if val is None or isinstance(val,(str,bool)) else val)
+        return np.clip(self._scale(x),0.0,1.0)
+
+    # Evaluation
+    def Evaluate(self, points:list) -> list[Evaluation]:
+        """
+        Objective values of the scaled points, solving the new ones in one batch.
+        Raises BudgetExhausted (after solving what the budget allows) if the batch does not fit the budget.
+        """
+        points = [np.clip(np.asarray(u,dtype=float),0.0,1.0) for u in points]
+        self.evaluations += len(points)
+        todo = {}
+        for u in points:
+            key = self._id(u)
+            if key not in self.evaluated: todo.setdefault(key,u)
+        todo = list(todo.items())
+        exhausted = self.budget is not None and self.solves+len(todo) > self.budget
+        if exhausted: todo = todo[:max(0,self.budget-self.solves)]
+        if todo:
+            if self.runner is None: self._solve_serial(todo)
+            else: self._solve_parallel(todo)
+        if exhausted: raise BudgetExhausted()
+        return [self.evaluated[self._id(u)] for u in points]
+
+    def _inputs(self, u:np.ndarray) -> dict:
+        return {variable.address:float(x) for variable,x in zip(self.variables,self._unscale(u))}
+
+    def _record(self, key:tuple, u:np.ndarray, outputs:list|None, error:str|None):
+        value = math.inf
+        if outputs is not None:
+            values = [outputs[i] for i,_ in self._objective]
+            if all(isinstance(val,(int,float)) and not isinstance(val,bool) for val in values):
+                value = sum(weight*val for (_,weight),val in zip(self._objective,values))
+            else:
+                error = error or "Objective could not be read"
+        evaluation = self.evaluated[key] = Evaluation(tuple(self._unscale(u).tolist()),value,outputs,error)
+        self.history.append(evaluation)
+        self.solves += 1
+
+    def _solve_serial(self, todo:list):
+        # Nearest first, so that every solve starts from the solution of a close point
+        last = self._last if self._last is not None else todo[0][1]
+        while todo:
+            i = min(range(len(todo)),key=lambda i: float(np.sum((todo[i][1]-last)**2)))
+            key,u = todo.pop(i)
+            try:
+                self.doc.ApplyInputs(self._inputs(u))
+                self._record(key,u,self.doc.Solve(self.outputs,self.economics),None)
+            except Exception as e:
+                self._record(key,u,None,repr(e))
+            last = self._last = u
+
+    def _solve_parallel(self, todo:list):
+        for result in self.runner.run([self._inputs(u) for _,u in todo]):
+            key,u = todo[result.index]
+            self._record(key,u,result.outputs,result.error)
+
+    def fun(self, x) -> float:
+        """
+        Objective value at x (in the variables' units).
+        """
+        return self.Evaluate([self._scale(x)])[0].value
+
+    def jac(self, x) -> np.ndarray:
+        """
+        Forward difference gradient at x (in the variables' units), see Gradient.
+        """
+        return self.Gradient(self._scale(x))/(self.upper-self.lower)
+
+    def Gradient(self, u:np.ndarray) -> np.ndarray:
+        """
+        Forward difference gradient at the scaled point u, reusing the solve of u and solving the n shifted points in one batch (backward steps at the upper bounds).
+        """
+        u = np.clip(np.asarray(u,dtype=float),0.0,1.0)
+        steps = np.where(u+self.step <= 1.0,self.step,-self.step)
+        shifted = [u+steps[i]*np.eye(len(u))[i] for i in range(len(u))]
+        base,*others = self.Evaluate([u]+shifted)
+        return np.array([(other.value-base.value)/step for other,step in zip(others,steps)])
+
+    # Methods
+    def minimize(self, method:str="nelder-mead", x0=None, **options) -> OptimizationResult:
+        """
+        Runs method ("nelder-mead", "pattern" or "gradient") from x0 (in the variables' units, default Start()) and returns the best point found.
+        Stops with status "budget" when the solve budget is used up, and "failed" when the solves needed to go on fail.
+        """
+        methods = {"nelder-mead":self._nelder_mead,"pattern":self._pattern,"gradient":self._gradient}
+        if method not in methods: raise ValueError(f"Unknown method {method}, use one of {list(methods)}")
+        u0 = self.Start() if x0 is None else np.clip(self._scale(x0),0.0,1.0)
+        try:
+            status = methods[method](u0,**options)
+        except BudgetExhausted:
+            status = "budget"
+        return self.Result(status)
+
+    def Result(self, status:str="converged") -> OptimizationResult:
+        best = min(self.evaluated.values(),key=lambda evaluation: evaluation.value,default=None)
+        # Without a single successful solve there is no optimum, whatever stopped the method
+        if best is not None and not math.isfinite(best.value): status = "failed"
+        if best is None: return OptimizationResult({},math.inf,{},status,self.solves,self.evaluations,self.history)
+        return OptimizationResult({variable.address:x for variable,x in zip(self.variables,best.x)},best.value,
+                                  dict(zip(self.outputs,best.outputs or [None]*len(self.outputs))),status,self.solves,self.evaluations,self.history)
+
+    def _nelder_mead(self, u0:np.ndarray, maxiter:int=200, xtol:float=1e-4, ftol:float=1e-8, initial_step:float=0.1) -> str:
+        n = len(u0)
+        simplex = [u0]+[np.clip(u0+(initial_step if u0[i]+initial_step <= 1.0 else -initial_step)*np.eye(n)[i],0.0,1.0) for i in range(n)]
+        values = [evaluation.value for evaluation in self.Evaluate(simplex)]
+        for _ in range(maxiter):
+            order = np.argsort(values)
+            simplex,values = [simplex[i] for i in order],[values[i] for i in order]
+            if max(np.max(np.abs(u-simplex[0])) for u in simplex[1:]) <= xtol and abs(values[-1]-values[0]) <= ftol: return "converged"
+            centroid = np.mean(simplex[:-1],axis=0)
+            reflected = np.clip(2*centroid-simplex[-1],0.0,1.0)
+            fr = self.Evaluate([reflected])[0].value
+            if fr < values[0]:
+                expanded = np.clip(3*centroid-2*simplex[-1],0.0,1.0)
+                fe = self.Evaluate([expanded])[0].value
+                simplex[-1],values[-1] = (expanded,fe) if fe < fr else (reflected,fr)
+            elif fr < values[-2]:
+                simplex[-1],values[-1] = reflected,fr
+            else:
+                contracted = np.clip(centroid+0.5*((reflected if fr < values[-1] else simplex[-1])-centroid),0.0,1.0)
+                fc = self.Evaluate([contracted])[0].value
+                if fc < min(fr,values[-1]):
+                    simplex[-1],values[-1] = contracted,fc
+                else:
+                    # Shrink towards the best point, the n new points are one batch
+                    simplex = [simplex[0]]+[simplex[0]+0.5*(u-simplex[0]) for u in simplex[1:]]
+                    values = [values[0]]+[evaluation.value for evaluation in self.Evaluate(simplex[1:])]
+        return "maxiter"
+
+    def _pattern(self, u0:np.ndarray, maxiter:int=200, step:float=0.25, min_step:float=1e-3) -> str:
+        """
+        Compass search: the 2n points at +-step along every variable are solved as one batch, moving to the best improving one or else halving step.
+        """
+        u,value = u0,self.Evaluate([u0])[0].value
+        eye = np.eye(len(u0))
+        for _ in range(maxiter):
+            if step < min_step: return "converged"
+            poll = [np.clip(u+sign*step*eye[i],0.0,1.0) for i in range(len(u)) for sign in (1.0,-1.0)]
+            best = min(zip(poll,self.Evaluate(poll)),key=lambda item: item[1].value)
+            if best[1].value < value: u,value = best[0],best[1].value
+            else: step /= 2
+        return "maxiter"
+
+    def _gradient(self, u0:np.ndarray, maxiter:int=100, rate:float=0.1, gtol:float=1e-6) -> str:
+        """
+        Projected gradient descent with a backtracking line search, on finite difference gradients.
+        """
+        u,value = u0,self.Evaluate([u0])[0].value
+        for _ in range(maxiter):
+            gradient = self.Gradient(u)
+            if not np.all(np.isfinite(gradient)): return "failed"
+            projected = u-np.clip(u-gradient,0.0,1.0)
+            if np.max(np.abs(projected)) <= gtol: return "converged"
+            t = rate
+            while t > 1e-6:
+                candidate = np.clip(u-t*gradient,0.0,1.0)
+                fc = self.Evaluate([candidate])[0].value
+                if fc < value: break
+                t /= 2
+            else:
+                return "converged"
+            u,value = candidate,fc
+            rate = 2*t
+        return "maxiter"
@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+from array import array
+from collections import Counter
+
+import numpy as np
+
+class MethodStats:
+    """
+    Calls of one COM method: count, failures (False returns and exceptions, with their GetCOMErrorMsg text or repr) and every latency in seconds.
+    """
+    __slots__ = ("calls","failures","errors","durations")
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.errors:Counter[str] = Counter()
+        self.durations = array('d')
+
+    @property
+    def total(self) -> float:
+        return sum(self.durations)
+
+    @property
+    def mean(self) -> float:
+        return self.total/self.calls if self.calls else 0.0
+
+    def Quantile(self, q:float) -> float:
+        return float(np.quantile(np.frombuffer(self.durations,dtype=np.float64),q)) if self.calls else 0.0
+
+    @property
+    def p99(self) -> float:
+        return self.Quantile(0.99)
+
+class ComProfile:
+    """
+    In-memory registry of COM calls filled by SuperProDesignerDocument.profile(), one MethodStats per method name in stats.
+    With trace it also keeps every call (at most max_events) for ChromeTrace.
+    A profile can be passed to several profile() blocks to accumulate them.
+    """
+    def __init__(self, trace:bool=False, max_events:int=1000000):
+        self.stats:dict[str,MethodStats] = {}
+        self.trace = trace
+        self.max_events = max_events
+        self.events:list[tuple] = []  # (method, start, duration, thread id, ok)
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def Record(self, method:str, start:float, duration:float, ok:bool, error:str|None=None):
+        with self._lock:
+            stats = self.stats.get(method)
+            if stats is None: stats = self.stats[method] = MethodStats()
+            stats.calls += 1
+            stats.durations.append(duration)
+            if not ok:
+                stats.failures += 1
+                stats.errors[error or ""] += 1
+            if self.trace and len(self.events) < self.max_events: self.events.append((method,start,duration,threading.get_ident(),ok))
+
+    def Clear(self):
+        with self._lock:
+            self.stats.clear()
+            self.events.clear()
+
+    @property
+    def calls(self) -> int:
+        return sum(stats.calls for stats in self.stats.values())
+
+    def Summary(self) -> dict[str,dict]:
+        """
+        {method: {"calls", "failures", "total", "mean", "p99", "errors"}}, times in seconds, slowest total first.
+        """
+        summary = {method:{"calls":stats.calls,"failures":stats.failures,"total":stats.total,"mean":stats.mean,"p99":stats.p99,"errors":dict(stats.errors)} for method,stats in self.stats.items()}
+        return dict(sorted(summary.items(),key=lambda item: -item[1]["total"]))
+
+    def __str__(self):
+        lines = [f"{'method':<36}{'calls':>10}{'failures':>10}{'total s':>12}{'mean us':>12}{'p99 us':>12}"]
+        for method,row in self.Summary().items():
+            lines.append(f"{method:<36}{row['calls']:>10}{row['failures']:>10}{row['total']:>12.4f}{1e6*row['mean']:>12.1f}{1e6*row['p99']:>12.1f}")
+        return "\n".join(lines)
+
+    def ChromeTrace(self) -> dict:
+        """
+        The traced calls in the Chrome trace event format, to be written as JSON and opened in chrome://tracing or Perfetto.
+        """
+        events = [{"name":method,"cat":"com" if ok else "com,failed","ph":"X","ts":1e6*(start-self._origin),"dur":1e6*duration,"pid":0,"tid":tid}
+                  for method,start,duration,tid,ok in self.events]
+        return {"traceEvents":events,"displayTimeUnit":"ms"}
+
+    def WriteChromeTrace(self, path:str):
+        with open(path,'w',encoding='utf-8') as f: json.dump(self.ChromeTrace(),f)
+
+    def OpenMetrics(self, prefix:str="spd_com") -> str:
+        """
+        The counters and latency summaries in the OpenMetrics text format, labelled by method.
+        """
+        lines = [f"# TYPE {prefix}_calls counter",f"# HELP {prefix}_calls COM calls."]
+        lines += [f'{prefix}_calls_total{{method="{method}"}} {stats.calls}' for method,stats in self.stats.items()]
+        lines += [f"# TYPE {prefix}_failures counter",f"# HELP {prefix}_failures COM calls that returned False or raised."]
+        lines += [f'{prefix}_failures_total{{method="{method}"}} {stats.failures}' for method,stats in self.stats.items()]
+        lines += [f"# TYPE {prefix}_latency_seconds summary",f"# UNIT {prefix}_latency_seconds seconds",f"# HELP {prefix}_latency_seconds COM call latency."]
+        for method,stats in self.stats.items():
+            for q in (0.5,0.9,0.99):
+                lines.append(f'{prefix}_latency_seconds{{method="{method}",quantile="{q}"}} {stats.Quantile(q)!r}')
+            lines.append(f'{prefix}_latency_seconds_sum{{method="{method}"}} {stats.total!r}')
+            lines.append(f'{prefix}_latency_seconds_count{{method="{method}"}} {stats.calls}')
+        lines.append("# EOF")
+        return "\n".join(lines)+"\n"
+
+class ProfiledDoc:
+    """
+    Stands in for the COM document while profiling: every method call is timed and recorded in the profiles.
+    The timing wrappers are only created here, so an unprofiled document calls COM directly.
+    """
+    def __init__(self, doc, profiles:list[ComProfile], errorMsg):
+        self._doc = doc
+        self._profiles = profiles
+        self._errorMsg = errorMsg  # Returns the GetCOMErrorMsg text of the unwrapped document
+
+    def __getattr__(self, name:str):
+        method = getattr(self._doc,name)
+        if not callable(method): return method
+        profiles,errorMsg,clock = self._profiles,self._errorMsg,time.perf_counter
+        def call(*args, **kwargs):
+            start = clock()
+            try:
+                result = method(*args, **kwargs)
+            except Exception as e:
+                duration = clock()-start
+                for profile in profiles: profile.Record(name,start,duration,False,repr(e))
+                raise
+            duration = clock()-start
+            # GetNextItemName returning False just ends an enumeration
+            ok = result is not False or name.startswith("GetNextItemName")
+            error = None if ok else errorMsg()
+            for profile in profiles: profile.Record(name,start,duration,ok,error)
+            return result
+        call.__name__ = name
+        setattr(self,name,call)  # Later lookups skip __getattr__
+        return call
@@ -0,0 +1,369 @@
+import argparse
+import inspect
+import os
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from typing import Callable
+
+from ScenarioRunner import OpenCase
+
+# Client -> server messages: ("open", case_path), ("batch", [(method, args, kwargs), ...]), ("get", attribute), ("close",)
+# Server -> client replies: ("ok", value) or ("error", exception); a batch replies ("ok", [("ok", value) | ("error", exception), ...])
+
+def _describe(doc) -> dict:
+    """
+    The public methods (plain functions only, not context managers) and attributes the server exposes for doc.
+    """
+    methods,attributes = [],[]
+    for name in dir(type(doc)):
+        if name.startswith("_") or name in ("Stream","Procedure","flowsheet"): continue
+        attr = getattr(type(doc),name)
+        if isinstance(attr,property): attributes.append(name)
+        elif callable(attr) and not inspect.isgeneratorfunction(inspect.unwrap(attr)): methods.append(name)
+    attributes += [name for name in vars(doc) if not name.startswith("_") and name not in ("app","doc","cache","solveCache")]
+    return {"methods":methods,"attributes":attributes}
+
+class DocumentServer:
+    """
+    Serves SuperPro Designer documents over TCP: every connection gets its own document, opened by backend(case_path) (ScenarioRunner.OpenCase by default) on its own thread.
+    Clients (RemoteDocument) send batches of method calls, each answered in one message; only the public methods and attributes of the document can be reached.
+    Messages are pickled, so authkey must be a secret shared with the clients only (multiprocessing.connection authenticates every connection with it).
+    """
+    def __init__(self, address:tuple[str,int]=("0.0.0.0",6010), authkey:bytes=b"", backend:Callable=OpenCase):
+        if not authkey: raise ValueError("An authkey is required")
+        self.backend = backend
+        self.listener = Listener(address,authkey=authkey)
+        self.address = self.listener.address
+        self.connections = 0
+        self._closed = False
+
+    def serve_forever(self):
+        while not self._closed:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                if self._closed: break
+                continue  # Failed authentication or a client that went away during the handshake
+            self.connections += 1
+            threading.Thread(target=self._serve,args=(conn,),daemon=True).start()
+
+    def start(self) -> threading.Thread:
+        """
+        Serves on a daemon thread, e.g. for tests with a fake backend.
+        """
+        thread = threading.Thread(target=self.serve_forever,daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        self._closed = True
+        self.listener.close()
+
+    def _serve(self, conn):
+        doc = None
+        try:
+            while True:
+                try:
+                    message = conn.recv()
+                except (EOFError,OSError):
+                    break
+                op = message[0]
+                try:
+                    if op == "open":
+                        if doc is not None: _close(doc)
+                        doc = None
+                        doc = self.backend(message[1])
+                        reply = ("ok",dict(_describe(doc),tables=doc.app.tables,fileName=doc.fileName))
+                    elif op == "batch":
+                        if doc is None: raise RuntimeError("No document is open")
+                        reply = ("ok",[_run(doc,*call) for call in message[1]])
+                    elif op == "get":
+                        if doc is None or message[1].startswith("_"): raise AttributeError(message[1])
+                        reply = ("ok",_sendable(getattr(doc,message[1])))
+                    elif op == "close":
+                        if doc is not None: _close(doc)
+                        doc = None
+                        reply = ("ok",None)
+                    else:
+                        raise ValueError(f"Unknown message {op}")
+                except Exception as e:
+                    reply = ("error",e)
+                _send(conn,reply)
+        finally:
+            if doc is not None: _close(doc)
+            conn.close()
+
+def _run(doc, method:str, args:tuple, kwargs:dict):
+    try:
+        if method.startswith("_"): raise AttributeError(method)
+        return ("ok",_sendable(getattr(doc,method)(*args,**kwargs)))
+    except Exception as e:
+        return ("error",e)
+
+def _sendable(val):
+    # Objects bound to the server's document (e.g. the ValueCache of EnableCache) stay on the server
+    from SolveCache import SolveCache
+    from SuperProDesigner import SuperProDesignerDocument, ValueCache
+    return None if isinstance(val,(SuperProDesignerDocument,ValueCache,SolveCache)) else val
+
+def _send(conn, reply:tuple):
+    try:
+        conn.send(reply)
+    except (EOFError,OSError):
+        raise
+    except Exception as e:
+        # A value or exception that cannot be pickled is sent back as a RuntimeError (pickling fails before anything is written)
+        conn.send(("error",RuntimeError(f"Reply could not be sent: {e!r}")))
+
+def _close(doc):
+    try:
+        doc.CloseDoc(False)
+        doc.app.CloseApp()
+    except Exception:
+        pass
+
+class _RemoteApp:
+    """
+    Stands in for the COM application object of a RemoteDocument: CloseApp closes the remote document and hands the connection back to its pool.
+    """
+    def __init__(self, remote:"RemoteDocument"):
+        self.remote = remote
+
+    def CloseApp(self):
+        self.remote.Release()
+
+class RemoteResult:
+    """
+    Result of a call queued in a pipeline, available as value once the pipeline has been sent.
+    """
+    __slots__ = ("_value","_error","_done")
+    def __init__(self):
+        self._done = False
+        self._value = self._error = None
+
+    @property
+    def value(self):
+        if not self._done: raise RuntimeError("The pipeline has not been sent yet")
+        if self._error is not None: raise self._error
+        return self._value
+
+class Pipeline:
+    """
+    Queues calls (pipeline.GetStreamVarVal(...) returns a RemoteResult) and sends them as one batch by Send() or at the end of a with block.
+    """
+    def __init__(self, remote:"RemoteDocument"):
+        self._remote = remote
+        self._calls:list[tuple] = []
+        self._results:list[RemoteResult] = []
+
+    def __getattr__(self, name:str):
+        if name.startswith("_") or name not in self._remote._methods: raise AttributeError(name)
+        def queue(*args, **kwargs) -> RemoteResult:
+            result = RemoteResult()
+            self._calls.append((name,args,kwargs))
+            self._results.append(result)
+            return result
+        return queue
+
+    def Send(self):
+        calls,results,self._calls,self._results = self._calls,self._results,[],[]
+        if not calls: return
+        for result,(status,val) in zip(results,self._remote._request(("batch",calls))):
+            result._done = True
+            if status == "ok": result._value = val
+            else: result._error = val
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None: self.Send()
+
+class RemoteDocument:
+    """
+    Client side of a DocumentServer connection with the API of SuperProDesignerDocument: every method call is one round trip (use Batch or pipeline() to send many in one),
+    and Stream, Procedure and flowsheet build their objects locally on top of it. Context managers (transaction, profile) are not available remotely.
+    """
+    def __init__(self, address:tuple[str,int], authkey:bytes, case_path:str|None=None, pool:"ServerPool|None"=None):
+        from SuperProDesigner import SuperProDesigner
+        self.address = tuple(address)
+        self.authkey = authkey
+        self.pool = pool
+        self.conn = Client(self.address,authkey=authkey)
+        self._SuperProDesigner = SuperProDesigner
+        self._methods:frozenset[str] = frozenset()
+        self._attributes:frozenset[str] = frozenset()
+        self._flowsheet = None
+        self.app = None
+        self.fileName = None
+        self.roundTrips = 0
+        if case_path is not None: self.Open(case_path)
+
+    def Open(self, case_path:str):
+        """
+        Opens case_path (a path on the server) in place of the current document.
+        """
+        info = self._request(("open",case_path))
+        self._methods,self._attributes = frozenset(info["methods"]),frozenset(info["attributes"])-{"fileName"}
+        self.app = self._SuperProDesigner(app=_RemoteApp(self),tables=info["tables"])
+        self.fileName = info["fileName"]
+        self._flowsheet = None
+        return self
+
+    def _request(self, message:tuple):
+        self.roundTrips += 1
+        self.conn.send(message)
+        status,val = self.conn.recv()
+        if status == "error": raise val
+        return val
+
+    def Batch(self, calls:list[tuple], raise_errors:bool=True) -> list:
+        """
+        Runs calls, (method, args[, kwargs]) tuples, in one round trip and returns their results; with raise_errors False failed calls return their exception instead of raising it.
+        """
+        results = self._request(("batch",[(call[0],tuple(call[1]),call[2] if len(call) > 2 else {}) for call in calls]))
+        values = []
+        for status,val in results:
+            if status == "error" and raise_errors: raise val
+            values.append(val)
+        return values
+
+    def pipeline(self) -> Pipeline:
+        return Pipeline(self)
+
+    def _call(self, name:str, *args, **kwargs):
+        status,val = self._request(("batch",[(name,args,kwargs)]))[0]
+        if status == "error": raise val
+        if name.startswith("Rename") and val and self._flowsheet is not None:
+            kind = {"RenameStream":"stream","RenameProcedure":"procedure","RenameEquipment":"equipment","RenameOperation":"operation"}[name]
+            self._flowsheet._renamed(kind,(args[0],args[1]) if kind == "operation" else args[0])
+        for table in (val,getattr(val,"table",None)):
+            if hasattr(table,"names") and hasattr(table,"columns") and getattr(table,"doc",self) is None: table.doc = self
+        return val
+
+    def __getattr__(self, name:str):
+        if name.startswith("_"): raise AttributeError(name)
+        if name in self._methods:
+            def call(*args, **kwargs):
+                return self._call(name,*args,**kwargs)
+            call.__name__ = name
+            return call
+        if name in self._attributes: return self._request(("get",name))
+        raise AttributeError(name)
+
+    @property
+    def flowsheet(self):
+        from SuperProDesigner import Flowsheet
+        if self._flowsheet is None: self._flowsheet = Flowsheet(self)
+        return self._flowsheet
+
+    def Stream(self, initialName:str):
+        from SuperProDesigner import Stream
+        return Stream(self,initialName)
+
+    def Procedure(self, initialName:str):
+        from SuperProDesigner import Procedure
+        return Procedure(self,initialName)
+
+    def CloseDoc(self, bSaveIfNeeded:bool):
+        if bSaveIfNeeded: self._call("SaveDoc")
+        self._request(("close",))
+        return True
+
+    def Release(self):
+        """
+        Closes the remote document and returns the connection to its ServerPool (or closes it without one).
+        """
+        try:
+            self._request(("close",))
+        except (EOFError,OSError):
+            self.conn.close()
+            if self.pool is not None: self.pool._discard(self)
+            return
+        if self.pool is not None: self.pool._release(self)
+        else: self.conn.close()
+
+class ServerPool:
+    """
+    Connections to several DocumentServers, each taking up to its number of slots documents at once:
+
+        pool = ServerPool([("node1", 6010, 8), ("node2", 6010, 16)], authkey)
+        with ScenarioRunner(case_path, outputs, backend=pool, max_workers=pool.slots, processes=False) as runner: ...
+
+    Called with a case path (as a ScenarioRunner backend) it opens the case on the server with the most free slots, reusing an idle connection to it when there is one,
+    and raises RuntimeError when no reachable server has a free slot (the runner then goes on with the workers it has).
+    The runner's workers take the next scenario as soon as they are done, so faster nodes run more of them.
+    A server that cannot be reached is skipped for retry_after seconds, and a worker whose server went away is restarted on another one.
+    """
+    def __init__(self, servers:list[tuple[str,int,int]], authkey:bytes, retry_after:float=30.0):
+        self.servers = [((host,port),slots) for host,port,slots in servers]
+        self.authkey = authkey
+        self.retry_after = retry_after
+        self.busy = {address:0 for address,_ in self.servers}
+        self.failures = {address:0 for address,_ in self.servers}
+        self._down:dict[tuple,float] = {}  # Address -> time until which it is skipped
+        self._idle:dict[tuple,list[RemoteDocument]] = {address:[] for address,_ in self.servers}
+        self._lock = threading.Lock()
+
+    @property
+    def slots(self) -> int:
+        return sum(slots for _,slots in self.servers)
+
+    def __call__(self, case_path:str) -> RemoteDocument:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                free = [(slots-self.busy[address],-self.failures[address],address) for address,slots in self.servers
+                        if self.busy[address] < slots and self._down.get(address,0.0) <= now]
+                if not free: raise RuntimeError(f"No reachable DocumentServer has a free slot to open {case_path}")
+                address = max(free)[2]
+                self.busy[address] += 1
+                remote = self._idle[address].pop() if self._idle[address] else None
+            try:
+                if remote is None: remote = RemoteDocument(address,self.authkey,pool=self)
+                return remote.Open(case_path)
+            except (EOFError,OSError):
+                if remote is not None: remote.conn.close()
+                with self._lock:
+                    self.busy[address] -= 1
+                    self.failures[address] += 1
+                    self._down[address] = time.monotonic()+self.retry_after
+            except BaseException as e:
+                # The server answered (e.g. the case could not be opened), so the slot is free again and the connection can be reused,
+                # unless the wait for the answer was interrupted and a reply may still be on its way
+                reuse = remote is not None and isinstance(e,Exception)
+                with self._lock:
+                    self.busy[address] -= 1
+                    if reuse: self._idle[address].append(remote)
+                if remote is not None and not reuse: remote.conn.close()
+                raise
+
+    def _release(self, remote:RemoteDocument):
+        with self._lock:
+            self.busy[remote.address] -= 1
+            self._idle[remote.address].append(remote)
+
+    def _discard(self, remote:RemoteDocument):
+        with self._lock:
+            self.busy[remote.address] -= 1
+            self.failures[remote.address] += 1
+
+    def close(self):
+        with self._lock:
+            idle = [remote for remotes in self._idle.values() for remote in remotes]
+            for remotes in self._idle.values(): remotes.clear()
+        for remote in idle: remote.conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves SuperPro Designer documents to RemoteDocument clients")
+    parser.add_argument("--host",default="0.0.0.0")
+    parser.add_argument("--port",type=int,default=6010)
+    parser.add_argument("--authkey-env",default="SPD_AUTHKEY",help="Environment variable holding the shared secret")
+    args = parser.parse_args()
+    authkey = os.environ.get(args.authkey_env,"").encode()
+    if not authkey: parser.error(f"Set {args.authkey_env} to the secret shared with the clients")
+    DocumentServer((args.host,args.port),authkey).serve_forever()
+
+if __name__ == "__main__":
+    main()
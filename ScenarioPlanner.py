@@ -0,0 +1,132 @@
+from typing import Iterator
+
+import numpy as np
+
+from ScenarioRunner import Alive, ScenarioResult
+
+# Input of RunPlanChunk scenarios: {PLAN_CHUNK: [(index, inputs), ...]}
+PLAN_CHUNK = "planChunk"
+
+def RunPlanChunk(doc, inputs:dict, outputs:list, economics:bool=True) -> list:
+    """
+    ScenarioRunner task running a chunk of a ScenarioPlan in order on the worker's document, writing only what changed from the previous scenario.
+    Returns (index, outputs, error, writes) per scenario.
+    """
+    results = []
+    for index,scenario in inputs[PLAN_CHUNK]:
+        writes = 0
+        try:
+            writes = doc.ApplyInputs(scenario,delta=True)
+            results.append((index,doc.Solve(outputs,economics),None,writes))
+        except Exception as e:
+            if not Alive(doc): raise
+            results.append((index,None,repr(e),writes))
+    return results
+
+class ScenarioPlan:
+    """
+    Execution order of scenarios ({address: value} dicts) that keeps consecutive scenarios close, made by PlanScenarios.
+    order lists the scenario indexes in run order, split into chunks (lists of positions in order) that each run on one document,
+    and steps[k] holds the writes the k-th scenario of order needs after the previous one of its chunk.
+    expectedWrites counts those writes, naiveWrites the writes of applying every scenario in full, and actualWrites the writes made by Run / RunParallel.
+    """
+    def __init__(self, scenarios:list[dict], order:list[int], chunks:list[list[int]], steps:list[dict]):
+        self.scenarios = scenarios
+        self.order = order
+        self.chunks = chunks
+        self.steps = steps
+        self.expectedWrites = sum(len(step) for step in steps)
+        self.naiveWrites = sum(len(scenario) for scenario in scenarios)
+        self.actualWrites = 0
+
+    def __len__(self):
+        return len(self.order)
+
+    def Run(self, doc, outputs:list, economics:bool=True) -> Iterator[ScenarioResult]:
+        """
+        Runs the scenarios in order on doc, writing only the values that differ from what the document holds (see SuperProDesignerDocument.ApplyInputs with delta), and yields their results.
+        """
+        for index in self.order:
+            scenario = self.scenarios[index]
+            try:
+                self.actualWrites += doc.ApplyInputs(scenario,delta=True)
+                yield ScenarioResult(index,scenario,doc.Solve(outputs,economics),None,1)
+            except Exception as e:
+                yield ScenarioResult(index,scenario,None,repr(e),1)
+
+    def RunParallel(self, runner) -> Iterator[ScenarioResult]:
+        """
+        Runs every chunk as one scenario of runner, a ScenarioRunner made with task=RunPlanChunk, and yields the results of its scenarios as the chunks finish.
+        """
+        if runner.task is not RunPlanChunk: raise ValueError("The runner must be made with task=RunPlanChunk")
+        chunks = [[(self.order[k],self.scenarios[self.order[k]]) for k in chunk] for chunk in self.chunks]
+        for result in runner.run([{PLAN_CHUNK:chunk} for chunk in chunks]):
+            if not result.ok:
+                for index,scenario in chunks[result.index]: yield ScenarioResult(index,scenario,None,result.error,result.attempts)
+                continue
+            for index,outputs,error,writes in result.outputs:
+                self.actualWrites += writes
+                yield ScenarioResult(index,self.scenarios[index],outputs,error,result.attempts)
+
+    def Report(self) -> dict:
+        return {"scenarios":len(self.order),"chunks":len(self.chunks),"naiveWrites":self.naiveWrites,"expectedWrites":self.expectedWrites,"actualWrites":self.actualWrites}
+
+def PlanScenarios(scenarios:list[dict], baseline:dict|None=None, chunks:int=1) -> ScenarioPlan:
+    """
+    Orders scenarios so that consecutive ones differ in as few values as possible:
+    a full grid (every combination of the values of its addresses) is run in reflected Gray code order, one write per scenario,
+    other lists greedily, each next scenario being the one needing the fewest writes from the state the previous ones left.
+    An address a scenario leaves out keeps the value of the previous scenario, unless it is in baseline, whose value is then written back.
+    With chunks > 1 the order is split into that many contiguous chunks for RunParallel (use a few per worker so that the load evens out), each starting from baseline.
+    A chunk runs on whatever document state the previous chunk of its worker left, so baseline is then required when a scenario leaves out an address (ValueError otherwise).
+    """
+    scenarios = [dict(scenario) for scenario in scenarios]
+    full = scenarios if baseline is None else [{**baseline,**scenario} for scenario in scenarios]
+    addresses = list(dict.fromkeys(address for scenario in full for address in scenario))
+    # Every value of an address gets a code, -1 marking an address the scenario leaves out
+    codes = np.full((len(full),len(addresses)),-1,dtype=np.int64)
+    values:list[dict] = [{} for _ in addresses]
+    for i,scenario in enumerate(full):
+        for j,address in enumerate(addresses):
+            if address in scenario: codes[i,j] = values[j].setdefault(scenario[address],len(values[j]))
+    if chunks > 1 and baseline is None and (codes < 0).any(): raise ValueError("Scenarios leaving out addresses need a baseline to be split into chunks")
+    start = np.array([values[j].get(baseline[address],-1) if baseline is not None and address in baseline else -1 for j,address in enumerate(addresses)],dtype=np.int64)
+    order = _gray_order(codes)
+    if order is None: order = _greedy_order(codes,start)
+    bounds = np.linspace(0,len(order),max(1,min(chunks,len(order)))+1).round().astype(int)
+    chunk_list = [list(range(bounds[c],bounds[c+1])) for c in range(len(bounds)-1)]
+    steps = [{}]*len(order)
+    for chunk in chunk_list:
+        state = start.copy()
+        for k in chunk:
+            row = codes[order[k]]
+            changed = (row >= 0) & (row != state)
+            steps[k] = {addresses[j]:full[order[k]][addresses[j]] for j in np.flatnonzero(changed).tolist()}
+            state = np.where(row >= 0,row,state)
+    return ScenarioPlan(full,order,chunk_list,steps)
+
+def _gray_order(codes:np.ndarray) -> list[int]|None:
+    # None unless the rows are every combination of the values of the columns, exactly once each
+    if not len(codes) or (codes < 0).any(): return None
+    sizes = codes.max(axis=0)+1
+    if int(np.prod(sizes,dtype=object)) != len(codes): return None
+    index = {tuple(row):i for i,row in enumerate(codes.tolist())}
+    if len(index) != len(codes): return None
+    # Reflected mixed radix Gray code, the last column varying fastest
+    tuples = [()]
+    for size in sizes.tolist():
+        tuples = [prefix+(v,) for k,prefix in enumerate(tuples) for v in (range(size) if k%2 == 0 else range(size-1,-1,-1))]
+    return [index[t] for t in tuples]
+
+def _greedy_order(codes:np.ndarray, start:np.ndarray) -> list[int]:
+    state = start.copy()
+    left = np.ones(len(codes),dtype=bool)
+    order = []
+    for _ in range(len(codes)):
+        writes = np.sum((codes >= 0) & (codes != state),axis=1)
+        writes[~left] = np.iinfo(np.int64).max
+        i = int(np.argmin(writes))
+        order.append(i)
+        left[i] = False
+        state = np.where(codes[i] >= 0,codes[i],state)
+    return order
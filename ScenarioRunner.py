@@ -0,0 +1,255 @@
+import itertools
+import math
+import multiprocessing
+import os
+import queue
+import threading
+from collections import deque
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+def OpenCase(case_path:str, solve_cache:str|None=None):
+    """
+    Default worker backend, starts a SuperPro Designer of its own and opens case_path in it.
+    With solve_cache, the path of a SolveCache database shared by the workers, repeated scenarios are not solved again (pass functools.partial(OpenCase, solve_cache=path) as backend).
+    A backend is any picklable callable taking the case path and returning a SuperProDesignerDocument (or an object with the same methods).
+    """
+    from SuperProDesigner import CoInitialize, SuperProDesigner
+    CoInitialize()  # Worker threads need their own apartment
+    doc = SuperProDesigner().OpenDoc(case_path)
+    if solve_cache is not None: doc.EnableSolveCache(solve_cache)
+    return doc
+
+def RunScenario(doc, inputs:dict, outputs:list, economics:bool=True) -> list:
+    """
+    Default scenario task: applies the inputs, solves the M&E balances (and economics) and reads the outputs.
+    """
+    doc.ApplyInputs(inputs)
+    return doc.Solve(outputs,economics)
+
+# Input of RunThroughput scenarios: {THROUGHPUT: factor}
+THROUGHPUT = "throughputFactor"
+
+def RunThroughput(doc, inputs:dict, outputs:list, economics:bool=True) -> list:
+    """
+    Throughput scenario task: scales the worker's document to the throughput factor inputs[THROUGHPUT] (relative to the case file) with ScaleUpThroughput, solves and reads the outputs.
+    Consecutive scenarios on a worker start from the previous solution, see SuperProDesignerDocument.throughput_curve.
+    """
+    factor = inputs[THROUGHPUT]
+    if not math.isclose(factor,doc.throughputFactor) and not doc.ScaleUpThroughput(factor/doc.throughputFactor):
+        raise RuntimeError(f"ScaleUpThroughput to {factor} failed: {doc.GetCOMErrorMsg()}")
+    return doc.Solve(outputs,economics)
+
+class ServerRestarted(RuntimeError):
+    """
+    Raised by a backend document whose COM server was restarted in the middle of a scenario, the document being usable again (see Watchdog.Supervisor).
+    ScenarioRunner retries the scenario on the same worker.
+    """
+
+def Alive(doc) -> bool:
+    """
+    Whether the COM server of doc still answers, telling a failed scenario (the document is usable) from a dead server.
+    """
+    try:
+        doc.IsCOMSimDataComplete()
+        return True
+    except Exception:
+        return False
+
+def _close(doc):
+    try:
+        doc.CloseDoc(False)
+        doc.app.CloseApp()
+    except Exception:
+        pass
+
+def _worker(worker_id:int, backend:Callable, case_path:str, task:Callable, outputs:list, economics:bool, tasks, results):
+    """
+    Worker loop, reports (worker_id, index, status, payload) with status "ok", "error" (the scenario failed), "retry" (the COM server was restarted in place) or "dead" (the COM server is gone).
+    """
+    try:
+        doc = backend(case_path)
+    except Exception as e:
+        results.put((worker_id, None, "dead", repr(e)))
+        return
+    while True:
+        item = tasks.get()
+        if item is None: break
+        index,inputs = item
+        try:
+            results.put((worker_id, index, "ok", task(doc, inputs, outputs, economics)))
+        except ServerRestarted as e:
+            results.put((worker_id, index, "retry", repr(e)))
+        except Exception as e:
+            if Alive(doc):
+                results.put((worker_id, index, "error", repr(e)))
+                continue
+            results.put((worker_id, index, "dead", repr(e)))
+            return
+    _close(doc)
+
+class ScenarioResult(NamedTuple):
+    index:int
+    inputs:dict
+    outputs:list|None
+    error:str|None
+    attempts:int
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class _Worker:
+    def __init__(self, runner:"ScenarioRunner", worker_id:int):
+        self.id = worker_id
+        self.current:list|None = None  # [index, inputs, attempts]
+        self.stopped = False
+        args = (worker_id, runner.backend, runner.case_path, runner.task, runner.outputs, runner.economics)
+        if runner.processes:
+            self.tasks = runner._context.Queue()
+            self.handle = runner._context.Process(target=_worker, daemon=True, args=args+(self.tasks, runner._results))
+        else:
+            self.tasks = queue.Queue()
+            self.handle = threading.Thread(target=_worker, daemon=True, args=args+(self.tasks, runner._results))
+        self.handle.start()
+
+    def Give(self, item:list):
+        self.current = item
+        self.tasks.put((item[0],item[1]))
+
+    def Stop(self):
+        self.current = None
+        if self.stopped: return
+        self.stopped = True
+        self.tasks.put(None)
+
+    def Join(self, timeout:float|None=None):
+        # Terminating a process can leave the shared result queue locked, so it is only done for workers that do not exit by themselves
+        self.handle.join(timeout)
+        if isinstance(self.handle, multiprocessing.process.BaseProcess) and self.handle.is_alive(): self.handle.terminate()
+
+class ScenarioRunner:
+    """
+    Runs scenarios ({address: value} input dicts, see SuperProDesignerDocument.ApplyInputs) on a pool of at most max_workers workers that each own a copy of the case file.
+    Results stream back as ScenarioResult in completion order.
+    A worker whose COM server died is restarted, and its scenario retried up to retries more times (on the same worker when the backend restarted the server itself, see ServerRestarted).
+    backend opens the case in a worker (OpenCase by default) and task runs one scenario on it (RunScenario by default), both must be picklable when processes is True.
+    With processes False the workers are threads, which is enough for fake or remote backends.
+    Note that a worker keeps its document between scenarios, so every scenario should set all the inputs it relies on.
+    Used as a context manager (with ScenarioRunner(...) as runner:) the idle workers are kept between run() calls and only stopped on exit, saving a case reopen per run.
+    """
+    def __init__(self, case_path:str, outputs:list, backend:Callable=OpenCase, max_workers:int|None=None, retries:int=2,
+                 economics:bool=True, task:Callable=RunScenario, processes:bool=True, start_method:str|None=None, poll_interval:float=0.5):
+        self.case_path = case_path
+        self.outputs = list(outputs)
+        self.backend = backend
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.retries = retries
+        self.economics = economics
+        self.task = task
+        self.processes = processes
+        self.poll_interval = poll_interval
+        self.shutdown_timeout = 10.0
+        self.restarts = 0
+        self._context = multiprocessing.get_context(start_method)
+        self._worker_ids = itertools.count()
+        self._keep = False
+        self._idle:list[_Worker] = []
+        self._results = None
+
+    def __enter__(self):
+        self._keep = True
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """
+        Stops the workers kept between runs.
+        """
+        self._keep = False
+        for worker in self._idle: worker.Stop()
+        for worker in self._idle: worker.Join(self.shutdown_timeout)
+        self._idle = []
+
+    def run(self, scenarios:Iterable[dict], skip:Iterable[int]=()) -> Iterator[ScenarioResult]:
+        """
+        Runs every scenario whose index is not in skip and yields the results as they finish.
+        """
+        skip = set(skip)
+        todo = ((index,inputs) for index,inputs in enumerate(scenarios) if index not in skip)
+        retry:deque[list] = deque()
+        failed:list[ScenarioResult] = []
+        workers:dict[int,_Worker] = {}
+        retired:list[_Worker] = []
+        if self._results is None or not self._keep: self._results = self._context.Queue() if self.processes else queue.Queue()
+
+        def take() -> list|None:
+            if retry: return retry.popleft()
+            item = next(todo,None)
+            return None if item is None else [item[0],item[1],1]
+
+        def start(item:list):
+            worker = self._idle.pop() if self._idle else _Worker(self,next(self._worker_ids))
+            workers[worker.id] = worker
+            worker.Give(item)
+
+        def retire(worker:_Worker):
+            worker.Stop()
+            retired.append(workers.pop(worker.id))
+
+        def dead(worker:_Worker, error:str, opened:bool=True):
+            item = worker.current
+            retire(worker)
+            worker.Join(self.shutdown_timeout)
+            if not opened and workers:
+                # The backend could not open the case (e.g. no free slot on a remote server), the remaining workers take the scenario
+                retry.appendleft(item)
+                return
+            self.restarts += 1
+            if item[2] <= self.retries:
+                item[2] += 1
+                retry.append(item)
+            else:
+                failed.append(ScenarioResult(item[0],item[1],None,error,item[2]))
+            item = take()
+            if item is not None: start(item)
+
+        try:
+            for _ in range(self.max_workers):
+                item = take()
+                if item is None: break
+                start(item)
+            while workers or failed:
+                while failed: yield failed.pop()
+                if not workers: break
+                try:
+                    worker_id,index,status,payload = self._results.get(timeout=self.poll_interval)
+                except queue.Empty:
+                    for worker in list(workers.values()):
+                        if not worker.handle.is_alive(): dead(worker,"Worker exited")
+                    continue
+                worker = workers.get(worker_id)
+                if worker is None or worker.current is None: continue  # Message from a worker that was already replaced
+                if status == "dead":
+                    dead(worker,payload,index is not None)
+                    continue
+                if status == "retry":
+                    self.restarts += 1
+                    if worker.current[2] <= self.retries:
+                        worker.current[2] += 1
+                        worker.Give(worker.current)
+                        continue
+                _,inputs,attempts = worker.current
+                item = take()
+                if item is None and self._keep:
+                    worker.current = None
+                    self._idle.append(workers.pop(worker.id))
+                elif item is None:
+                    retire(worker)
+                else:
+                    worker.Give(item)
+                yield ScenarioResult(index,inputs,payload if status == "ok" else None,None if status == "ok" else payload,attempts)
+        finally:
+            for worker in list(workers.values()): retire(worker)
+            for worker in retired: worker.Join(self.shutdown_timeout)
@@ -0,0 +1,95 @@
+import numpy as np
+
+from SuperProDesigner import Numbers
+
+# timeUtilization_VID is a procedure variable in SPD, the equipment only report busy and occupancy times
+PROCEDURE_SCHEDULE_VARS = ("equipmentName_VID","startTime_VID","endTime_VID","cycleTime_VID","numberOfCycles_VID","timeUtilization_VID")
+EQUIPMENT_SCHEDULE_VARS = ("busyTime_VID","occupancyTime_VID")
+
+class Schedule:
+    """
+    Procedure cycles as an interval table (one row per cycle, sorted by equipment and start) with per-equipment occupancy, built by SuperProDesignerDocument.schedule().
+    Cycle k of batch b of a procedure runs from startTime + b * batchTime + k * cycleTime for cycleTime.
+    Interval arrays: procedure, equipment (indexes into procedures / equipmentNames, -1 when the equipment is unknown), batch, cycle, start, end and overlap (time shared with earlier intervals on the same equipment).
+    Per-equipment arrays (indexed like equipmentNames): busy (union of the intervals), overlapTime, intervalCount, conflicts (intervals overlapping an earlier one), utilization (busy / horizon),
+    and the values SPD reports: reportedBusyTime and reportedOccupancyTime (per equipment) and reportedUtilization (per procedure).
+    """
+    def __init__(self, procedures:dict, equipment:dict, batches:int=1, batchTime:float|None=None):
+        self.procedures:tuple[str,...] = procedures["names"]
+        self.equipmentNames:tuple[str,...] = equipment["names"]
+        self.procedureEquipment = np.asarray(procedures["equipmentName_VID"],dtype=object)
+        self.procedureStart = Numbers(procedures["startTime_VID"])
+        self.procedureEnd = Numbers(procedures["endTime_VID"])
+        self.cycleTime = Numbers(procedures["cycleTime_VID"])
+        self.numberOfCycles = np.nan_to_num(Numbers(procedures["numberOfCycles_VID"]),nan=1.0).astype(np.int64).clip(min=0)
+        self.reportedUtilization = Numbers(procedures["timeUtilization_VID"])
+        self.reportedBusyTime = Numbers(equipment["busyTime_VID"])
+        self.reportedOccupancyTime = Numbers(equipment["occupancyTime_VID"])
+        self.batches = batches
+        if batchTime is None: batchTime = float(np.nanmax(self.procedureEnd)-np.nanmin(self.procedureStart)) if len(self.procedures) else 0.0
+        self.batchTime = batchTime
+
+        equipmentIndex = {name:i for i,name in enumerate(self.equipmentNames)}
+        procedureEquipment = np.array([equipmentIndex.get(name,-1) for name in self.procedureEquipment],dtype=np.int64)
+        cycles = self.numberOfCycles*batches
+        # Row r of the table is cycle r - first[p] of procedure p, with the batches one after another
+        procedure = np.repeat(np.arange(len(self.procedures)),cycles)
+        first = np.repeat(np.cumsum(cycles)-cycles,cycles)
+        index = np.arange(len(procedure))-first
+        cyclesPerBatch = np.maximum(self.numberOfCycles[procedure],1)
+        batch,cycle = np.divmod(index,cyclesPerBatch)
+        start = self.procedureStart[procedure]+batch*batchTime+cycle*self.cycleTime[procedure]
+        end = start+self.cycleTime[procedure]
+        equipment = procedureEquipment[procedure]
+
+        order = np.lexsort((start,equipment))
+        self.procedure,self.equipment,self.batch,self.cycle,self.start,self.end = procedure[order],equipment[order],batch[order],cycle[order],start[order],end[order]
+        self._occupancy()
+
+    def _occupancy(self):
+        n = len(self.equipmentNames)
+        known = self.equipment >= 0
+        # Shifting every equipment past the previous one lets one running maximum cover all of them
+        span = float(np.nanmax(self.end)-np.nanmin(self.start))+1.0 if len(self.start) else 1.0
+        shift = (self.equipment+1)*span*2.0
+        previousEnd = np.maximum.accumulate(np.nan_to_num(self.end,nan=-np.inf)+shift)-shift
+        previousEnd = np.concatenate(([-np.inf],previousEnd[:-1]))
+        firstOfEquipment = np.concatenate(([True],self.equipment[1:] != self.equipment[:-1]))
+        previousEnd[firstOfEquipment] = -np.inf
+        self.overlap = np.clip(np.minimum(self.end,previousEnd)-self.start,0.0,None)
+        self.overlap[~np.isfinite(self.overlap)] = 0.0
+        equipment = self.equipment[known]
+        duration = np.nan_to_num(self.end-self.start)[known]
+        self.intervalCount = np.bincount(equipment,minlength=n)
+        self.overlapTime = np.bincount(equipment,weights=self.overlap[known],minlength=n)
+        self.busy = np.bincount(equipment,weights=duration,minlength=n)-self.overlapTime
+        self.conflicts = np.bincount(equipment,weights=self.overlap[known] > 0,minlength=n).astype(np.int64)
+        horizon = self.horizon
+        self.utilization = self.busy/horizon if horizon > 0 else np.zeros(n)
+
+    @property
+    def horizon(self) -> float:
+        """
+        Time from the first start to the last end of the table.
+        """
+        return float(np.nanmax(self.end)-np.nanmin(self.start)) if len(self.start) else 0.0
+
+    def __len__(self):
+        return len(self.start)
+
+    def Gantt(self) -> dict[str,np.ndarray]:
+        """
+        Per interval arrays for plotting, e.g. with matplotlib's broken_barh: "equipment" and "procedure" names, "start", "duration", "batch" and "cycle".
+        """
+        equipmentNames = np.array(self.equipmentNames+("",),dtype=object)
+        return {"equipment":equipmentNames[self.equipment],"procedure":np.array(self.procedures,dtype=object)[self.procedure],
+                "start":self.start,"duration":self.end-self.start,"batch":self.batch,"cycle":self.cycle}
+
+    def Occupancy(self) -> dict[str,dict]:
+        """
+        {equipment name: {"busy", "utilization", "overlapTime", "conflicts", "intervals", "reportedBusyTime", "reportedOccupancyTime"}}.
+        """
+        return {name:{"busy":float(self.busy[i]),"utilization":float(self.utilization[i]),"overlapTime":float(self.overlapTime[i]),
+                      "conflicts":int(self.conflicts[i]),"intervals":int(self.intervalCount[i]),"reportedBusyTime":float(self.reportedBusyTime[i]),
+                      "reportedOccupancyTime":float(self.reportedOccupancyTime[i])}
+                for i,name in enumerate(self.equipmentNames)}
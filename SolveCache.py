@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS solves (key TEXT PRIMARY KEY, size INTEGER NOT NULL, used REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS outputs (key TEXT NOT NULL, address TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (key, address));
+"""
+
+class SolveCache:
+    """
+    Persistent store of solve outputs, keyed by the content of the case file plus every input written to the document since it was opened (see SuperProDesignerDocument.Solve).
+    Lives in a SQLite file that several processes can share. When the stored outputs exceed max_bytes the least recently used solves are evicted.
+    """
+    def __init__(self, path:str, max_bytes:int=256*1024*1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._case_hashes:dict[str,tuple] = {}  # path: (mtime, size, digest)
+        self._db = sqlite3.connect(path,timeout=60,isolation_level=None,check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def CaseHash(self, case_path:str) -> str:
+        """
+        SHA-256 of the case file, rehashed only when its mtime or size changes.
+        """
+        stat = os.stat(case_path)
+        cached = self._case_hashes.get(case_path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns,stat.st_size): return cached[2]
+        digest = hashlib.sha256()
+        with open(case_path,'rb') as f:
+            for chunk in iter(lambda: f.read(1<<20),b''): digest.update(chunk)
+        self._case_hashes[case_path] = (stat.st_mtime_ns,stat.st_size,digest.hexdigest())
+        return digest.hexdigest()
+
+    def Key(self, case_path:str, applied:dict, economics:bool=True) -> str:
+        """
+        Key of a solve of case_path after the ordered writes applied ({entry: value}, see SuperProDesignerDocument.applied).
+        """
+        writes = json.dumps([[list(entry),val] for entry,val in applied.items()],separators=(',',':'))
+        return hashlib.sha256(f"{self.CaseHash(case_path)}\n{int(economics)}\n{writes}".encode()).hexdigest()
+
+    def Get(self, key:str, outputs:list) -> list|None:
+        """
+        The stored values of the output addresses, or None unless all of them are stored for key.
+        """
+        addresses = [_address(address) for address in outputs]
+        found = {}
+        for i in range(0,len(addresses),500):
+            chunk = addresses[i:i+500]
+            found.update(self._db.execute(f"SELECT address, value FROM outputs WHERE key = ? AND address IN ({','.join('?'*len(chunk))})",[key]+chunk))
+        if len(found) < len(set(addresses)):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._db.execute("UPDATE solves SET used = ? WHERE key = ?",(time.time(),key))
+        return [json.loads(found[address]) for address in addresses]
+
+    def Put(self, key:str, outputs:list, values:list):
+        rows = [(key,_address(address),json.dumps(val)) for address,val in zip(outputs,values)]
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.executemany("INSERT OR REPLACE INTO outputs VALUES (?, ?, ?)",rows)
+            size = self._db.execute("SELECT SUM(LENGTH(address) + LENGTH(value)) FROM outputs WHERE key = ?",(key,)).fetchone()[0]
+            self._db.execute("INSERT OR REPLACE INTO solves VALUES (?, ?, ?)",(key,size,time.time()))
+            self._evict()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM solves").fetchone()[0]
+        if total <= self.max_bytes: return
+        for key,size in self._db.execute("SELECT key, size FROM solves ORDER BY used").fetchall():
+            self._db.execute("DELETE FROM outputs WHERE key = ?",(key,))
+            self._db.execute("DELETE FROM solves WHERE key = ?",(key,))
+            total -= size
+            if total <= self.max_bytes: break
+
+    def Clear(self):
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.execute("DELETE FROM outputs")
+            self._db.execute("DELETE FROM solves")
+
+    def close(self):
+        self._db.close()
+
+    @property
+    def hitRate(self) -> float:
+        return self.hits/(self.hits+self.misses) if self.hits+self.misses else 0.0
+
+def _address(address:tuple) -> str:
+    return json.dumps(list(address),separators=(',',':'))
@@ -0,0 +1,219 @@
+import sys
+
+import numpy as np
+
+from SuperProDesigner import Numbers
+
+# Stream variables held as float columns and classification flags held as boolean columns by SuperProDesignerDocument.stream_table()
+STREAM_TABLE_VARS = ("massFlow_VID","volFlow_VID","temperature_VID","pressure_VID","streamPrice_VID")
+STREAM_TABLE_FLAGS = ("isInputStream_VID","isOutputStream_VID","isRawMaterial_VID","isCleaningAgent_VID","isMainRevenue_VID","isRevenue_VID","isWaste_VID",
+                      "isSolidWaste_VID","isAqueousWaste_VID","isOrganicWaste_VID","isEmission_VID","isCredit_VID","isNone_VID")
+
+class StreamTable:
+    """
+    Streams as columns: the names (interned, in one tuple) and one contiguous array per variable key, float64 for values (NaN where the read failed) and bool for flags.
+    Rows are handed out as StreamRow views, and Where / Select return sub-tables, so filtering and arithmetic stay vectorized:
+
+        table = doc.stream_table()
+        waste = table.Select(isOutputStream=True, isWaste=True)
+        waste.Column("massFlow_VID").sum()
+    """
+    def __init__(self, names, columns:dict[str,np.ndarray], doc=None):
+        self.names:tuple[str,...] = tuple(sys.intern(name) for name in names)
+        self.columns = columns
+        self.doc = doc
+        self._index:dict[str,int]|None = None
+
+    def __getstate__(self):
+        # The document stays behind when a table is pickled
+        return dict(self.__dict__,doc=None)
+
+    @classmethod
+    def FromSnapshot(cls, snapshot:dict, flags=STREAM_TABLE_FLAGS, doc=None) -> "StreamTable":
+        """
+        Table of the "stream" part of a SuperProDesignerDocument.Snapshot, converting the flags keys to boolean columns.
+        """
+        columns = {}
+        for key,column in snapshot.items():
+            if key in ("names","components"): continue
+            if key in flags: columns[key] = _flags(column)
+            elif column.dtype == object: columns[key] = Numbers(column)
+            else: columns[key] = np.ascontiguousarray(column,dtype=np.float64)
+        return cls(snapshot["names"],columns,doc)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        for i in range(len(self.names)): yield StreamRow(self,i)
+
+    def __contains__(self, name:str):
+        return name in self.index
+
+    def __getitem__(self, item):
+        """
+        table["S-1"] or table[i] is a StreamRow, table[mask] or table[indices] a sub-table.
+        """
+        if isinstance(item,str): return StreamRow(self,self.index[item])
+        if isinstance(item,(int,np.integer)): return StreamRow(self,range(len(self.names))[item])
+        return self.Take(item)
+
+    def __repr__(self):
+        return f"StreamTable({len(self.names)} streams, {list(self.columns)})"
+
+    @property
+    def index(self) -> dict[str,int]:
+        """
+        Row of every stream name, built on first use.
+        """
+        if self._index is None: self._index = {name:i for i,name in enumerate(self.names)}
+        return self._index
+
+    def Column(self, key:str) -> np.ndarray:
+        return self.columns[key]
+
+    def Take(self, rows) -> "StreamTable":
+        """
+        Sub-table of the rows given as a boolean mask or an array of indices.
+        """
+        rows = np.asarray(rows)
+        if rows.dtype == bool: rows = np.flatnonzero(rows)
+        names = self.names
+        return StreamTable([names[i] for i in rows.tolist()],{key:column[rows] for key,column in self.columns.items()},self.doc)
+
+    def Where(self, mask) -> "StreamTable":
+        return self.Take(np.asarray(mask,dtype=bool))
+
+    def Select(self, **flags) -> "StreamTable":
+        """
+        Streams whose flags have the given values, the keys with or without the _VID suffix: table.Select(isOutputStream=True, isWaste=True).
+        """
+        mask = np.ones(len(self.names),dtype=bool)
+        for key,val in flags.items():
+            mask &= self.columns[_vid(key)] == bool(val)
+        return self.Take(mask)
+
+    def ToDict(self) -> dict:
+        """
+        {"names": [...], key: [...]} with plain Python values, e.g. for json or pandas.DataFrame.
+        """
+        return dict({"names":list(self.names)},**{key:column.tolist() for key,column in self.columns.items()})
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory held by the columns, the names list and the index (the strings themselves not counted).
+        """
+        size = sum(column.nbytes for column in self.columns.values())+sys.getsizeof(self.names)
+        if self._index is not None: size += sys.getsizeof(self._index)
+        return size
+
+class StreamRow:
+    """
+    One row of a StreamTable; row.massFlow (or row["massFlow_VID"]) reads its column.
+    """
+    __slots__ = ("table","i")
+    def __init__(self, table:StreamTable, i:int):
+        self.table = table
+        self.i = i
+
+    @property
+    def name(self) -> str:
+        return self.table.names[self.i]
+
+    def __getitem__(self, key:str):
+        return self.table.columns[key][self.i].item()
+
+    def __getattr__(self, attr:str):
+        if attr.startswith("__") or attr in StreamRow.__slots__: raise AttributeError(attr)
+        column = self.table.columns.get(_vid(attr))
+        if column is None: raise AttributeError(attr)
+        return column[self.i].item()
+
+    def __repr__(self):
+        return f"StreamRow({self.name!r})"
+
+    def Stream(self):
+        """
+        The Stream object of this row, for writes.
+        """
+        from SuperProDesigner import Stream
+        return Stream(self.table.doc,self.name)
+
+class ComponentFlows:
+    """
+    Stream x component matrix of componentMassFlow_VID, componentMoleFlow_VID or compMassFrac_VID values, built by SuperProDesignerDocument.component_flow_matrix(),
+    with the StreamTable of the same streams (flags and massFlow_VID) for the balance checks.
+    matrix is a dense array, or a scipy.sparse CSR matrix, with rows in the order of names and columns in the order of components; components a stream does not hold are 0.
+    Mass fractions are turned into mass flows (times massFlow_VID) for the balances.
+    """
+    def __init__(self, names, components, matrix, table:StreamTable, vid:str):
+        self.names:tuple[str,...] = tuple(names)
+        self.components:tuple[str,...] = tuple(components)
+        self.matrix = matrix
+        self.table = table
+        self.vid = vid
+
+    @property
+    def flows(self):
+        if self.vid != "compMassFrac_VID": return self.matrix
+        massFlow = np.nan_to_num(self.table.Column("massFlow_VID"))
+        if isinstance(self.matrix,np.ndarray): return self.matrix*massFlow[:,None]
+        return self.matrix.multiply(massFlow[:,None]).tocsr()
+
+    def Totals(self, masks) -> np.ndarray:
+        """
+        Per-component sums of the flows over the streams of each row of masks (a boolean array of shape (n, streams), or one mask), in one matrix product.
+        """
+        masks = np.asarray(masks,dtype=np.float64)
+        totals = np.asarray(self.flows.T @ np.atleast_2d(masks).T).T
+        return totals if masks.ndim == 2 else totals[0]
+
+    def Balance(self) -> dict[str,np.ndarray]:
+        """
+        Per-component "input" (input streams) and "output" (output streams) totals, their "residual" (input - output)
+        and the "relative" residual (by the larger of the two totals, 0 where both are 0).
+        """
+        inputs,outputs = self.Totals(np.stack([self.table.Column("isInputStream_VID"),self.table.Column("isOutputStream_VID")]))
+        residual = inputs-outputs
+        scale = np.maximum(np.abs(inputs),np.abs(outputs))
+        relative = np.divide(residual,scale,out=np.zeros_like(residual),where=scale > 0)
+        return {"input":inputs,"output":outputs,"residual":residual,"relative":relative}
+
+    def Unbalanced(self, rtol:float=1e-6, atol:float=1e-9) -> dict[str,float]:
+        """
+        {component: residual} of the components whose input and output totals differ by more than atol + rtol * the larger total, plus "total" for the sum over all components.
+        """
+        balance = self.Balance()
+        inputs,outputs,residual = balance["input"],balance["output"],balance["residual"]
+        bad = np.abs(residual) > atol+rtol*np.maximum(np.abs(inputs),np.abs(outputs))
+        unbalanced = {self.components[j]:float(residual[j]) for j in np.flatnonzero(bad)}
+        total = float(residual.sum())
+        if abs(total) > atol+rtol*max(abs(float(inputs.sum())),abs(float(outputs.sum()))): unbalanced["total"] = total
+        return unbalanced
+
+    def IsClosed(self, rtol:float=1e-6, atol:float=1e-9) -> bool:
+        return not self.Unbalanced(rtol,atol)
+
+    def StreamResiduals(self) -> np.ndarray:
+        """
+        massFlow_VID of every stream minus the sum of its component mass flows (componentMassFlow_VID and compMassFrac_VID matrices only).
+        """
+        if self.vid == "componentMoleFlow_VID": raise ValueError("Mole flows do not add up to massFlow_VID")
+        return self.table.Column("massFlow_VID")-np.asarray(self.flows.sum(axis=1)).ravel()
+
+    def ByClassification(self, flags=None) -> dict[str,np.ndarray]:
+        """
+        {flag: per-component totals of the streams having it} for the flags of the table (default all of them), e.g. "isWaste_VID" or "isRevenue_VID".
+        """
+        if flags is None: flags = [key for key,column in self.table.columns.items() if column.dtype == bool]
+        flags = [_vid(flag) for flag in flags]
+        return dict(zip(flags,self.Totals(np.stack([self.table.Column(flag) for flag in flags]))))
+
+def _vid(key:str) -> str:
+    return key if key.endswith("_VID") else key+"_VID"
+
+def _flags(column) -> np.ndarray:
+    column = np.asarray(column)
+    if column.dtype != object: return np.nan_to_num(column.astype(np.float64),nan=0.0) != 0
+    return np.array([isinstance(val,(int,float)) and val == val and val != 0 for val in column],dtype=bool)
@@ -1,225 +1,431 @@
-from IPython import embed
-import comtypes.client
-from comtypes.automation import VARIANT, byref
+import hashlib
+import itertools
+import json
+import math
+import os
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+import numpy as np
+
+# comtypes.automation, imported by _import_comtypes() once a document is opened so that the tables can be used without comtypes
+VARIANT = byref = None
+
+DEFAULT_TLB_PATH = r"C:\Program Files (x86)\Intelligen\SuperPro Designer\v10\Designer.tlb"
+
+# Bump when the tables built by BuildVarTables change, so that older cache files are ignored
+_TABLES_VERSION = 2
+
+# Stream variables that are read per component (compLocalName) rather than for the whole stream
+COMPONENT_STREAM_VARS = frozenset({
+    "mw_VID", "componentMassFlow_VID", "compMassFrac_VID", "componentMoleFlow_VID", "compMoleFrac_VID",
+    "compExtraCellFrac_VID", "compVaporFrac_VID", "compMassConc_VID", "compMoleConc_VID"
+})
+
+# Operation variables holding a value per component, read with GetOperVarVal2(..., compLocalName)
+COMPONENT_OPERATION_VARS = frozenset({"componentSplits_VID", "componentFlow_VID", "emissionsFracs_VID"})
+# Marks the qualifier of GetUPEmptiedContentsVarVal keys
+EMPTIED_CONTENTS = "emptiedContents"
+
+# What a variable write leaves to recalculate (see SuperProDesignerDocument.ensure_solved): variables not listed here change the M&E balances,
+# ECONOMIC_VARS only the economics and COSMETIC_VARS nothing
+ECONOMIC_VARS = {
+    "stream": frozenset({"streamPrice_VID", "wasteTreatCost_VID", "classification_VID", "isRawMaterial_VID", "isCleaningAgent_VID", "isMainRevenue_VID",
+                         "isRevenue_VID", "isWaste_VID", "isSolidWaste_VID", "isCredit_VID", "isAqueousWaste_VID", "isOrganicWaste_VID", "isEmission_VID", "isNone_VID"}),
+    "procedure": frozenset(),
+    "equipment": frozenset({"equipPC_VID", "equipPCEstimateOption_VID", "equipStandByNoUnits_VID", "equipPCDeprecPortion_VID", "equipConstrMaterial_VID",
+                            "equipConstrMaterialF_VID", "equipInstallCostF_VID", "equipMaintcCostF_VID", "equipUsageRate_VID", "equipAvailabilityRate_VID"}),
+    "operation": frozenset({"laborNeed_VID", "laborUnits_VID"}),
+}
+COSMETIC_VARS = {
+    "stream": frozenset({"comments_VID"}),
+    "procedure": frozenset({"description_VID", "comments_VID"}),
+    "equipment": frozenset({"description_VID", "comments_VID"}),
+    "operation": frozenset({"comments_VID", "opDescr_VID", "isOpDescrSetByUser_VID"}),
+}
+
+# Returned by internal reads when COM reports a failure, so that a False value can be told apart from a failed read
+_MISSING = object()
+
+def _touch(dirty:set, cls:str):
+    if cls == "simulation": dirty.update(("simulation","economics"))
+    elif cls == "economics": dirty.add("economics")
+
+def Numbers(values) -> np.ndarray:
+    """
+    values (e.g. a Snapshot or GetOperVars column, or a list of outputs) as a float64 array, NaN where a value is not a number (a failed read, a string).
+    """
+    if isinstance(values,np.ndarray) and values.dtype != object: return values.astype(np.float64)
+    return np.array([val if isinstance(val,(int,float)) else math.nan for val in values],dtype=np.float64)
 
-class SuperProDesigner:
-    def __init__(self,tlb_path = r"C:\Program Files (x86)\Intelligen\SuperPro Designer\v10\Designer.tlb"):
-        Designer = self.Designer = comtypes.client.GetModule(tlb_path)
-        self.app = comtypes.client.CreateObject(self.Designer.Application)
-        
-        # Enumerators
-        self.enum_vars:dict[str,dict[str,tuple[int,int]]] = {
-            "flowsheet_CID": {
-                "unitProc_LID": (Designer.flowsheet_CID, Designer.unitProc_LID),  # Unit Procedure
-                "equipment_LID": (Designer.flowsheet_CID, Designer.equipment_LID),  # Equipment
-                "stream_LID": (Designer.flowsheet_CID, Designer.stream_LID),  # Streams
-                "inStream_LID": (Designer.flowsheet_CID, Designer.inStream_LID),  # Input Streams
-                "outStream_LID": (Designer.flowsheet_CID, Designer.outStream_LID),  # Output Streams
-                "pureComp_LID": (Designer.flowsheet_CID, Designer.pureComp_LID),  # Pure Components
-                "stockMix_LID": (Designer.flowsheet_CID, Designer.stockMix_LID),  # Stock Mixtures
-                "mainBranchSection_LID": (Designer.flowsheet_CID, Designer.mainBranchSection_LID),  # Main Branch Sections
-                "branch_LID": (Designer.flowsheet_CID, Designer.branch_LID),  # Branches
-                "labor_LID": (Designer.flowsheet_CID, Designer.labor_LID),  # Labors
-                "hxAgent_LID": (Designer.flowsheet_CID, Designer.hxAgent_LID),  # Heat Transfer Agent
-                "power_LID": (Designer.flowsheet_CID, Designer.power_LID),  # Power
-                "consumable_LID": (Designer.flowsheet_CID, Designer.consumable_LID),  # Consumables
-                "storageUnit_LID": (Designer.flowsheet_CID, Designer.storageUnit_LID)  # Storage units
-            },
-            "branch_CID": {
-                "section_LID": (Designer.branch_CID, Designer.section_LID)  # Sections
-            },
-            "mainBranchSection_CID": {
-                "unitProc_LID": (Designer.mainBranchSection_CID, Designer.unitProc_LID)  # Unit Procedures
-            },
-            "equipment_CID": {
-                "unitProc_LID": (Designer.equipment_CID, Designer.unitProc_LID),  # Unit Procedures
-                "variableId_LID": (Designer.equipment_CID, Designer.variableId_LID),  # Equip. Variable Ids
-                "staggeredEquip_LID": (Designer.equipment_CID, Designer.staggeredEquip_LID)  # Staggered Equipment
-            },
-            "unitProc_CID": {
-                "operation_LID": (Designer.unitProc_CID, Designer.operation_LID),  # Operations
-                "inStream_LID": (Designer.unitProc_CID, Designer.inStream_LID),  # Input Streams
-                "outStream_LID": (Designer.unitProc_CID, Designer.outStream_LID)  # Output Streams
-            },
-            "operation_CID": {
-                "reaction_LID": (Designer.operation_CID, Designer.reaction_LID),  # Reactions
-                "cleanStep_LID": (Designer.operation_CID, Designer.cleanStep_LID)  # CIP Cleaning Steps
-            },
-            "stream_CID": {
-                "pureComp_LID": (Designer.stream_CID, Designer.pureComp_LID),  # Pure Components
-                "stockMix_LID": (Designer.stream_CID, Designer.stockMix_LID),  # Stock Mixtures
-                "sourceOperation_LID": (Designer.stream_CID, Designer.sourceOperation_LID),  # Source Operation
-                "destinationOperation_LID": (Designer.stream_CID, Designer.destinationOperation_LID)  # Destination Operation
-            },
-            "stockMix_CID": {
-                "pureComp_LID": (Designer.stockMix_CID, Designer.pureComp_LID)  # Pure Components
-            }
-        }
+def _qualifier(val2=None, val3=None):
+    if val3 is not None: return (val2,val3)
+    if val2 is not None: return val2
+    return ''
 
-        # Dictionary for variables relevant to input streams
-        self.stream_vars:dict[str,int] = {
-            "temperature_VID": Designer.temperature_VID,  # Stream Temperature
-            "pressure_VID": Designer.pressure_VID,        # Stream Pressure
-            "streamPrice_VID": Designer.streamPrice_VID,  # Stream Price
-            "comments_VID": Designer.comments_VID,        # User Comments
-            "activity_VID": Designer.activity_VID,        # Stream Activity
-            "massFlow_VID": Designer.massFlow_VID,        # Stream Mass Flow
-            "volFlow_VID": Designer.volFlow_VID,          # Stream Volumetric Flow
-            "mw_VID": Designer.mw_VID,                    # Specified Component Molecular Weight
-            "componentMassFlow_VID": Designer.componentMassFlow_VID, # Specified Component Mass Flow in Stream
-            "compMassFrac_VID": Designer.compMassFrac_VID,           # Specified Component Mass Fraction in Stream
-            "componentMoleFlow_VID": Designer.componentMoleFlow_VID, # Specified Component Mole Flow in Stream
-            "compMoleFrac_VID": Designer.compMoleFrac_VID,           # Specified Component Mole Fraction in Stream
-            "compExtraCellFrac_VID": Designer.compExtraCellFrac_VID, # Specified Component Extra Cellular Fraction in Stream
-            "compVaporFrac_VID": Designer.compVaporFrac_VID,         # Specified Component Vapor Fraction in Stream
-            "enthalpy_VID": Designer.enthalpy_VID,                  # Enthalpy of Stream
-            "specificEnthalpy_VID": Designer.specificEnthalpy_VID,  # Specific Enthalpy of Stream
-            "Cp_VID": Designer.Cp_VID,                              # Heat Capacity of Stream
-            "isInputStream_VID": Designer.isInputStream_VID,        # Check if a Stream is an Input Stream
-            "isOutputStream_VID": Designer.isOutputStream_VID,      # Check if a Stream is an Output Stream
-            "isRawMaterial_VID": Designer.isRawMaterial_VID,        # Is it a "Raw Material"?
-            "isCleaningAgent_VID": Designer.isCleaningAgent_VID,      # Is it a "Cleaning Agent"?
-            "isMainRevenue_VID": Designer.isMainRevenue_VID,        # Is it a "Main Revenue"?
-            "isRevenue_VID": Designer.isRevenue_VID,                # Is it a "Revenue"?
-            "isWaste_VID": Designer.isWaste_VID,                    # Is it a "Waste"?
-            "isSolidWaste_VID": Designer.isSolidWaste_VID,          # Is it a "Solid Waste"?
-            "isCredit_VID": Designer.isCredit_VID,                  # Is it a "Credit"?
-            "isAqueousWaste_VID": Designer.isAqueousWaste_VID,      # Is it an "Aqueous Waste"?
-            "isOrganicWaste_VID": Designer.isOrganicWaste_VID,      # Is it an "Organic Waste"?
-            "isEmission_VID": Designer.isEmission_VID,              # Is it an "Emission"?
-            "isNone_VID": Designer.isNone_VID,                      # Is it Classified as "None"?
-            "classification_VID": Designer.classification_VID,      # Stream Classification
-            "wasteTreatCost_VID": Designer.wasteTreatCost_VID,      # Waste Treatment Cost
-            "compMassConc_VID": Designer.compMassConc_VID,                # Specified Ingredient Mass Concentration in Stream
-            "compMoleConc_VID": Designer.compMoleConc_VID,                # Specified Ingredient Mole Concentration in Stream
-            "autoAdjust_VID": Designer.autoAdjust_VID,                    # Is the Stream Flow Auto Adjusted?
-            "bEditIngredientFracs_VID": Designer.bEditIngredientFracs_VID,# Do We Edit the Ingredient Fractions?
-            "bVolFlowSetByUser_VID": Designer.bVolFlowSetByUser_VID       # Do We Edit the Stream Mass Flow?
-        }
-        
-        self.procedure_vars:dict[str,int] = {
-            "numberOfOperations_VID": Designer.numberOfOperations_VID,  # Number of Operations in the Procedure
-            "numberOfCycles_VID": Designer.numberOfCycles_VID,          # Number of Cycles in the Procedure
-            "startTime_VID": Designer.startTime_VID,                    # Start Time
-            "endTime_VID": Designer.endTime_VID,                        # End Time
-            "cycleTime_VID": Designer.cycleTime_VID,                    # Cycle Time
-            "holdupTime_VID": Designer.holdupTime_VID,                  # Holdup Time
-            "totalTimePerBatch_VID": Designer.totalTimePerBatch_VID,    # Total Time per Batch (all cycles)
-            "isBatchMode_VID": Designer.isBatchMode_VID,                # Is Batch Mode?
-            "equipmentName_VID": Designer.equipmentName_VID,            # Equipment Name
-            "sizeUtilization_VID": Designer.sizeUtilization_VID,        # Size Utilization
-            "maxFillRatio_VID": Designer.maxFillRatio_VID,              # Maximum Fill Ratio
-            "timeUtilization_VID": Designer.timeUtilization_VID,        # Time Utilization
-            "description_VID": Designer.description_VID,                # Description
-            "comments_VID": Designer.comments_VID                       # Comments
-        }
-        self.equipment_vars:dict[str,int] = {
-            "noUnits_VID": Designer.noUnits_VID,  # Number of Units
-            "noHostedProcedures_VID": Designer.noHostedProcedures_VID,  # Number of Procedures hosted by this equipment
-            "isDesignMode_VID": Designer.isDesignMode_VID,  # Is Equipment In Design Mode?
-            "noStaggeredEquip_VID": Designer.noStaggeredEquip_VID,  # Number of Staggered Equipment Sets
-            "equipPC_VID": Designer.equipPC_VID,  # Purchase Cost
-            "equipPCEstimateOption_VID": Designer.equipPCEstimateOption_VID,  # Purchase Cost Estimation Option
-            "equipStandByNoUnits_VID": Designer.equipStandByNoUnits_VID,  # Number of Standby Units
-            "equipPCDeprecPortion_VID": Designer.equipPCDeprecPortion_VID,  # PC Portion Already Depreciated
-            "equipConstrMaterial_VID": Designer.equipConstrMaterial_VID,  # Construction Material
-            "equipConstrMaterialF_VID": Designer.equipConstrMaterialF_VID,  # Construction Material Factor
-            "equipInstallCostF_VID": Designer.equipInstallCostF_VID,  # Installation Factor
-            "equipMaintcCostF_VID": Designer.equipMaintcCostF_VID,  # Maintenance Factor
-            "equipUsageRate_VID": Designer.equipUsageRate_VID,  # Usage Rate
-            "equipAvailabilityRate_VID": Designer.equipAvailabilityRate_VID,  # Availability Rate
-            "busyTime_VID": Designer.busyTime_VID,  # Busy Time
-            "occupancyTime_VID": Designer.occupancyTime_VID,  # Occupancy Time
-            "maxFillRatio_VID": Designer.maxFillRatio_VID,  # Maximum Fill Ratio
-            "equipmentName_VID": Designer.equipmentName_VID,  # Equipment Name
-            "description_VID": Designer.description_VID,  # Description
-            "comments_VID": Designer.comments_VID,  # User Comments
-            "size_VID": Designer.size_VID,  # Equipment Size
-            "sizeUnits_VID": Designer.sizeUnits_VID,  # Equipment Size Units
-            "sizeName_VID": Designer.sizeName_VID,  # Sizing Description
-            "typeName_VID": Designer.typeName_VID,  # Equipment Type
-            "typeID_VID": Designer.typeID_VID,  # Equipment Type ID
+def BuildVarTables(Designer) -> dict[str,dict]:
+    """
+    Resolves the VID/LID/CID tables of SuperProDesigner from the constants of the type library module Designer.
+    """
+    tables = {}
+    # Enumerators
+    tables["enum_vars"] = {
+        "flowsheet_CID": {
+            "unitProc_LID": (Designer.flowsheet_CID, Designer.unitProc_LID),  # Unit Procedure
+            "equipment_LID": (Designer.flowsheet_CID, Designer.equipment_LID),  # Equipment
+            "stream_LID": (Designer.flowsheet_CID, Designer.stream_LID),  # Streams
+            "inStream_LID": (Designer.flowsheet_CID, Designer.inStream_LID),  # Input Streams
+            "outStream_LID": (Designer.flowsheet_CID, Designer.outStream_LID),  # Output Streams
+            "pureComp_LID": (Designer.flowsheet_CID, Designer.pureComp_LID),  # Pure Components
+            "stockMix_LID": (Designer.flowsheet_CID, Designer.stockMix_LID),  # Stock Mixtures
+            "mainBranchSection_LID": (Designer.flowsheet_CID, Designer.mainBranchSection_LID),  # Main Branch Sections
+            "branch_LID": (Designer.flowsheet_CID, Designer.branch_LID),  # Branches
+            "labor_LID": (Designer.flowsheet_CID, Designer.labor_LID),  # Labors
+            "hxAgent_LID": (Designer.flowsheet_CID, Designer.hxAgent_LID),  # Heat Transfer Agent
+            "power_LID": (Designer.flowsheet_CID, Designer.power_LID),  # Power
+            "consumable_LID": (Designer.flowsheet_CID, Designer.consumable_LID),  # Consumables
+            "storageUnit_LID": (Designer.flowsheet_CID, Designer.storageUnit_LID)  # Storage units
+        },
+        "branch_CID": {
+            "section_LID": (Designer.branch_CID, Designer.section_LID)  # Sections
+        },
+        "mainBranchSection_CID": {
+            "unitProc_LID": (Designer.mainBranchSection_CID, Designer.unitProc_LID)  # Unit Procedures
+        },
+        "equipment_CID": {
+            "unitProc_LID": (Designer.equipment_CID, Designer.unitProc_LID),  # Unit Procedures
+            "variableId_LID": (Designer.equipment_CID, Designer.variableId_LID),  # Equip. Variable Ids
+            "staggeredEquip_LID": (Designer.equipment_CID, Designer.staggeredEquip_LID)  # Staggered Equipment
+        },
+        "unitProc_CID": {
+            "operation_LID": (Designer.unitProc_CID, Designer.operation_LID),  # Operations
+            "inStream_LID": (Designer.unitProc_CID, Designer.inStream_LID),  # Input Streams
+            "outStream_LID": (Designer.unitProc_CID, Designer.outStream_LID)  # Output Streams
+        },
+        "operation_CID": {
+            "reaction_LID": (Designer.operation_CID, Designer.reaction_LID),  # Reactions
+            "cleanStep_LID": (Designer.operation_CID, Designer.cleanStep_LID)  # CIP Cleaning Steps
+        },
+        "stream_CID": {
+            "pureComp_LID": (Designer.stream_CID, Designer.pureComp_LID),  # Pure Components
+            "stockMix_LID": (Designer.stream_CID, Designer.stockMix_LID),  # Stock Mixtures
+            "sourceOperation_LID": (Designer.stream_CID, Designer.sourceOperation_LID),  # Source Operation
+            "destinationOperation_LID": (Designer.stream_CID, Designer.destinationOperation_LID)  # Destination Operation
+        },
+        "stockMix_CID": {
+            "pureComp_LID": (Designer.stockMix_CID, Designer.pureComp_LID)  # Pure Components
         }
-        self.init_vars:dict[str,int] = {
-            "autoInitMode_VID": Designer.autoInitMode_VID,              # Initialization Mode
-            "isSourceFileSame_VID": Designer.isSourceFileSame_VID,      # Is source the same file?
-            "bPartialPath_VID": Designer.bPartialPath_VID,              # Is Path Partial
-            "sourceFileName_VID": Designer.sourceFileName_VID,          # Source File Name
-            "sourceStreamName_VID": Designer.sourceStreamName_VID,      # Source Stream/Equipment Name
-            "bInitTotalMassFlow_VID": Designer.bInitTotalMassFlow_VID,  # Initialize Total Mass Flow
-            "totalFlowFactor_VID": Designer.totalFlowFactor_VID,        # Total Mass Flow Factor
-            "bInitComposition_VID": Designer.bInitComposition_VID,      # Initialize Composition
-            "bInitDensity_VID": Designer.bInitDensity_VID,              # Initialize Density / Thermo Data
-            "bInitTemperature_VID": Designer.bInitTemperature_VID,      # Initialize Temperature
-            "bInitPressure_VID": Designer.bInitPressure_VID,            # Initialize Pressure
-            "bInitEntityData_VID": Designer.bInitEntityData_VID,        # Initialize Discrete Entity Data
-            "solveAutoInitMode_VID": Designer.solveAutoInitMode_VID     # Before solving M&E balances auto initialization Mode
+    }
+
+    # Dictionary for variables relevant to input streams
+    tables["stream_vars"] = {
+        "temperature_VID": Designer.temperature_VID,  # Stream Temperature
+        "pressure_VID": Designer.pressure_VID,        # Stream Pressure
+        "streamPrice_VID": Designer.streamPrice_VID,  # Stream Price
+        "comments_VID": Designer.comments_VID,        # User Comments
+        "activity_VID": Designer.activity_VID,        # Stream Activity
+        "massFlow_VID": Designer.massFlow_VID,        # Stream Mass Flow
+        "volFlow_VID": Designer.volFlow_VID,          # Stream Volumetric Flow
+        "mw_VID": Designer.mw_VID,                    # Specified Component Molecular Weight
+        "componentMassFlow_VID": Designer.componentMassFlow_VID, # Specified Component Mass Flow in Stream
+        "compMassFrac_VID": Designer.compMassFrac_VID,           # Specified Component Mass Fraction in Stream
+        "componentMoleFlow_VID": Designer.componentMoleFlow_VID, # Specified Component Mole Flow in Stream
+        "compMoleFrac_VID": Designer.compMoleFrac_VID,           # Specified Component Mole Fraction in Stream
+        "compExtraCellFrac_VID": Designer.compExtraCellFrac_VID, # Specified Component Extra Cellular Fraction in Stream
+        "compVaporFrac_VID": Designer.compVaporFrac_VID,         # Specified Component Vapor Fraction in Stream
+        "enthalpy_VID": Designer.enthalpy_VID,                  # Enthalpy of Stream
+        "specificEnthalpy_VID": Designer.specificEnthalpy_VID,  # Specific Enthalpy of Stream
+        "Cp_VID": Designer.Cp_VID,                              # Heat Capacity of Stream
+        "isInputStream_VID": Designer.isInputStream_VID,        # Check if a Stream is an Input Stream
+        "isOutputStream_VID": Designer.isOutputStream_VID,      # Check if a Stream is an Output Stream
+        "isRawMaterial_VID": Designer.isRawMaterial_VID,        # Is it a "Raw Material"?
+        "isCleaningAgent_VID": Designer.isCleaningAgent_VID,      # Is it a "Cleaning Agent"?
+        "isMainRevenue_VID": Designer.isMainRevenue_VID,        # Is it a "Main Revenue"?
+        "isRevenue_VID": Designer.isRevenue_VID,                # Is it a "Revenue"?
+        "isWaste_VID": Designer.isWaste_VID,                    # Is it a "Waste"?
+        "isSolidWaste_VID": Designer.isSolidWaste_VID,          # Is it a "Solid Waste"?
+        "isCredit_VID": Designer.isCredit_VID,                  # Is it a "Credit"?
+        "isAqueousWaste_VID": Designer.isAqueousWaste_VID,      # Is it an "Aqueous Waste"?
+        "isOrganicWaste_VID": Designer.isOrganicWaste_VID,      # Is it an "Organic Waste"?
+        "isEmission_VID": Designer.isEmission_VID,              # Is it an "Emission"?
+        "isNone_VID": Designer.isNone_VID,                      # Is it Classified as "None"?
+        "classification_VID": Designer.classification_VID,      # Stream Classification
+        "wasteTreatCost_VID": Designer.wasteTreatCost_VID,      # Waste Treatment Cost
+        "compMassConc_VID": Designer.compMassConc_VID,                # Specified Ingredient Mass Concentration in Stream
+        "compMoleConc_VID": Designer.compMoleConc_VID,                # Specified Ingredient Mole Concentration in Stream
+        "autoAdjust_VID": Designer.autoAdjust_VID,                    # Is the Stream Flow Auto Adjusted?
+        "bEditIngredientFracs_VID": Designer.bEditIngredientFracs_VID,# Do We Edit the Ingredient Fractions?
+        "bVolFlowSetByUser_VID": Designer.bVolFlowSetByUser_VID       # Do We Edit the Stream Mass Flow?
+    }
+    
+    tables["procedure_vars"] = {
+        "numberOfOperations_VID": Designer.numberOfOperations_VID,  # Number of Operations in the Procedure
+        "numberOfCycles_VID": Designer.numberOfCycles_VID,          # Number of Cycles in the Procedure
+        "startTime_VID": Designer.startTime_VID,                    # Start Time
+        "endTime_VID": Designer.endTime_VID,                        # End Time
+        "cycleTime_VID": Designer.cycleTime_VID,                    # Cycle Time
+        "holdupTime_VID": Designer.holdupTime_VID,                  # Holdup Time
+        "totalTimePerBatch_VID": Designer.totalTimePerBatch_VID,    # Total Time per Batch (all cycles)
+        "isBatchMode_VID": Designer.isBatchMode_VID,                # Is Batch Mode?
+        "equipmentName_VID": Designer.equipmentName_VID,            # Equipment Name
+        "sizeUtilization_VID": Designer.sizeUtilization_VID,        # Size Utilization
+        "maxFillRatio_VID": Designer.maxFillRatio_VID,              # Maximum Fill Ratio
+        "timeUtilization_VID": Designer.timeUtilization_VID,        # Time Utilization
+        "description_VID": Designer.description_VID,                # Description
+        "comments_VID": Designer.comments_VID                       # Comments
+    }
+    tables["equipment_vars"] = {
+        "noUnits_VID": Designer.noUnits_VID,  # Number of Units
+        "noHostedProcedures_VID": Designer.noHostedProcedures_VID,  # Number of Procedures hosted by this equipment
+        "isDesignMode_VID": Designer.isDesignMode_VID,  # Is Equipment In Design Mode?
+        "noStaggeredEquip_VID": Designer.noStaggeredEquip_VID,  # Number of Staggered Equipment Sets
+        "equipPC_VID": Designer.equipPC_VID,  # Purchase Cost
+        "equipPCEstimateOption_VID": Designer.equipPCEstimateOption_VID,  # Purchase Cost Estimation Option
+        "equipStandByNoUnits_VID": Designer.equipStandByNoUnits_VID,  # Number of Standby Units
+        "equipPCDeprecPortion_VID": Designer.equipPCDeprecPortion_VID,  # PC Portion Already Depreciated
+        "equipConstrMaterial_VID": Designer.equipConstrMaterial_VID,  # Construction Material
+        "equipConstrMaterialF_VID": Designer.equipConstrMaterialF_VID,  # Construction Material Factor
+        "equipInstallCostF_VID": Designer.equipInstallCostF_VID,  # Installation Factor
+        "equipMaintcCostF_VID": Designer.equipMaintcCostF_VID,  # Maintenance Factor
+        "equipUsageRate_VID": Designer.equipUsageRate_VID,  # Usage Rate
+        "equipAvailabilityRate_VID": Designer.equipAvailabilityRate_VID,  # Availability Rate
+        "busyTime_VID": Designer.busyTime_VID,  # Busy Time
+        "occupancyTime_VID": Designer.occupancyTime_VID,  # Occupancy Time
+        "maxFillRatio_VID": Designer.maxFillRatio_VID,  # Maximum Fill Ratio
+        "equipmentName_VID": Designer.equipmentName_VID,  # Equipment Name
+        "description_VID": Designer.description_VID,  # Description
+        "comments_VID": Designer.comments_VID,  # User Comments
+        "size_VID": Designer.size_VID,  # Equipment Size
+        "sizeUnits_VID": Designer.sizeUnits_VID,  # Equipment Size Units
+        "sizeName_VID": Designer.sizeName_VID,  # Sizing Description
+        "typeName_VID": Designer.typeName_VID,  # Equipment Type
+        "typeID_VID": Designer.typeID_VID,  # Equipment Type ID
+    }
+    tables["init_vars"] = {
+        "autoInitMode_VID": Designer.autoInitMode_VID,              # Initialization Mode
+        "isSourceFileSame_VID": Designer.isSourceFileSame_VID,      # Is source the same file?
+        "bPartialPath_VID": Designer.bPartialPath_VID,              # Is Path Partial
+        "sourceFileName_VID": Designer.sourceFileName_VID,          # Source File Name
+        "sourceStreamName_VID": Designer.sourceStreamName_VID,      # Source Stream/Equipment Name
+        "bInitTotalMassFlow_VID": Designer.bInitTotalMassFlow_VID,  # Initialize Total Mass Flow
+        "totalFlowFactor_VID": Designer.totalFlowFactor_VID,        # Total Mass Flow Factor
+        "bInitComposition_VID": Designer.bInitComposition_VID,      # Initialize Composition
+        "bInitDensity_VID": Designer.bInitDensity_VID,              # Initialize Density / Thermo Data
+        "bInitTemperature_VID": Designer.bInitTemperature_VID,      # Initialize Temperature
+        "bInitPressure_VID": Designer.bInitPressure_VID,            # Initialize Pressure
+        "bInitEntityData_VID": Designer.bInitEntityData_VID,        # Initialize Discrete Entity Data
+        "solveAutoInitMode_VID": Designer.solveAutoInitMode_VID     # Before solving M&E balances auto initialization Mode
+    }
+    tables["throughput_vars"] = {
+        "scaleUpFactor_VID": Designer.scaleUpFactor_VID  # Scale Up / Down Factor of ScaleUpThroughput
+    }
+
+    tables["operation_vars"] = {
+        "startTime_VID": Designer.startTime_VID,      # Operation Start Time
+        "endTime_VID": Designer.endTime_VID,          # Operation End Time
+        "setUpTime_VID": Designer.setUpTime_VID,      # Operation Set Up Time
+        "processTime_VID": Designer.processTime_VID,  # Operation Process Time
+        "holdupTime_VID": Designer.holdupTime_VID,    # Operation Holdup Time
+        "turnaroundTime_VID": Designer.turnaroundTime_VID,  # Operation Turnaround Time
+        "processTimeCalcMode_VID": Designer.processTimeCalcMode_VID,  # Process Time Calculation Mode
+        "timeShift_VID": Designer.timeShift_VID,      # Operation Start Time Shift
+        "thermalMode_VID": Designer.thermalMode_VID,  # Thermal Mode
+        "exitTemperature_VID": Designer.exitTemperature_VID,  # Exit Temperature
+        "heatingDuty_VID": Designer.heatingDuty_VID,  # Heating Duty
+        "coolingDuty_VID": Designer.coolingDuty_VID,  # Cooling Duty
+        "primaryHxAgentName_VID": Designer.primaryHxAgentName_VID,  # Primary Heat Transfer Agent Name
+        "primaryHxAgentRate_VID": Designer.primaryHxAgentRate_VID,  # Primary Heat Transfer Agent Rate
+        "primaryHxAgentDuty_VID": Designer.primaryHxAgentDuty_VID,  # Primary Heat Transfer Agent Duty
+        "isPrimaryHxAgentHeating_VID": Designer.isPrimaryHxAgentHeating_VID,  # Is Primary Heat Transfer Agent Heating or Cooling?
+        "powerCalcMode_VID": Designer.powerCalcMode_VID,  # Power Calculation Mode
+        "power_VID": Designer.power_VID,              # Power
+        "specPower_VID": Designer.specPower_VID,      # Specific Power
+        "powerPerUnit_VID": Designer.powerPerUnit_VID,  # Power per Unit
+        "powerDissipationFrac_VID": Designer.powerDissipationFrac_VID,  # Power Dissipation to Heat
+        "opType_VID": Designer.opType_VID,            # Operation Type
+        "opDescr_VID": Designer.opDescr_VID,          # Operation Description
+        "isOpDescrSetByUser_VID": Designer.isOpDescrSetByUser_VID,  # Is Operation Description Set By User
+        "auxEquipName_VID": Designer.auxEquipName_VID,  # Auxiliary Equipment Name used by Operation
+        "comments_VID": Designer.comments_VID,        # User Comments
+        "laborNeed_VID": Designer.laborNeed_VID,      # Labor Need
+        "laborUnits_VID": Designer.laborUnits_VID,    # Labor Units
+        "bIsVentOn_VID": Designer.bIsVentOn_VID,      # Is Vent On
+        "emissionsFracs_VID": Designer.emissionsFracs_VID  # Emission Fractions
+    }
+
+    tables["operations"] = {
+        "generic_wash":{
+            "operatingOption_VID": Designer.operatingOption_VID,    # Operating Option
+            "volumeSpecOption_VID": Designer.volumeSpecOption_VID,  # Volume Specification Option
+            "massBefore_VID": Designer.massBefore_VID,              # Contained Amount Before
+            "removalFrac_VID": Designer.removalFrac_VID,            # Loss Fraction
+            "massAfter_VID": Designer.massAfter_VID,                # Contained Amount After
+            "washVolFlow_VID": Designer.washVolFlow_VID,            # Wash Volumetric Flowrate
+            "washLossFrac_VID": Designer.washLossFrac_VID           # Wash Loss Fraction
+        },
+        "component_splitter":{
+            "componentSplits_VID": Designer.componentSplits_VID,  # Component splits
+            "bIsSplitToTopStream_VID": Designer.bIsSplitToTopStream_VID,  # Is splitting to top stream
+            "bIsComponentSplit_VID": Designer.bIsComponentSplit_VID,  # Is component fraction split or flow split
+            "componentFlow_VID": Designer.componentFlow_VID,  # Component Flow
+        },
+        "material_wash":{
+            "flowrateOption_VID": Designer.flowrateOption_VID,   # Volume spec type
+            "componentSplits_VID": Designer.componentSplits_VID, # Component fraction
+            "washVolume_VID": Designer.washVolume_VID,           # Wash-in volume amount
+            "relativeWashVolume_VID": Designer.relativeWashVolume_VID, # Relative wash-in volume amount
+            "conversion_VID": Designer.conversion_VID,           # Equilibrium approach [0,1]
+            "throughput_VID": Designer.throughput_VID,           # Throughput
+            "temperature_VID": Designer.temperature_VID,         # Product stream temperature
+            "isConversionSetByUser_VID": Designer.isConversionSetByUser_VID, # Is approach to equilibrium set by user?
+            "bIgnoreEB_VID": Designer.bIgnoreEB_VID,             # Ignore energy balance?
+            "retainedWashFrac_VID": Designer.retainedWashFrac_VID # Fraction of wash retained by the product
         }
+    }
+    return tables
 
-        self.operation_vars:dict[str,int] = {
-            "startTime_VID": Designer.startTime_VID,      # Operation Start Time
-            "endTime_VID": Designer.endTime_VID,          # Operation End Time
-            "setUpTime_VID": Designer.setUpTime_VID,      # Operation Set Up Time
-            "processTime_VID": Designer.processTime_VID,  # Operation Process Time
-            "holdupTime_VID": Designer.holdupTime_VID,    # Operation Holdup Time
-            "turnaroundTime_VID": Designer.turnaroundTime_VID,  # Operation Turnaround Time
-            "processTimeCalcMode_VID": Designer.processTimeCalcMode_VID,  # Process Time Calculation Mode
-            "timeShift_VID": Designer.timeShift_VID,      # Operation Start Time Shift
-            "thermalMode_VID": Designer.thermalMode_VID,  # Thermal Mode
-            "exitTemperature_VID": Designer.exitTemperature_VID,  # Exit Temperature
-            "heatingDuty_VID": Designer.heatingDuty_VID,  # Heating Duty
-            "coolingDuty_VID": Designer.coolingDuty_VID,  # Cooling Duty
-            "primaryHxAgentName_VID": Designer.primaryHxAgentName_VID,  # Primary Heat Transfer Agent Name
-            "primaryHxAgentRate_VID": Designer.primaryHxAgentRate_VID,  # Primary Heat Transfer Agent Rate
-            "primaryHxAgentDuty_VID": Designer.primaryHxAgentDuty_VID,  # Primary Heat Transfer Agent Duty
-            "isPrimaryHxAgentHeating_VID": Designer.isPrimaryHxAgentHeating_VID,  # Is Primary Heat Transfer Agent Heating or Cooling?
-            "powerCalcMode_VID": Designer.powerCalcMode_VID,  # Power Calculation Mode
-            "power_VID": Designer.power_VID,              # Power
-            "specPower_VID": Designer.specPower_VID,      # Specific Power
-            "powerPerUnit_VID": Designer.powerPerUnit_VID,  # Power per Unit
-            "powerDissipationFrac_VID": Designer.powerDissipationFrac_VID,  # Power Dissipation to Heat
-            "opType_VID": Designer.opType_VID,            # Operation Type
-            "opDescr_VID": Designer.opDescr_VID,          # Operation Description
-            "isOpDescrSetByUser_VID": Designer.isOpDescrSetByUser_VID,  # Is Operation Description Set By User
-            "auxEquipName_VID": Designer.auxEquipName_VID,  # Auxiliary Equipment Name used by Operation
-            "comments_VID": Designer.comments_VID,        # User Comments
-            "laborNeed_VID": Designer.laborNeed_VID,      # Labor Need
-            "laborUnits_VID": Designer.laborUnits_VID,    # Labor Units
-            "bIsVentOn_VID": Designer.bIsVentOn_VID,      # Is Vent On
-            "emissionsFracs_VID": Designer.emissionsFracs_VID  # Emission Fractions
-        }
+def LoadVarTables(tlb_path:str=DEFAULT_TLB_PATH, cache_dir:str|None=None, cache_file:str|None=None) -> dict[str,dict]:
+    """
+    Returns the tables of BuildVarTables, read from a cache file in cache_dir keyed by tlb_path and its modification time.
+    On a cache miss the type library is loaded through comtypes and the cache file is (re)written.
+    An explicit cache_file is read as is, without comtypes or the type library, e.g. to use the tables on another machine.
+    """
+    if cache_file is not None: return _read_tables(cache_file)
+    mtime = os.path.getmtime(tlb_path)
+    cache_dir = cache_dir or os.environ.get("SPD_CACHE_DIR") or os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser(os.path.join("~",".cache")),"SuperProDesigner")
+    cache_file = os.path.join(cache_dir,f"vartables-v{_TABLES_VERSION}-{hashlib.sha1(os.path.abspath(tlb_path).encode()).hexdigest()[:16]}.json")
+    try:
+        with open(cache_file,encoding='utf-8') as f: cached = json.load(f)
+        if cached["version"] == _TABLES_VERSION and cached["mtime"] == mtime: return _tables_from_json(cached["tables"])
+    except (OSError,ValueError,KeyError):
+        pass
+    import comtypes.client
+    tables = BuildVarTables(comtypes.client.GetModule(tlb_path))
+    try:
+        os.makedirs(cache_dir,exist_ok=True)
+        with open(cache_file+".tmp",'w',encoding='utf-8') as f: json.dump({"version":_TABLES_VERSION,"tlb_path":tlb_path,"mtime":mtime,"tables":tables},f)
+        os.replace(cache_file+".tmp",cache_file)
+    except OSError:
+        pass  # The cache is only an optimization
+    return tables
+
+def SaveVarTables(tables:dict[str,dict], cache_file:str):
+    """
+    Writes tables to cache_file for LoadVarTables(cache_file=...).
+    """
+    with open(cache_file,'w',encoding='utf-8') as f: json.dump({"version":_TABLES_VERSION,"tables":tables},f)
+
+def _read_tables(cache_file:str) -> dict[str,dict]:
+    with open(cache_file,encoding='utf-8') as f: cached = json.load(f)
+    if cached.get("version") != _TABLES_VERSION: raise ValueError(f"{cache_file} holds tables of version {cached.get('version')}, expected {_TABLES_VERSION}")
+    return _tables_from_json(cached["tables"])
+
+def _tables_from_json(tables:dict) -> dict[str,dict]:
+    # JSON turns the (containerID, listID) pairs into lists
+    tables["enum_vars"] = {cid:{lid:tuple(ids) for lid,ids in lists.items()} for cid,lists in tables["enum_vars"].items()}
+    return tables
+
+class _Variant:
+    __slots__ = ("value",)
+    def __init__(self):
+        self.value = None
+
+class _ByRef:
+    # Like the ctypes byref object, the callee writes through ref._obj.value
+    __slots__ = ("_obj",)
+    def __init__(self,obj):
+        self._obj = obj
+
+def _import_comtypes():
+    global VARIANT, byref
+    if VARIANT is None:
+        try:
+            from comtypes.automation import VARIANT, byref
+        except ImportError:
+            # Without comtypes (e.g. on Linux) only in-process documents such as FakeDesigner.FakeDesignerDocument can be used
+            VARIANT, byref = _Variant, _ByRef
+
+def CoInitialize():
+    """
+    Apartment setup of a thread that makes COM calls, makes it a single threaded apartment when comtypes is available.
+    """
+    try:
+        import comtypes
+    except ImportError:
+        return
+    comtypes.CoInitialize()
 
-        self.operations:dict[str,dict[str,int]] = {
-            "generic_wash":{
-                "operatingOption_VID": Designer.operatingOption_VID,    # Operating Option
-                "volumeSpecOption_VID": Designer.volumeSpecOption_VID,  # Volume Specification Option
-                "massBefore_VID": Designer.massBefore_VID,              # Contained Amount Before
-                "removalFrac_VID": Designer.removalFrac_VID,            # Loss Fraction
-                "massAfter_VID": Designer.massAfter_VID,                # Contained Amount After
-                "washVolFlow_VID": Designer.washVolFlow_VID,            # Wash Volumetric Flowrate
-                "washLossFrac_VID": Designer.washLossFrac_VID           # Wash Loss Fraction
-            },
-            "component_splitter":{
-                "componentSplits_VID": Designer.componentSplits_VID,  # Component splits
-                "bIsSplitToTopStream_VID": Designer.bIsSplitToTopStream_VID,  # Is splitting to top stream
-                "bIsComponentSplit_VID": Designer.bIsComponentSplit_VID,  # Is component fraction split or flow split
-                "componentFlow_VID": Designer.componentFlow_VID,  # Component Flow
-            },
-            "material_wash":{
-                "flowrateOption_VID": Designer.flowrateOption_VID,   # Volume spec type
-                "componentSplits_VID": Designer.componentSplits_VID, # Component fraction
-                "washVolume_VID": Designer.washVolume_VID,           # Wash-in volume amount
-                "relativeWashVolume_VID": Designer.relativeWashVolume_VID, # Relative wash-in volume amount
-                "conversion_VID": Designer.conversion_VID,           # Equilibrium approach [0,1]
-                "throughput_VID": Designer.throughput_VID,           # Throughput
-                "temperature_VID": Designer.temperature_VID,         # Product stream temperature
-                "isConversionSetByUser_VID": Designer.isConversionSetByUser_VID, # Is approach to equilibrium set by user?
-                "bIgnoreEB_VID": Designer.bIgnoreEB_VID,             # Ignore energy balance?
-                "retainedWashFrac_VID": Designer.retainedWashFrac_VID # Fraction of wash retained by the product
-            }
-        }
+class SuperProDesigner:
+    def __init__(self,tlb_path = DEFAULT_TLB_PATH, app=None, tables:dict[str,dict]|None=None, cache_dir:str|None=None):
+        """
+        Starts SuperPro Designer through its COM server, or wraps app when given.
+        The variable tables are read with LoadVarTables (from the on-disk cache when possible) unless tables is given.
+        Starting the COM server still loads the type library through GetModule, for the Application class to create; wrapping app with tables needs neither comtypes nor the type library.
+        """
+        self.tlb_path = tlb_path
+        self._Designer = None
+        if tables is None: tables = LoadVarTables(tlb_path,cache_dir)
+
+        self.enum_vars:dict[str,dict[str,tuple[int,int]]] = tables["enum_vars"]  # Enumerators
+        self.stream_vars:dict[str,int] = tables["stream_vars"]  # Variables relevant to input streams
+        self.procedure_vars:dict[str,int] = tables["procedure_vars"]
+        self.equipment_vars:dict[str,int] = tables["equipment_vars"]
+        self.init_vars:dict[str,int] = tables["init_vars"]
+        self.throughput_vars:dict[str,int] = tables["throughput_vars"]
+        self.operation_vars:dict[str,int] = tables["operation_vars"]
+        self.operations:dict[str,dict[str,int]] = tables["operations"]
+        self._var_classes:dict[tuple[str,int],str]|None = None
+
+        if app is None:
+            import comtypes.client
+            app = comtypes.client.CreateObject(self.Designer.Application)
+        self.app = app
+
+    @property
+    def tables(self) -> dict[str,dict]:
+        """
+        The variable tables, as taken by the tables argument (e.g. to wrap another application object without loading them again).
+        """
+        return {"enum_vars":self.enum_vars,"stream_vars":self.stream_vars,"procedure_vars":self.procedure_vars,"equipment_vars":self.equipment_vars,
+                "init_vars":self.init_vars,"throughput_vars":self.throughput_vars,"operation_vars":self.operation_vars,"operations":self.operations}
 
+    @property
+    def Designer(self):
+        """
+        The comtypes module generated from the type library, loaded on first use.
+        """
+        if self._Designer is None:
+            import comtypes.client
+            self._Designer = comtypes.client.GetModule(self.tlb_path)
+        return self._Designer
+
+    def VarID(self, kind:str, key:str) -> int:
+        """
+        Resolves a variable key such as "massFlow_VID" to its VarID for the object kind "stream", "procedure", "equipment" or "operation".
+        Operation keys are looked up in operation_vars and then in the operation type tables of operations.
+        """
+        if kind == "stream": return self.stream_vars[key]
+        if kind == "procedure": return self.procedure_vars[key]
+        if kind == "equipment": return self.equipment_vars[key]
+        if kind == "operation":
+            if key in self.operation_vars: return self.operation_vars[key]
+            for operation_vars in self.operations.values():
+                if key in operation_vars: return operation_vars[key]
+        raise KeyError(f"Unknown {kind} variable {key}")
 
+    def VarClass(self, kind:str, VarID:int) -> str:
+        """
+        What writing VarID of a kind object leaves to recalculate: "simulation" (M&E balances and economics), "economics" or "cosmetic" (nothing), see ECONOMIC_VARS and COSMETIC_VARS.
+        """
+        if self._var_classes is None:
+            self._var_classes = {}
+            for cls,table in (("economics",ECONOMIC_VARS),("cosmetic",COSMETIC_VARS)):
+                for k,keys in table.items():
+                    for key in keys:
+                        try:
+                            self._var_classes[(k,self.VarID(k,key))] = cls
+                        except KeyError:
+                            pass
+        return self._var_classes.get((kind,VarID),"simulation")
 
     #Application Related Methods:
     """
@@ -242,28 +448,41 @@ class SuperProDesigner:
         OpenDoc(fileName As String) This function is used to open the Pro-Designer file with name fileName, makes this file the active Document object, and returns a reference to the caller.
         """
         self.doc = self.app.OpenDoc(fileName)
-        return SuperProDesignerDocument(self,self.doc)
+        return SuperProDesignerDocument(self,self.doc,fileName)
 
     def SetActiveDoc(self,fileName:str):
         """
         SetActiveDoc(fileName As String) This function is used to activate the Pro-Designer file with name fileName and also returns a reference to this file as a Document object.
         """
-        raise NotImplementedError()
         self.doc = self.app.SetActiveDoc(fileName)
-        print(self.doc)
-        return SuperProDesignerDocument(self,self.doc)
+        return SuperProDesignerDocument(self,self.doc,fileName)
 
     def CloseAllDocs(self,bSaveIfNeeded:bool):
         """
         CloseAllDocs(bSaveIfNeeded As Boolean) This subroutine is used to close all open Pro-Designer file (Document objects) Use bSaveIfNeeded = True for saving the Designer case files and bSaveIfNeeded = False for just closing the documents.
         """
-        raise NotImplementedError()
         return self.app.CloseAllDocs(bSaveIfNeeded)
 
 class SuperProDesignerDocument():
-    def __init__(self,app:SuperProDesigner,doc):
+    def __init__(self,app:SuperProDesigner,doc,fileName:str|None=None):
+        _import_comtypes()
         self.app = app
         self.doc = doc
+        self.fileName = fileName
+        self._transaction:Transaction|None = None
+        self._known:dict[tuple,object] = {}  # Values written since the last solve, keyed by (kind, name, VarID, compLocalName)
+        self.cache:ValueCache|None = None
+        self._flowsheet:Flowsheet|None = None
+        self._enum_memo:dict[tuple,tuple[str,...]] = {}
+        self._applied:dict[tuple,object] = {}  # Every input change since the document was opened, in order, last write wins
+        self._schedules:dict[tuple,object] = {}
+        self._undo:dict[tuple,object]|None = None  # Value of every variable before its first write since StartUndoLog
+        self._undoable = True
+        self.throughputFactor = 1.0  # Product of the ScaleUpThroughput factors applied since the document was opened
+        self._scalings = itertools.count()  # Numbers the ScaleUpThroughput entries of _applied, which must stay distinct however the log shrinks
+        self._dirty = {"simulation","economics"}  # What has to be recalculated, everything until the document is solved once
+        self.solveStats:Counter[str] = Counter()
+        self.solveCache = None
     #Document Related Methods:
     """
     These methods are used for performing generic document tasks on specific Pro-Designer case files.
@@ -294,45 +513,143 @@ class SuperProDesignerDocument():
         """
         DoMEBalances(val) This function is equivalent to clicking on the Solve button or to selecting Tasks / Do M&E Balances from the Pro-Designer application main menu. The value of variable (val) is currently of no importance. 
         """
-        return self.doc.DoMEBalances(byref(VARIANT()))
+        if self._transaction is not None: self._transaction.Flush()
+        self._invalidate()
+        self.solveStats["meBalances"] += 1
+        ok = self.doc.DoMEBalances(byref(VARIANT()))
+        if ok:
+            self._dirty.discard("simulation")
+            self._dirty.add("economics")
+        return ok
 
     def DoEconomicCalculations(self):
         """
         DoEconomicCalculations( ) This function is equivalent to selecting Tasks / Perform Economic Calculations from the Pro-Designer application main menu. 
         """
-        return self.doc.DoEconomicCalculations()
-    def ScaleUpThroughput(self):
-        raise NotImplementedError()
+        self._invalidate()
+        self.solveStats["economics"] += 1
+        ok = self.doc.DoEconomicCalculations()
+        if ok: self._dirty.discard("economics")
+        return ok
+
+    def ensure_solved(self) -> bool:
         """
-        ScaleUpThroughput(VarID As VarID, val) This function is used for scaling the process throughput (It is equivalent to selecting Tasks / Adjust Process Throughput from the Pro-Designer application main menu and selecting the Based on Scale Up / Down Factor option). Use VarID = scaleUpFactor_VID and the value of the scale up factor for val (val is a Variant, it’s type should be double and its value should be greater than zero). 
+        DoMEBalances unless no write through this document since the last successful one changes the balances (see SuperProDesigner.VarClass). Returns True when the balances are solved.
+        Changes made outside this document (e.g. in the SPD user interface) are not seen, call DoMEBalances after those.
+        """
+        if self._transaction is not None: self._transaction.Flush()
+        if "simulation" not in self._dirty:
+            self.solveStats["meBalancesSkipped"] += 1
+            return True
+        return self.DoMEBalances()
+
+    def ensure_economics(self) -> bool:
         """
-        return self.doc.ScaleUpThroughput()
+        ensure_solved, then DoEconomicCalculations unless nothing affecting the economics changed since the last successful one.
+        """
+        if not self.ensure_solved(): return False
+        if "economics" not in self._dirty:
+            self.solveStats["economicsSkipped"] += 1
+            return True
+        return self.DoEconomicCalculations()
+
+    @property
+    def dirty(self) -> frozenset[str]:
+        """
+        What ensure_solved / ensure_economics would recalculate: "simulation" and / or "economics".
+        """
+        dirty = set(self._dirty)
+        if self._transaction is not None:
+            for kind,_,VarID,_ in self._transaction.pending: _touch(dirty,self.app.VarClass(kind,VarID))
+        return frozenset(dirty)
 
+    def ScaleUpThroughput(self, factor:float):
+        """
+        ScaleUpThroughput(VarID As VarID, val) This function is used for scaling the process throughput (It is equivalent to selecting Tasks / Adjust Process Throughput from the Pro-Designer application main menu and selecting the Based on Scale Up / Down Factor option). Use VarID = scaleUpFactor_VID and the value of the scale up factor for val (val is a Variant, it’s type should be double and its value should be greater than zero). 
+        """
+        if self._transaction is not None: self._transaction.Flush()
+        ok = self.doc.ScaleUpThroughput(self.app.throughput_vars["scaleUpFactor_VID"],float(factor))
+        self._invalidate()
+        if not ok: return False
+        self._undoable = False
+        _touch(self._dirty,"simulation")
+        self.throughputFactor *= factor
+        # Scalings compound and apply to the flows written before them, so each one is logged as a separate entry
+        self._log(("scaleUpThroughput",next(self._scalings)),float(factor))
+        return True
+
+    def throughput_curve(self, factors, outputs:list|None=None, economics:bool=True, runner=None, restore:bool=True) -> np.ndarray:
+        """
+        Solves the case at every throughput factor (relative to the throughput before any ScaleUpThroughput, see throughputFactor) and returns the values of the output addresses
+        as an array with a row per factor, NaN where a solve failed or an output is not a number.
+        The factors are run in increasing order, each solve starting from the solution of the previous one, and the document is scaled back afterwards (throughputFactor and the applied writes as they were) unless restore is False.
+        With runner, a ScenarioRunner made with task=ScenarioRunner.RunThroughput, the factors are spread over its workers instead and its outputs are read.
+        """
+        factors = np.asarray(factors,dtype=np.float64)
+        if runner is not None:
+            from ScenarioRunner import THROUGHPUT, RunThroughput
+            if runner.task is not RunThroughput: raise ValueError("The runner must be made with task=RunThroughput")
+            curve = np.full((len(factors),len(runner.outputs)),np.nan)
+            for result in runner.run([{THROUGHPUT:float(factor)} for factor in factors]):
+                if result.ok: curve[result.index] = Numbers(result.outputs)
+            return curve
+        if outputs is None: raise ValueError("Give the output addresses to read, or a runner")
+        curve = np.full((len(factors),len(outputs)),np.nan)
+        base = self.throughputFactor
+        before = set(self._applied)
+        try:
+            for i in np.argsort(factors,kind="stable").tolist():
+                if not math.isclose(factors[i],self.throughputFactor) and not self.ScaleUpThroughput(factors[i]/self.throughputFactor):
+                    raise RuntimeError(f"ScaleUpThroughput to {factors[i]} failed: {self.GetCOMErrorMsg()}")
+                try:
+                    curve[i] = Numbers(self.Solve(outputs,economics))
+                except RuntimeError:
+                    pass
+        finally:
+            if restore:
+                if not math.isclose(self.throughputFactor,base) and not self.ScaleUpThroughput(base/self.throughputFactor):
+                    raise RuntimeError(f"ScaleUpThroughput back to {base} failed: {self.GetCOMErrorMsg()}")
+                # Back at the original throughput: the scalings of the curve cancel out, so neither they nor the rounding of their product are kept
+                self.throughputFactor = base
+                for entry in [entry for entry in self._applied if entry[0] == "scaleUpThroughput" and entry not in before]: del self._applied[entry]
+        return curve
 
     # Functions for Process (Flowsheet) Variables
     def RenameProcedure(self,oldName:str, newName:str):
         """
         RenameProcedure(oldName As String, newName As String)
         """
-        return self.doc.RenameProcedure(oldName, newName)
+        if not self.doc.RenameProcedure(oldName, newName): return False
+        self._renamed("procedure",oldName,newName)
+        self._log(("rename","procedure",oldName,newName),True)
+        return True
 
     def RenameOperation(self, procedureName:str, oldName:str, newName:str):
         """
         RenameOperation(procedureName As String, oldName As String, newName As String)
         """
-        return self.doc.RenameOperation(procedureName, oldName, newName)
+        if not self.doc.RenameOperation(procedureName, oldName, newName): return False
+        self._renamed("operation",(procedureName,oldName),(procedureName,newName))
+        self._log(("rename","operation",(procedureName,oldName),(procedureName,newName)),True)
+        return True
 
     def RenameStream(self,oldName:str, newName:str):
         """
         RenameStream(oldName As String, newName As String)
         """
-        return self.doc.RenameStream(oldName, newName)
+        if not self.doc.RenameStream(oldName, newName): return False
+        self._renamed("stream",oldName,newName)
+        self._log(("rename","stream",oldName,newName),True)
+        return True
 
     def RenameEquipment(self,oldName:str, newName:str):
         """
         RenameEquipment(oldName As String, newName As String)
         """
-        return self.doc.RenameEquipment(oldName, newName)
+        if not self.doc.RenameEquipment(oldName, newName): return False
+        self._renamed("equipment",oldName,newName)
+        self._log(("rename","equipment",oldName,newName),True)
+        return True
 
     # Functions for Section Variables
     # Functions for Procedure Variables
@@ -340,37 +657,31 @@ class SuperProDesignerDocument():
         """
         GetUPVarVal(procName As String, VarID As VarID, val)
         """
-        out_var = VARIANT()
-        if not self.doc.GetUPVarVal(procName,VarID,byref(out_var)): return False
-        assert isinstance(out_var.value,(float,bool,str)),type(out_var.value)
-        return out_var.value
+        return self._get(("procedure",procName,VarID,''))
 
-    def GetUPVarVal2(self):
+    def GetUPVarVal2(self, procName:str, VarID:int, val2):
         """
         GetUPVarVal2(procName As String, VarID As VarID, val, val2)
         """
-        raise NotImplementedError()
-        return self.doc.GetUPVarVal2()
+        return self._get(("procedure",procName,VarID,val2))
 
     def SetUPVarVal(self, procName:str, VarID:int, val):
         """
         SetUPVarVal(procName As String, VarID As VarID, val)
         """
-        return self.doc.SetUPVarVal(procName,VarID,val)
+        return self._set(("procedure",procName,VarID,''),val)
 
-    def SetUPVarVal2(self):
+    def SetUPVarVal2(self, procName:str, VarID:int, val, val2):
         """
         SetUPVarVal2(procName As String, VarID As VarID, val, val2)
         """
-        raise NotImplementedError()
-        return self.doc.SetUPVarVal2()
+        return self._set(("procedure",procName,VarID,val2),val)
 
-    def GetUPEmptiedContentsVarVal(self):
+    def GetUPEmptiedContentsVarVal(self, procName:str, VarID:int, val2):
         """
         GetUPEmptiedContentsVarVal(procName As String, VarID As VarID, val, val2)
         """
-        raise NotImplementedError()
-        return self.doc.GetUPEmptiedContentsVarVal()
+        return self._get(("procedure",procName,VarID,(EMPTIED_CONTENTS,val2)))
 
 
     # Functions for Equipment Variables
@@ -378,39 +689,33 @@ class SuperProDesignerDocument():
         """
         GetEquipVarVal(equipName As String, VarID As VarID, val) 
         """
-        out_var = VARIANT()
-        if not self.doc.GetEquipVarVal(equipName,VarID,byref(out_var)): return False
-        assert isinstance(out_var.value,(float,bool,str)),type(out_var.value)
-        return out_var.value
+        return self._get(("equipment",equipName,VarID,''))
 
-    def GetEquipVarVal3(self):
+    def GetEquipVarVal3(self, equipName:str, VarID:int, val2, val3):
         """
         GetEquipVarVal3(equipName As String, VarID As VarID, val, val2, val3)
         """
-        raise NotImplementedError()
-        return self.doc.GetEquipVarVal3()
+        return self._get(("equipment",equipName,VarID,(val2,val3)))
 
     def SetEquipVarVal(self,equipName:str,VarID:int,val):
         """
         SetEquipVarVal(equipName As String, VarID As VarID, val)
         """
-        return self.doc.SetEquipVarVal(equipName,VarID,val)
+        return self._set(("equipment",equipName,VarID,''),val)
 
-    def SetEquipVarVal3(self):
+    def SetEquipVarVal3(self, equipName:str, VarID:int, val, val2, val3):
         """
         SetEquipVarVal3(equipName As String, VarID As VarID, val, val2, val3)
         """
-        raise NotImplementedError()
-        return self.doc.SetEquipVarVal3()
+        return self._set(("equipment",equipName,VarID,(val2,val3)),val)
 
-    def GetOperVarVal(self):
+    def GetOperVarVal(self, procName:str, operName:str, VarID:int, val2=None, val3=None):
         """
         GetOperVarVal(procName As String, operName As String, VarID As VarID, val)
+        GetOperVarVal2(procName As String, operName As String, VarID As VarID, val, val2)
+        GetOperVarVal3(procName As String, operName As String, VarID As VarID, val, val2, val3)
         """
-        #GetOperVarVal2(procName As String, operName As String, VarID As VarID, val, val2)
-        #GetOperVarVal3(procName As String, operName As String, VarID As VarID, val, val2, val3) 
-        raise NotImplementedError
-        return self.doc.GetOperVarVal()
+        return self._get(("operation",(procName,operName),VarID,_qualifier(val2,val3)))
 
     def SetOperVarVal(self, procName:str, operName:str, VarID:int, val, val2=None, val3=None):
         """
@@ -418,10 +723,8 @@ class SuperProDesignerDocument():
         SetOperVarVal2(procName As String, operName As String, VarID As VarID, val, val2)
         SetOperVarVal3(procName As String, operName As String, VarID As VarID, val, val2, val3)
         """
-        if val3 != None:return self.doc.SetOperVarVal3(procName, operName, VarID, val, val2, val3)
-        if val2 != None:return self.doc.SetOperVarVal2(procName, operName, VarID, val, val2)
-        if val != None:return self.doc.SetOperVarVal(procName, operName, VarID, val)
-        return False
+        if val == None:return False
+        return self._set(("operation",(procName,operName),VarID,_qualifier(val2,val3)),val)
 
 
     # Functions for Stream Variables
@@ -433,10 +736,7 @@ class SuperProDesignerDocument():
         GetStreamVarVal(streamName As String, VarID As VarID, val, compLocalName As String) can be used to retrieve the value of input/output variables related to the specific stream
         VarID - Example "Designer.massFlow_VID"
         """
-        out_var = VARIANT()
-        if not self.doc.GetStreamVarVal(streamName, VarID, byref(out_var), compLocalName): return False
-        assert isinstance(out_var.value,(float,bool)),type(out_var.value)
-        return out_var.value
+        return self._get(("stream",streamName,VarID,compLocalName))
 
     def SetStreamVarVal(self, streamName:str, VarID:int, val:float|int, compLocalName:str='') -> bool:
         """
@@ -444,20 +744,38 @@ class SuperProDesignerDocument():
         VarID - Example "Designer.massFlow_VID"
         """
         assert isinstance(val,(float,int))
-        return self.doc.SetStreamVarVal(streamName, VarID, float(val), compLocalName)
+        return self._set(("stream",streamName,VarID,compLocalName),float(val))
 
     def AddIngredientToInputStream(self, streamName:str, ingredientName:str, VarID:int, val:float):
         """
         AddIngredientToInputStream(streamName As String, ingredientName As String, VarID As VarID, val) can be used to add pure components and/or stock mixtures as well as the ingredient’s mass/mole flow or mass fraction to an input stream. The variable IDs that can be used with this function are: componentMassFlow_VID, componentMoleFlow_VID or compMassFrac_VID.
         """
-        return self.doc.AddIngredientToInputStream(streamName, ingredientName, VarID, val)
+        self._ingredients_changed(streamName)
+        if not self.doc.AddIngredientToInputStream(streamName, ingredientName, VarID, val): return False
+        self._applied.pop(("removeIngredient",streamName,ingredientName),None)
+        self._log(("ingredient",streamName,VarID,ingredientName),val)
+        return True
 
     def RemoveIngredientFromInputStream(self,streamName:str,ingredientName:str):
         """
         RemoveIngredientFromInputStream(streamName As String, ingredientName As String) can be used to remove an ingredient from an input stream.
         """
-        raise NotImplementedError()
-        return self.doc.RemoveIngredientFromInputStream(streamName,ingredientName)
+        self._ingredients_changed(streamName)
+        if not self.doc.RemoveIngredientFromInputStream(streamName,ingredientName): return False
+        for entry in [entry for entry in self._applied if entry[0] == "ingredient" and entry[1] == streamName and entry[3] == ingredientName]: del self._applied[entry]
+        self._log(("removeIngredient",streamName,ingredientName),True)
+        return True
+
+    def _ingredients_changed(self, streamName:str):
+        # Ingredient changes are not buffered, so buffered writes go first to keep their order
+        if self._transaction is not None: self._transaction.Flush()
+        # Every component value of the stream may change, as may its ingredient lists
+        self._undoable = False
+        _touch(self._dirty,"simulation")
+        if self.cache is not None: self.cache.DropObject("stream",streamName)
+        self._known = {key:val for key,val in self._known.items() if key[:2] != ("stream",streamName)}
+        self._enum_memo.clear()
+        if self._flowsheet is not None: self._flowsheet._dirty.update(key for key in self._flowsheet._lists if key[0] == "stream_CID" and key[2] == streamName)
 
     def IsInputStreamCompositionValid(self,streamName:str):
         """
@@ -465,6 +783,62 @@ class SuperProDesignerDocument():
         """
         return self.doc.IsInputStreamCompositionValid(streamName)
 
+    def set_compositions(self, compositions:dict, normalize:bool=True, validate:bool=True, rtol:float=1e-9) -> dict:
+        """
+        Sets the ingredients of many input streams, compositions being {streamName: {ingredientName: (vid_key, value)}} with vid_key "compMassFrac_VID", "componentMassFlow_VID" or "componentMoleFlow_VID" (one of them per stream).
+        The current ingredients (pure components and stock mixtures) and their values are read in one pass and only the differences are sent: ingredients left out of a stream's recipe are removed, new or changed ones are added.
+        Mass fractions are scaled to sum to 1 first unless normalize is False.
+        With validate every changed stream is then checked with IsInputStreamCompositionValid, a RuntimeError listing the invalid ones.
+        Returns the number of "removed", "added" and "unchanged" ingredients.
+        """
+        fraction = "compMassFrac_VID"
+        targets = {}
+        for streamName,recipe in compositions.items():
+            keys = {key for key,_ in recipe.values()}
+            if len(keys) > 1: raise ValueError(f"The recipe of {streamName} mixes {sorted(keys)}")
+            key = keys.pop() if keys else fraction
+            values = np.array([float(val) for _,val in recipe.values()])
+            if normalize and key == fraction and len(values):
+                total = values.sum()
+                if not total > 0: raise ValueError(f"The mass fractions of {streamName} sum to {total}")
+                values = values/total
+            targets[streamName] = (key,dict(zip(recipe,values.tolist())))
+
+        lists = self.EnumerateMany([(f"stream_CID.{lid}",streamName) for streamName in targets for lid in ("pureComp_LID","stockMix_LID")])
+        ingredients = {streamName:lists[("stream_CID.pureComp_LID",streamName)]+lists[("stream_CID.stockMix_LID",streamName)] for streamName in targets}
+        current = {streamName:{} for streamName in targets}
+        for key in {key for key,_ in targets.values()}:
+            streams = [streamName for streamName,(k,_) in targets.items() if k == key]
+            names = sorted({name for streamName in streams for name in ingredients[streamName]})
+            if not names: continue
+            # Pure components and stock mixtures are both read by name, a value that cannot be read (NaN) is sent again
+            table = self.Snapshot(streams=streams,stream_vars=[key],components=names)["stream"][key]
+            for i,streamName in enumerate(streams):
+                present = set(ingredients[streamName])
+                current[streamName] = {name:table[i,j] for j,name in enumerate(names) if name in present}
+
+        counts = {"removed":0,"added":0,"unchanged":0}
+        changed = []
+        for streamName,(key,recipe) in targets.items():
+            remove = [name for name in ingredients[streamName] if name not in recipe]
+            old = current[streamName]
+            # Removing an ingredient rescales the remaining mass fractions, which then all have to be sent again
+            add = [(name,val) for name,val in recipe.items() if (key == fraction and remove) or name not in old or not math.isclose(old[name],val,rel_tol=rtol,abs_tol=1e-15)]
+            counts["unchanged"] += len(recipe)-len(add)
+            if not remove and not add: continue
+            changed.append(streamName)
+            VarID = self.app.stream_vars[key]
+            for name in remove:
+                if not self.RemoveIngredientFromInputStream(streamName,name): raise RuntimeError(f"Failed to remove {name} from {streamName}: {self.GetCOMErrorMsg()}")
+                counts["removed"] += 1
+            for name,val in add:
+                if not self.AddIngredientToInputStream(streamName,name,VarID,val): raise RuntimeError(f"Failed to add {name} to {streamName}: {self.GetCOMErrorMsg()}")
+                counts["added"] += 1
+        if validate:
+            invalid = [streamName for streamName in changed if not self.IsInputStreamCompositionValid(streamName)]
+            if invalid: raise RuntimeError(f"Invalid compositions of {invalid}: {self.GetCOMErrorMsg()}")
+        return counts
+
 
     # Functions for Ingredient Variables
     # Functions for Heat Transfer Agent Variables
@@ -485,12 +859,16 @@ class SuperProDesignerDocument():
         """
         SetStreamAutoInitOptions(streamName As String, varID As VarID, val) With this function you may set all relevant setting that appear in the Input Stream Initialization Options Dialog. The streamName is the name of the stream <stream1> you wish to auto initialize by another stream <stream2> which you may also set in this function through the VARIANT val argument. For a list of the Variable ID’s that can be used with this function, see Auto Initialization Variables.
         """
+        self._undoable = False
+        _touch(self._dirty,"simulation")
         return self.doc.SetStreamAutoInitOptions(streamName,varID,val)
 
     def AutoInitStream(self,streamName:str):
         """
         AutoInitStream(streamName As String) This function is used to Automatically initialize the contents of the stream when the Auto-Initialize from Other Stream option has been checked, in the Input Stream Initialization Options Dialog.
         """
+        self._undoable = False
+        _touch(self._dirty,"simulation")
         return self.doc.AutoInitStream(streamName)
 
     def AutoInitAllStreamsAndEquipContents(self):
@@ -514,25 +892,549 @@ class SuperProDesignerDocument():
         """
         IsCOMSimDataComplete() This function returns  True if the data exchange using the COM functions was consistent. If the function returns False it means that some data that you have set using the COM functions is inconsistent and that you cannot proceed with the simulation. In this case you can use the GetCOMErrorMsg(val) to find out what went wrong.
         """
-        raise NotImplementedError()
         return self.doc.IsCOMSimDataComplete()
 
+    # Variable access
+    """
+    All Get*VarVal / Set*VarVal calls go through _get / _set with a key (kind, name, VarID, qualifier),
+    kind being "stream", "procedure", "equipment" or "operation" (name is then (procName, operName)).
+    The qualifier is '' for the plain calls, the compLocalName for streams, val2 for the *2 calls, (val2, val3) for the *3 calls
+    and (EMPTIED_CONTENTS, val2) for GetUPEmptiedContentsVarVal.
+    """
+    def _get(self, key:tuple):
+        val = self._lookup(key)
+        return False if val is _MISSING else val
+
+    def _lookup(self, key:tuple):
+        if self._transaction is not None:
+            val = self._transaction.pending.get(key,_MISSING)
+            if val is not _MISSING: return val
+        cache = self.cache
+        if cache is not None:
+            val = cache.Get(key)
+            if val is not _MISSING: return val
+        val = self._read(key)
+        if cache is not None and val is not _MISSING: cache.Put(key,val)
+        return val
+
+    def _set(self, key:tuple, val) -> bool:
+        if self._transaction is not None: return self._transaction.Set(key,val)
+        return self._write(key,val)
+
+    def _read(self, key:tuple):
+        kind,name,VarID,comp = key
+        out_var = VARIANT()
+        if kind == "stream":
+            if not self.doc.GetStreamVarVal(name, VarID, byref(out_var), comp): return _MISSING
+            assert isinstance(out_var.value,(float,bool)),type(out_var.value)
+        elif kind == "procedure":
+            if comp == '': ok = self.doc.GetUPVarVal(name,VarID,byref(out_var))
+            elif isinstance(comp,tuple): ok = self.doc.GetUPEmptiedContentsVarVal(name,VarID,byref(out_var),comp[1])
+            else: ok = self.doc.GetUPVarVal2(name,VarID,byref(out_var),comp)
+            if not ok: return _MISSING
+            assert isinstance(out_var.value,(float,bool,str)),type(out_var.value)
+        elif kind == "equipment":
+            if comp == '': ok = self.doc.GetEquipVarVal(name,VarID,byref(out_var))
+            else: ok = self.doc.GetEquipVarVal3(name,VarID,byref(out_var),*comp)
+            if not ok: return _MISSING
+            assert isinstance(out_var.value,(float,bool,str)),type(out_var.value)
+        elif kind == "operation":
+            procName,operName = name
+            if comp == '': ok = self.doc.GetOperVarVal(procName,operName,VarID,byref(out_var))
+            elif isinstance(comp,tuple): ok = self.doc.GetOperVarVal3(procName,operName,VarID,byref(out_var),*comp)
+            else: ok = self.doc.GetOperVarVal2(procName,operName,VarID,byref(out_var),comp)
+            if not ok: return _MISSING
+            assert isinstance(out_var.value,(float,bool,str)),type(out_var.value)
+        else:
+            raise NotImplementedError(kind)
+        return out_var.value
+
+    def _write(self, key:tuple, val) -> bool:
+        kind,name,VarID,comp = key
+        if self._undo is not None and key not in self._undo:
+            old = self._known.get(key,_MISSING)
+            if old is _MISSING and self.cache is not None: old = self.cache.values.get(key,_MISSING)
+            if old is _MISSING: old = self._read(key)
+            if old is _MISSING: self._undoable = False
+            else: self._undo[key] = old
+        _touch(self._dirty,self.app.VarClass(kind,VarID))
+        if kind == "stream": ok = self.doc.SetStreamVarVal(name, VarID, val, comp)
+        elif kind == "procedure":
+            if comp == '': ok = self.doc.SetUPVarVal(name,VarID,val)
+            else: ok = self.doc.SetUPVarVal2(name,VarID,val,comp)
+        elif kind == "equipment":
+            if comp == '': ok = self.doc.SetEquipVarVal(name,VarID,val)
+            else: ok = self.doc.SetEquipVarVal3(name,VarID,val,*comp)
+        elif kind == "operation":
+            procName,operName = name
+            if comp == '': ok = self.doc.SetOperVarVal(procName, operName, VarID, val)
+            elif isinstance(comp,tuple): ok = self.doc.SetOperVarVal3(procName, operName, VarID, val, *comp)
+            else: ok = self.doc.SetOperVarVal2(procName, operName, VarID, val, comp)
+        else:
+            raise NotImplementedError(kind)
+        # A write can change other variables of the same object (e.g. massFlow_VID and componentMassFlow_VID)
+        if self.cache is not None: self.cache.DropObject(kind,name)
+        if kind != "stream": self._schedules.clear()
+        if ok:
+            self._known[key] = val
+            self._log(key,val)
+        else:
+            self._known.pop(key,None)
+        return ok
+
+    def _log(self, entry:tuple, val):
+        self._applied.pop(entry,None)
+        self._applied[entry] = val
+
+    def _invalidate(self):
+        """
+        Forgets every remembered value, called whenever SPD recalculates the document.
+        """
+        self._known.clear()
+        self._enum_memo.clear()
+        self._schedules.clear()
+        if self.cache is not None: self.cache.Clear()
+
+    def _renamed(self, kind:str, oldName, newName):
+        # Names do not enter the balances, so a rename leaves nothing dirty
+        self._undoable = False
+        self._known.clear()
+        self._enum_memo.clear()
+        self._schedules.clear()
+        if self.cache is not None: self.cache.Rename(kind,oldName,newName)
+        if self._flowsheet is not None: self._flowsheet._renamed(kind,oldName)
+
+    # Undo log
+    def StartUndoLog(self):
+        """
+        Starts recording the value every variable had before its first write (costing one read per variable not already known), for Undo.
+        """
+        self._undo = {}
+        self._undoable = True
+        self._undo_applied = dict(self._applied)
+
+    def Undo(self) -> bool:
+        """
+        Writes back the values recorded since StartUndoLog, bringing the inputs back to their state at that time, and starts a new log.
+        Returns False when the changes cannot be undone by writes (ingredient changes, renames, stream initialization, or an old value that could not be read or written back).
+        The outputs are those of the last solve until the document is solved again.
+        """
+        if self._undo is None or not self._undoable: return False
+        if self._transaction is not None: self._transaction.pending.clear()
+        undo,self._undo = self._undo,None
+        for key,old in reversed(list(undo.items())):
+            if not self._write(key,old):
+                self._undo,self._undoable = {},False
+                return False
+        self._applied = self._undo_applied
+        self._invalidate()
+        self.StartUndoLog()
+        return True
+
+    @property
+    def applied(self) -> dict:
+        """
+        Copy of the input changes made through this document since it was opened, {entry: value} in order (the last write of a variable wins), for Replay.
+        """
+        return dict(self._applied)
+
+    def Replay(self, applied:dict) -> int:
+        """
+        Makes the changes of applied, the applied log of a document of the same case file, on this document (e.g. reopened after its COM server died):
+        variable writes, ingredient changes, renames and ScaleUpThroughput, in the order they were logged. Raises RuntimeError if one fails. Returns the number of changes made.
+        """
+        for entry,val in applied.items():
+            kind = entry[0]
+            if kind == "ingredient": ok = self.AddIngredientToInputStream(entry[1],entry[3],entry[2],val)
+            elif kind == "removeIngredient":
+                # An ingredient added and removed again through the other document is not in the case file to begin with
+                ok = self.RemoveIngredientFromInputStream(entry[1],entry[2]) or entry[2] not in self.EnumerateAll("stream_CID.pureComp_LID",entry[1])+self.EnumerateAll("stream_CID.stockMix_LID",entry[1])
+            elif kind == "scaleUpThroughput": ok = self.ScaleUpThroughput(val)
+            elif kind == "rename" and entry[1] == "operation": ok = self.RenameOperation(entry[2][0],entry[2][1],entry[3][1])
+            elif kind == "rename": ok = getattr(self,"Rename"+entry[1].capitalize())(entry[2],entry[3])
+            else: ok = self._set(entry,val)
+            if not ok: raise RuntimeError(f"Failed to replay {entry}: {self.GetCOMErrorMsg()}")
+        return len(applied)
+
+    def ReplayFrom(self, other:"SuperProDesignerDocument") -> int:
+        """
+        Brings this document, just opened from the case file of other, to the state of other: the changes made before other's undo log started (see StartUndoLog), a new undo log,
+        the later changes and the writes still pending in its transaction. The caches and solve statistics carry over. Raises RuntimeError if a change fails. Returns the number of changes made.
+        """
+        self.solveCache = other.solveCache
+        if other.cache is not None: self.EnableCache(other.cache.maxsize)
+        self.solveStats = other.solveStats
+        applied = other._applied
+        replayed = 0
+        if other._undo is not None:
+            before,after = list(other._undo_applied.items()),list(applied.items())
+            common = 0
+            while common < min(len(before),len(after)) and before[common] == after[common]: common += 1
+            replayed += self.Replay(other._undo_applied)
+            self.StartUndoLog()
+            self._undoable = other._undoable
+            applied = dict(after[common:])
+        replayed += self.Replay(applied)
+        if other._transaction is not None: replayed += self.Replay(other._transaction.pending)
+        return replayed
+
+    # Scenarios
+    """
+    Scenario inputs and outputs are addressed by (kind, name, key) or (kind, name, key, qualifier) tuples,
+    key being a variable key of the app tables (e.g. "massFlow_VID") or a VarID, name being (procName, operName) for operations,
+    and qualifier the compLocalName of streams or the val2 / (val2, val3) of the *2 / *3 calls.
+    """
+    def _key(self, address:tuple) -> tuple:
+        kind,name,var,*comp = address
+        if isinstance(var,str): var = self.app.VarID(kind,var)
+        return (kind,name,var,comp[0] if comp else '')
+
+    def ApplyInputs(self, inputs:dict, delta:bool=False) -> int:
+        """
+        Sets every {address: value} of inputs, ("ingredient", streamName, key, ingredientName) addresses going through AddIngredientToInputStream. Raises RuntimeError if a write fails.
+        With delta the values already written through this document are skipped (do not use it for inputs SPD adjusts itself, e.g. auto-adjusted stream flows).
+        Returns the number of writes made.
+        """
+        writes = 0
+        for address,val in inputs.items():
+            if address[0] == "ingredient":
+                _,streamName,var,ingredientName = address
+                VarID = self.app.VarID("stream",var) if isinstance(var,str) else var
+                val = float(val)
+                if delta and self._applied.get(("ingredient",streamName,VarID,ingredientName),_MISSING) == val: continue
+                if not self.AddIngredientToInputStream(streamName,ingredientName,VarID,val): raise RuntimeError(f"Failed to set {address}: {self.GetCOMErrorMsg()}")
+                writes += 1
+                continue
+            key = self._key(address)
+            if key[0] == "stream": val = float(val)
+            if delta:
+                current = self._transaction.pending.get(key,_MISSING) if self._transaction is not None else _MISSING
+                if current is _MISSING: current = self._applied.get(key,_MISSING)
+                if current is not _MISSING and current == val: continue
+            if not self._set(key,val): raise RuntimeError(f"Failed to set {address}: {self.GetCOMErrorMsg()}")
+            writes += 1
+        return writes
+
+    def ReadOutputs(self, outputs:list) -> list:
+        """
+        Reads every address of outputs, failed reads are None.
+        """
+        values = []
+        for address in outputs:
+            val = self._lookup(self._key(address))
+            values.append(None if val is _MISSING else val)
+        return values
+
+    def Solve(self, outputs:list, economics:bool=True) -> list:
+        """
+        Solves the M&E balances (and economics unless economics is False) where inputs changed (see ensure_solved) and returns the values of the output addresses, raising RuntimeError with GetCOMErrorMsg if a calculation fails.
+        With a solve cache (see EnableSolveCache) the outputs of an earlier solve of the same case file after the same inputs are returned without solving.
+        The document then holds the new inputs but not their solution, so call DoMEBalances before reading anything else from it.
+        """
+        key = None
+        if self.solveCache is not None:
+            if self._transaction is not None: self._transaction.Flush()
+            key = self.solveCache.Key(self.fileName,self._applied,economics)
+            values = self.solveCache.Get(key,outputs)
+            if values is not None: return values
+        if not self.ensure_solved(): raise RuntimeError(f"DoMEBalances failed: {self.GetCOMErrorMsg()}")
+        if economics and not self.ensure_economics(): raise RuntimeError(f"DoEconomicCalculations failed: {self.GetCOMErrorMsg()}")
+        values = self.ReadOutputs(outputs)
+        if key is not None: self.solveCache.Put(key,outputs,values)
+        return values
+
+    def EnableSolveCache(self, cache):
+        """
+        Makes Solve look up and store its outputs in cache, a SolveCache or the path of its SQLite file.
+        The key hashes the case file with every variable write, AddIngredientToInputStream and rename made through this document since it was opened.
+        Other changes to the document (e.g. through the SPD user interface) are not seen, so only use it on documents driven from Python.
+        """
+        from SolveCache import SolveCache
+        if self.fileName is None: raise ValueError("The solve cache needs a document opened with OpenDoc")
+        self.solveCache = cache if isinstance(cache,SolveCache) else SolveCache(cache)
+        return self.solveCache
+
+    def DisableSolveCache(self):
+        self.solveCache = None
+
+    # Export
+    def export(self, sink, what:list[str]=("stream","procedure","equipment","component"), **plan_options) -> int:
+        """
+        Streams stream / procedure / equipment variables and per-component stream flows as rows into sink (an Exporter.CSVSink, NDJSONSink or ParquetSink).
+        A sink reopened after a crash resumes after its last checkpoint. See Exporter.ExportPlan for plan_options. Returns the number of rows written.
+        """
+        from Exporter import Export
+        return Export(self,sink,what,**plan_options)
+
+    # Value cache
+    def EnableCache(self, maxsize:int=4096):
+        """
+        Enables a read-through cache of Get*VarVal values holding at most maxsize entries (least recently used are evicted).
+        The cache is cleared by DoMEBalances, DoEconomicCalculations and ScaleUpThroughput, follows renames, and drops an object's entries when one of its variables is set.
+        Returns the ValueCache, whose hits and misses show how much it helps.
+        """
+        if self.cache is None or self.cache.maxsize != maxsize: self.cache = ValueCache(maxsize)
+        return self.cache
+
+    def DisableCache(self):
+        self.cache = None
+
+    # Profiling
+    @contextmanager
+    def profile(self, profile=None, trace:bool=False):
+        """
+        with doc.profile() as p: records every COM call made through this document in p (a Profiler.ComProfile, or profile to accumulate into an existing one):
+        count, failures with their GetCOMErrorMsg text, and latencies (print(p), p.Summary(), p.OpenMetrics(), and p.WriteChromeTrace(path) with trace).
+        Outside the block COM is called directly, without any wrapper.
+        """
+        from Profiler import ComProfile, ProfiledDoc
+        profile = ComProfile(trace) if profile is None else profile
+        if isinstance(self.doc,ProfiledDoc):
+            self.doc._profiles.append(profile)
+            try:
+                yield profile
+            finally:
+                self.doc._profiles.remove(profile)
+            return
+        doc = self.doc
+        def errorMsg():
+            out_var = VARIANT()
+            return out_var.value if doc.GetCOMErrorMsg(byref(out_var)) else None
+        self.doc = ProfiledDoc(doc,[profile],errorMsg)
+        try:
+            yield profile
+        finally:
+            self.doc = doc
+
+    @contextmanager
+    def transaction(self, rollback:bool=True):
+        """
+        with doc.transaction(): buffers SetStreamVarVal / SetUPVarVal / SetEquipVarVal / SetOperVarVal calls (last write wins) and flushes them in one pass on exit, on DoMEBalances or before an ingredient change.
+        Writes of a value that is already current are skipped. Reads inside the block see the buffered values.
+        With rollback the old values are read before writing, and the flush is undone (raising RuntimeError with GetCOMErrorMsg) if IsCOMSimDataComplete fails.
+        If the block raises, the buffered writes are dropped.
+        """
+        if self._transaction is not None:
+            yield self._transaction
+            return
+        self._transaction = transaction = Transaction(self,rollback)
+        try:
+            yield transaction
+        except BaseException:
+            transaction.pending.clear()
+            raise
+        finally:
+            self._transaction = None
+        transaction.Flush()
+
+    # Batched reads
+    def Snapshot(self, streams:list[str]=(), stream_vars:list[str]=(), procedures:list[str]=(), procedure_vars:list[str]=(),
+                 equipment:list[str]=(), equipment_vars:list[str]=(), components:list[str]=()):
+        """
+        Reads many variables in a single pass, reusing one VARIANT buffer for every COM call.
+        As for single reads, writes buffered by transaction() and values in the ValueCache (see EnableCache) are returned without a COM call.
+        The variables are keys of app.stream_vars, app.procedure_vars and app.equipment_vars.
+        Returns {"stream": {...}, "procedure": {...}, "equipment": {...}} where each table holds the object "names" and one array per variable key with a row per object.
+        Stream variables in COMPONENT_STREAM_VARS get a column per entry in components (listed under "components").
+        Failed reads are NaN, or None for text variables.
+        """
+        out_var = VARIANT()
+        ref = byref(out_var)
+        snapshot = {}
+        if streams and stream_vars:
+            get = self.doc.GetStreamVarVal
+            table = snapshot["stream"] = {"names":tuple(streams),"components":tuple(components)}
+            for key in stream_vars:
+                VarID = self.app.stream_vars[key]
+                comps = tuple(components) if components and key in COMPONENT_STREAM_VARS else ('',)
+                column = self._snapshot_column(lambda name,comp: get(name,VarID,ref,comp), "stream", VarID, streams, comps, out_var)
+                table[key] = column if comps != ('',) else column[:,0]
+        if procedures and procedure_vars:
+            get = self.doc.GetUPVarVal
+            table = snapshot["procedure"] = {"names":tuple(procedures)}
+            for key in procedure_vars:
+                VarID = self.app.procedure_vars[key]
+                table[key] = self._snapshot_column(lambda name,comp: get(name,VarID,ref), "procedure", VarID, procedures, ('',), out_var)[:,0]
+        if equipment and equipment_vars:
+            get = self.doc.GetEquipVarVal
+            table = snapshot["equipment"] = {"names":tuple(equipment)}
+            for key in equipment_vars:
+                VarID = self.app.equipment_vars[key]
+                table[key] = self._snapshot_column(lambda name,comp: get(name,VarID,ref), "equipment", VarID, equipment, ('',), out_var)[:,0]
+        return snapshot
+
+    def GetOperVars(self, ops:list[tuple[str,str]]|None=None, var_keys:list[str]=("startTime_VID","endTime_VID","processTime_VID"), components:list[str]=()) -> dict:
+        """
+        Reads operation variables of many operations in a single pass like Snapshot, reusing one VARIANT buffer.
+        ops are (procName, operName) pairs, by default every operation of the flowsheet. var_keys are keys of app.operation_vars or of the operation type tables in app.operations (e.g. "washVolFlow_VID"), the latter only applying to operations of that type.
+        Returns {"names": ops, "components": components, key: array with a row per operation}, variables in COMPONENT_OPERATION_VARS getting a column per entry in components.
+        Failed reads (e.g. a variable of another operation type) are NaN, or None for text variables.
+        """
+        if ops is None:
+            procedures = self.EnumerateAll("flowsheet_CID.unitProc_LID",memo=True)
+            operations = self.EnumerateMany([("unitProc_CID.operation_LID",proc) for proc in procedures],memo=True)
+            ops = [(proc,oper) for proc in procedures for oper in operations[("unitProc_CID.operation_LID",proc)]]
+        out_var = VARIANT()
+        ref = byref(out_var)
+        get,get2 = self.doc.GetOperVarVal,self.doc.GetOperVarVal2
+        table = {"names":tuple(ops),"components":tuple(components)}
+        for key in var_keys:
+            VarID = self.app.VarID("operation",key)
+            comps = tuple(components) if components and key in COMPONENT_OPERATION_VARS else ('',)
+            read = lambda name,comp: get(name[0],name[1],VarID,ref) if comp == '' else get2(name[0],name[1],VarID,ref,comp)
+            column = self._snapshot_column(read, "operation", VarID, ops, comps, out_var)
+            table[key] = column if comps != ('',) else column[:,0]
+        return table
+
+    def schedule(self, batches:int=1, batchTime:float|None=None):
+        """
+        Reads the timing of every procedure (start, end, cycle time, number of cycles, equipment) and the occupancy SPD reports for every equipment in one Snapshot,
+        and returns a Schedule: the cycles of batches batches (batchTime apart, by default the span of one batch) as an interval table with the per-equipment busy time, overlaps and utilization.
+        The result is reused until the next solve, rename or procedure / equipment / operation write.
+        """
+        key = (batches,batchTime)
+        schedule = self._schedules.get(key)
+        if schedule is None:
+            from Schedule import EQUIPMENT_SCHEDULE_VARS, PROCEDURE_SCHEDULE_VARS, Schedule
+            lists = self.EnumerateMany(["flowsheet_CID.unitProc_LID","flowsheet_CID.equipment_LID"],memo=True)
+            snapshot = self.Snapshot(procedures=lists["flowsheet_CID.unitProc_LID"],procedure_vars=PROCEDURE_SCHEDULE_VARS,
+                                     equipment=lists["flowsheet_CID.equipment_LID"],equipment_vars=EQUIPMENT_SCHEDULE_VARS)
+            empty = lambda names,keys: dict({"names":tuple(names)},**{key:np.full(len(names),np.nan) for key in keys})
+            schedule = self._schedules[key] = Schedule(snapshot.get("procedure") or empty(lists["flowsheet_CID.unitProc_LID"],PROCEDURE_SCHEDULE_VARS),
+                                                       snapshot.get("equipment") or empty(lists["flowsheet_CID.equipment_LID"],EQUIPMENT_SCHEDULE_VARS),batches,batchTime)
+        return schedule
+
+    def stream_table(self, streams:list[str]|None=None, stream_vars:list[str]|None=None, flags:list[str]|None=None):
+        """
+        Reads stream_vars (default StreamTable.STREAM_TABLE_VARS) and the classification flags (default STREAM_TABLE_FLAGS) of streams (default all) in one Snapshot
+        and returns them as a StreamTable, one array per key instead of a Stream object per stream.
+        """
+        from StreamTable import STREAM_TABLE_FLAGS, STREAM_TABLE_VARS, StreamTable
+        if streams is None: streams = self.EnumerateAll("flowsheet_CID.stream_LID",memo=True)
+        if stream_vars is None: stream_vars = STREAM_TABLE_VARS
+        if flags is None: flags = STREAM_TABLE_FLAGS
+        keys = list(dict.fromkeys([*stream_vars,*flags]))
+        snapshot = self.Snapshot(streams=streams,stream_vars=keys).get("stream") or dict({"names":tuple(streams)},**{key:np.full(len(streams),np.nan) for key in keys})
+        return StreamTable.FromSnapshot(snapshot,flags,self)
+
+    def component_flow_matrix(self, vid:str="componentMassFlow_VID", streams:list[str]|None=None, components:list[str]|None=None, sparse:bool=False):
+        """
+        Reads vid ("componentMassFlow_VID", "componentMoleFlow_VID" or "compMassFrac_VID") of every component of every stream (default all of them) in one pass, reusing one VARIANT buffer,
+        and returns a StreamTable.ComponentFlows holding the stream x component matrix (a scipy.sparse CSR matrix with sparse) with the stream flags, for balance checks.
+        Only the components in a stream's pureComp_LID list are read, the others are 0; failed reads are NaN.
+        """
+        from StreamTable import ComponentFlows
+        if vid not in ("componentMassFlow_VID","componentMoleFlow_VID","compMassFrac_VID"): raise ValueError(f"{vid} is not a component flow or fraction")
+        if streams is None: streams = self.EnumerateAll("flowsheet_CID.stream_LID",memo=True)
+        if components is None: components = self.EnumerateAll("flowsheet_CID.pureComp_LID",memo=True)
+        column = {comp:j for j,comp in enumerate(components)}
+        lists = self.EnumerateMany([("stream_CID.pureComp_LID",streamName) for streamName in streams],memo=True)
+        out_var = VARIANT()
+        ref = byref(out_var)
+        get = self.doc.GetStreamVarVal
+        VarID = self.app.stream_vars[vid]
+        rows,cols,values = [],[],[]
+        for i,streamName in enumerate(streams):
+            for comp in lists[("stream_CID.pureComp_LID",streamName)]:
+                j = column.get(comp)
+                if j is None: continue
+                rows.append(i)
+                cols.append(j)
+                values.append(out_var.value if get(streamName,VarID,ref,comp) and isinstance(out_var.value,(int,float)) else math.nan)
+        shape = (len(streams),len(components))
+        if sparse:
+            from scipy.sparse import coo_matrix
+            matrix = coo_matrix((np.array(values,dtype=np.float64),(rows,cols)),shape=shape).tocsr()
+        else:
+            matrix = np.zeros(shape)
+            matrix[rows,cols] = values
+        return ComponentFlows(streams,components,matrix,self.stream_table(streams,stream_vars=["massFlow_VID"]),vid)
+
+    def _snapshot_column(self, read, kind:str, VarID:int, names:list, comps:tuple[str,...], out_var):
+        # Like _lookup: buffered transaction writes first, then the value cache, COM only for the rest
+        pending = self._transaction.pending if self._transaction is not None else {}
+        cache = self.cache
+        column = np.full((len(names),len(comps)), np.nan)
+        for i,name in enumerate(names):
+            for j,comp in enumerate(comps):
+                key = (kind,name,VarID,comp)
+                val = pending.get(key,_MISSING)
+                if val is _MISSING and cache is not None: val = cache.Get(key)
+                if val is _MISSING:
+                    if not read(name,comp): continue
+                    val = out_var.value
+                    if cache is not None: cache.Put(key,val)
+                if isinstance(val,str) and column.dtype != object:
+                    failed = np.isnan(column)
+                    column = column.astype(object)
+                    column[failed] = None
+                column[i,j] = val
+        return column
+
     # Enumerator
     def Enumerator(self, ids:tuple[int,int], containerName1:str='',containerName2:str=''):
+        yield from self._enumerate(ids,containerName1,containerName2)
+
+    def EnumerateAll(self, list_key:str|tuple[int,int], containerName1:str='', containerName2:str='', memo:bool=False) -> tuple[str,...]:
+        """
+        Returns the names of a list, list_key being a path into app.enum_vars such as "flowsheet_CID.stream_LID" (or the (containerID, listID) pair itself).
+        With memo the names are remembered until the next rename, ingredient addition or solve.
+        """
+        ids = self._enum_ids(list_key)
+        if not memo: return self._enumerate(ids,containerName1,containerName2)
+        key = (ids,containerName1,containerName2)
+        names = self._enum_memo.get(key)
+        if names is None: names = self._enum_memo[key] = self._enumerate(ids,containerName1,containerName2)
+        return names
+
+    def EnumerateMany(self, lists:list, memo:bool=False) -> dict:
+        """
+        Enumerates several lists in one pass, each entry being a list_key or a (list_key, containerName1[, containerName2]) tuple as for EnumerateAll.
+        Returns the names keyed by the entries of lists.
+        """
         pos = VARIANT()
         itemName = VARIANT()
+        result = {}
+        for entry in lists:
+            list_key,*containers = (entry,) if isinstance(entry,str) else entry
+            ids = self._enum_ids(list_key)
+            key = (ids,*containers,'','')[:3]
+            names = self._enum_memo.get(key) if memo else None
+            if names is None: names = self._enumerate(*key,pos=pos,itemName=itemName)
+            if memo: self._enum_memo[key] = names
+            result[entry] = names
+        return result
+
+    def _enum_ids(self, list_key:str|tuple[int,int]) -> tuple[int,int]:
+        if not isinstance(list_key,str): return list_key
+        containerID,listID = list_key.split('.')
+        return self.app.enum_vars[containerID][listID]
+
+    def _enumerate(self, ids:tuple[int,int], containerName1:str='', containerName2:str='', pos=None, itemName=None) -> tuple[str,...]:
+        # GetNextItemName returns False, without a new name, once the list is exhausted
+        pos = VARIANT() if pos is None else pos
+        itemName = VARIANT() if itemName is None else itemName
+        pos_ref,item_ref = byref(pos),byref(itemName)
         containerID,listID = ids
-
         if containerName2 == '':
-            cont = self.doc.StartEnumeration(byref(pos),listID,containerID,containerName1)
-            while cont:
-                cont = self.doc.GetNextItemName(byref(pos),byref(itemName),listID,containerID,containerName1)
-                yield itemName.value
+            containers = (containerName1,)
+            start,getNext = self.doc.StartEnumeration,self.doc.GetNextItemName
         else:
-            cont = self.doc.StartEnumeration2(byref(pos),listID,containerID,containerName1,containerName2)
-            while cont:
-                cont = self.doc.GetNextItemName2(byref(pos),byref(itemName),listID,containerID,containerName1,containerName2)
-                yield itemName.value
+            containers = (containerName1,containerName2)
+            start,getNext = self.doc.StartEnumeration2,self.doc.GetNextItemName2
+        names = []
+        if start(pos_ref,listID,containerID,*containers):
+            while getNext(pos_ref,item_ref,listID,containerID,*containers):
+                names.append(itemName.value)
+        return tuple(names)
+
+    @property
+    def flowsheet(self) -> "Flowsheet":
+        """
+        Lazily enumerated object graph of the document, see Flowsheet.
+        """
+        if self._flowsheet is None: self._flowsheet = Flowsheet(self)
+        return self._flowsheet
 
     def Stream(self,initialName:str):
         return Stream(self,initialName)
@@ -540,6 +1442,314 @@ class SuperProDesignerDocument():
         return Procedure(self,initialName)
 
 
+class Transaction:
+    """
+    Write buffer of SuperProDesignerDocument.transaction, counting the writes it buffered, flushed to COM and skipped.
+    """
+    def __init__(self,doc:SuperProDesignerDocument,rollback:bool=True):
+        self.doc = doc
+        self.rollback = rollback
+        self.pending:dict[tuple,object] = {}
+        self.buffered = 0
+        self.flushed = 0
+        self.skipped = 0
+
+    def Set(self, key:tuple, val) -> bool:
+        self.pending.pop(key,None)
+        self.pending[key] = val
+        self.buffered += 1
+        return True
+
+    def Flush(self):
+        pending, self.pending = self.pending, {}
+        undo = []
+        written = []
+        applied = dict(self.doc._applied)
+        try:
+            for key,val in pending.items():
+                old = self.doc._known.get(key,_MISSING)
+                if old is _MISSING and self.doc.cache is not None: old = self.doc.cache.values.get(key,_MISSING)
+                if old is _MISSING and self.rollback: old = self.doc._read(key)
+                if old is not _MISSING and old == val:
+                    self.skipped += 1
+                    continue
+                if not self.doc._write(key,val): raise RuntimeError(f"Failed to set {key}: {self.doc.GetCOMErrorMsg()}")
+                written.append(key)
+                self.flushed += 1
+                if old is not _MISSING: undo.append((key,old))
+            if self.rollback and undo and not self.doc.IsCOMSimDataComplete():
+                raise RuntimeError(self.doc.GetCOMErrorMsg())
+        except BaseException:
+            for key,old in reversed(undo): self.doc._write(key,old)
+            if undo:
+                # Rolled back writes are no inputs of the document (for Undo, Replay, the solve cache keys and ApplyInputs with delta), the log goes back to its state before the flush
+                undone = {key for key,_ in undo}
+                self.doc._applied = applied
+                for key in written:
+                    if key not in undone: self.doc._log(key,pending[key])
+            raise
+
+class ValueCache:
+    """
+    Bounded LRU cache of variable values keyed by (kind, name, VarID, compLocalName), see SuperProDesignerDocument.EnableCache.
+    """
+    def __init__(self,maxsize:int=4096):
+        self.maxsize = maxsize
+        self.values:OrderedDict[tuple,object] = OrderedDict()
+        self._objects:dict[tuple,set[tuple]] = {}  # (kind, name) -> keys of that object
+        self.hits = 0
+        self.misses = 0
+
+    def Get(self, key:tuple):
+        val = self.values.get(key,_MISSING)
+        if val is _MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.values.move_to_end(key)
+        return val
+
+    def Put(self, key:tuple, val):
+        if key in self.values:
+            self.values.move_to_end(key)
+        else:
+            if len(self.values) >= self.maxsize:
+                old,_ = self.values.popitem(last=False)
+                self._unindex(old)
+            self._objects.setdefault(key[:2],set()).add(key)
+        self.values[key] = val
+
+    def DropObject(self, kind:str, name):
+        for key in self._objects.pop((kind,name),()):
+            del self.values[key]
+
+    def Rename(self, kind:str, oldName, newName):
+        objects = [(kind,oldName)]
+        # Operations are named (procName, operName), so they move with their procedure
+        if kind == "procedure": objects += [obj for obj in self._objects if obj[0] == "operation" and obj[1][0] == oldName]
+        for obj in objects:
+            keys = self._objects.pop(obj,())
+            name = newName if obj[1] == oldName else (newName,obj[1][1])
+            for key in keys:
+                self.Put((obj[0],name)+key[2:],self.values.pop(key))
+        # Values naming the renamed object (e.g. a procedure's equipmentName_VID) are stale too
+        for key in [key for key,val in self.values.items() if val == oldName and isinstance(val,str)]:
+            del self.values[key]
+            self._unindex(key)
+
+    def Clear(self):
+        self.values.clear()
+        self._objects.clear()
+
+    def _unindex(self, key:tuple):
+        keys = self._objects[key[:2]]
+        keys.discard(key)
+        if not keys: del self._objects[key[:2]]
+
+    @property
+    def hitRate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+class Flowsheet:
+    """
+    Object graph of a document built from the enumerators.
+    Every list (streams, procedures, a procedure's operations, ...) is enumerated on first use and kept, and objects are lightweight handles that fetch their attributes on first use.
+    Renames done through the document mark the affected lists dirty, they are enumerated again on next use or by refresh().
+    """
+    def __init__(self,doc:SuperProDesignerDocument):
+        self.doc = doc
+        self._lists:dict[tuple[str,str,str],tuple[str,...]] = {}  # (container CID, list LID, container name) -> names
+        self._indexes:dict[tuple,dict] = {}
+        self._handles:dict[tuple,_Handle] = {}
+        self._dirty:set[tuple[str,str,str]] = set()
+
+    def _list(self, cid:str, lid:str, container:str='') -> tuple[str,...]:
+        key = (cid,lid,container)
+        names = self._lists.get(key)
+        if names is None or key in self._dirty: names = self._enumerate(key)
+        return names
+
+    def _enumerate(self, key:tuple[str,str,str], names:tuple[str,...]|None=None) -> tuple[str,...]:
+        cid,lid,container = key
+        if names is None: names = self.doc.EnumerateAll(f"{cid}.{lid}",container)
+        self._lists[key] = names
+        self._dirty.discard(key)
+        self._indexes = {index:val for index,val in self._indexes.items() if key not in index[1:] and (index[0] != "procedureEquipment" or cid != "equipment_CID")}
+        return names
+
+    def _handle(self, cls:type, kind:str, name):
+        handle = self._handles.get((kind,name))
+        if handle is None: handle = self._handles[(kind,name)] = cls(self,name)
+        return handle
+
+    def _index(self, kind:str, cls:type, lst:tuple[str,str,str], owner:str|None=None) -> dict:
+        # An index is keyed by the list it is built from, so that re-enumerating the list drops it
+        key = (kind,lst)
+        index = self._indexes.get(key)
+        if index is None or lst in self._dirty:
+            names = self._list(*lst)
+            index = self._indexes[key] = {name:self._handle(cls,kind,name if owner is None else (owner,name)) for name in names}
+        return index
+
+    def _renamed(self, kind:str, oldName):
+        if kind == "operation":
+            key = ("unitProc_CID","operation_LID",oldName[0])
+            if key in self._lists: self._dirty.add(key)
+        else:
+            # Lists the renamed object contains are dropped rather than marked dirty: the old name no longer enumerates, the new one is enumerated on first use
+            gone = [key for key in self._lists if key[2] == oldName]
+            for key in gone:
+                del self._lists[key]
+                self._dirty.discard(key)
+            self._indexes = {index:val for index,val in self._indexes.items() if index[1:] and index[1] not in gone}
+            lids = {"stream":("stream_LID","inStream_LID","outStream_LID"),"procedure":("unitProc_LID",),"equipment":("equipment_LID",)}[kind]
+            self._dirty.update(key for key in self._lists if key[1] in lids)
+        for key,handle in list(self._handles.items()):
+            if key == (kind,oldName) or (kind == "procedure" and key[0] == "operation" and key[1][0] == oldName):
+                del self._handles[key]
+            elif kind == "equipment" and isinstance(handle,ProcedureHandle) and handle._equipment is not None and handle._equipment.name == oldName:
+                handle._equipment = None
+
+    def refresh(self, everything:bool=False) -> set[tuple[str,str,str]]:
+        """
+        Enumerates the dirty lists again (every list already enumerated with everything, e.g. after editing the document in the GUI) and returns the lists that changed.
+        """
+        changed = set()
+        keys = list(self._lists if everything else self._dirty)
+        lists = self.doc.EnumerateMany([(f"{cid}.{lid}",container) for cid,lid,container in keys])
+        for key,names in zip(keys,lists.values()):
+            if self._lists.get(key) != names: changed.add(key)
+            self._enumerate(key,names)
+        if changed: self._indexes.pop(("procedureEquipment",),None)
+        return changed
+
+    @property
+    def streams(self) -> dict[str,"StreamHandle"]:
+        return self._index("stream",StreamHandle,("flowsheet_CID","stream_LID",''))
+
+    @property
+    def inputStreams(self) -> dict[str,"StreamHandle"]:
+        return self._index("stream",StreamHandle,("flowsheet_CID","inStream_LID",''))
+
+    @property
+    def outputStreams(self) -> dict[str,"StreamHandle"]:
+        return self._index("stream",StreamHandle,("flowsheet_CID","outStream_LID",''))
+
+    @property
+    def procedures(self) -> dict[str,"ProcedureHandle"]:
+        return self._index("procedure",ProcedureHandle,("flowsheet_CID","unitProc_LID",''))
+
+    @property
+    def equipment(self) -> dict[str,"EquipmentHandle"]:
+        return self._index("equipment",EquipmentHandle,("flowsheet_CID","equipment_LID",''))
+
+    @property
+    def operations(self) -> dict[tuple[str,str],"OperationHandle"]:
+        """
+        All operations keyed by (procName, operName).
+        """
+        return {op.name:op for proc in self.procedures.values() for op in proc.operations.values()}
+
+    @property
+    def components(self) -> tuple[str,...]:
+        return self._list("flowsheet_CID","pureComp_LID")
+
+    @property
+    def stockMixtures(self) -> tuple[str,...]:
+        return self._list("flowsheet_CID","stockMix_LID")
+
+    @property
+    def sections(self) -> dict[str,tuple[str,...]]:
+        """
+        Section names keyed by branch name.
+        """
+        return {branch:self._list("branch_CID","section_LID",branch) for branch in self._list("flowsheet_CID","branch_LID")}
+
+    @property
+    def procedureEquipment(self) -> dict[str,str]:
+        """
+        Equipment name keyed by procedure name, built by enumerating the procedures hosted by every equipment.
+        """
+        index = self._indexes.get(("procedureEquipment",))
+        if index is None:
+            index = self._indexes[("procedureEquipment",)] = {proc:equip for equip in self.equipment for proc in self._list("equipment_CID","unitProc_LID",equip)}
+        return index
+
+class _Handle:
+    __slots__ = ("flowsheet","name")
+    def __init__(self,flowsheet:Flowsheet,name):
+        self.flowsheet = flowsheet
+        self.name = name
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r})"
+
+class StreamHandle(_Handle):
+    __slots__ = ("_isInput","_isOutput")
+    def __init__(self,flowsheet:Flowsheet,name:str):
+        super().__init__(flowsheet,name)
+        self._isInput = self._isOutput = None
+
+    @property
+    def isInput(self) -> bool:
+        if self._isInput is None: self._isInput = bool(self.flowsheet.doc.GetStreamVarVal(self.name,self.flowsheet.doc.app.stream_vars["isInputStream_VID"]))
+        return self._isInput
+
+    @property
+    def isOutput(self) -> bool:
+        if self._isOutput is None: self._isOutput = bool(self.flowsheet.doc.GetStreamVarVal(self.name,self.flowsheet.doc.app.stream_vars["isOutputStream_VID"]))
+        return self._isOutput
+
+    @property
+    def components(self) -> tuple[str,...]:
+        return self.flowsheet._list("stream_CID","pureComp_LID",self.name)
+
+    def Stream(self) -> "Stream":
+        return Stream(self.flowsheet.doc,self.name)
+
+class ProcedureHandle(_Handle):
+    __slots__ = ("_equipment",)
+    def __init__(self,flowsheet:Flowsheet,name:str):
+        super().__init__(flowsheet,name)
+        self._equipment = None
+
+    @property
+    def equipment(self) -> "EquipmentHandle":
+        if self._equipment is None:
+            index = self.flowsheet._indexes.get(("procedureEquipment",))
+            name = index[self.name] if index is not None and self.name in index else self.flowsheet.doc.GetUPVarVal(self.name,self.flowsheet.doc.app.procedure_vars["equipmentName_VID"])
+            self._equipment = self.flowsheet._handle(EquipmentHandle,"equipment",name)
+        return self._equipment
+
+    @property
+    def operations(self) -> dict[str,"OperationHandle"]:
+        """
+        Operations of the procedure keyed by operation name.
+        """
+        return self.flowsheet._index("operation",OperationHandle,("unitProc_CID","operation_LID",self.name),owner=self.name)
+
+    def Procedure(self) -> "Procedure":
+        return Procedure(self.flowsheet.doc,self.name)
+
+class EquipmentHandle(_Handle):
+    __slots__ = ()
+    @property
+    def procedures(self) -> dict[str,ProcedureHandle]:
+        return self.flowsheet._index("procedure",ProcedureHandle,("equipment_CID","unitProc_LID",self.name))
+
+    def Equipment(self) -> "Equipment":
+        return Equipment(self.flowsheet.doc,self.name)
+
+class OperationHandle(_Handle):
+    __slots__ = ()
+    @property
+    def procedure(self) -> ProcedureHandle:
+        return self.flowsheet._handle(ProcedureHandle,"procedure",self.name[0])
+
+    def Operation(self) -> "Operation":
+        return Operation(self.procedure.Procedure(),self.name[1])
+
 class Stream:
     def __init__(self,doc:SuperProDesignerDocument,initialName:str):
         self.app = doc.app
@@ -565,12 +1775,11 @@ class Stream:
         if isinstance(val,int):val=float(val)
         return self.doc.AddIngredientToInputStream(self.name, ingredientName, VarID, val)
 
-    def RemoveIngredientFromInputStream(self,streamName:str,ingredientName:str):
+    def RemoveIngredientFromInputStream(self,ingredientName:str):
         """
         RemoveIngredientFromInputStream(streamName As String, ingredientName As String) can be used to remove an ingredient from an input stream.
         """
-        raise NotImplementedError()
-        return self.doc.RemoveIngredientFromInputStream(streamName,ingredientName)
+        return self.doc.RemoveIngredientFromInputStream(self.name,ingredientName)
 
     @property
     def IsInputStreamCompositionValid(self):
@@ -657,10 +1866,14 @@ class Operation:
         if not self.doc.RenameOperation(self.proc.name,self.name,newName): raise NameError("Operation name already exists")
         self._name = newName
 
+    def GetOperVarVal(self, VarID:int, val2=None, val3=None):
+        return self.doc.GetOperVarVal(self.proc.name, self.name, VarID, val2, val3)
+
     def SetOperVarVal(self, VarID:int, val, val2=None, val3=None):
         return self.doc.SetOperVarVal(self.proc.name, self.name, VarID, val, val2, val3)
 
 if __name__ == "__main__":
+    from IPython import embed
     spd = SuperProDesigner()
     spd.ShowApp()
     doc = spd.OpenDoc(r"C:\Users\mikbr\Desktop\SPD\COM\v1.spf")
@@ -0,0 +1,196 @@
+import math
+from collections import Counter
+from typing import NamedTuple
+
+import numpy as np
+
+class Prediction(NamedTuple):
+    values:np.ndarray  # One value per output address
+    std:np.ndarray  # Standard deviation of each value, 0 for solved points
+    solved:bool  # True when the values come from a solve rather than the model
+
+class Surrogate:
+    """
+    Gaussian process model of output addresses as functions of input addresses (see SuperProDesignerDocument.ApplyInputs), trained from solved scenarios:
+
+        surrogate = Surrogate(inputs, outputs, doc=doc, tolerance=0.02)
+        surrogate.RecordResults(runner.run(scenarios))
+        values, std, solved = surrogate.Query({address: value, ...})
+
+    The inputs are scaled to [0, 1] by bounds (default the range of the recorded points) and every output is standardized; all outputs share one squared exponential kernel,
+    whose length scale is picked by marginal likelihood on a grid when the training set has grown by a quarter.
+    Query answers from the model when the standard deviation of every output is within tolerance (relative to the output's spread in the training set),
+    and otherwise solves the point on doc (or runner, for QueryMany) and adds it to the training set. stats counts the "predicted" and "solved" points.
+    """
+    def __init__(self, inputs:list[tuple], outputs:list[tuple], doc=None, runner=None, economics:bool=True, tolerance:float=0.05,
+                 bounds:dict|None=None, noise:float=1e-6, length_scales=(0.05,0.1,0.2,0.3,0.5,0.75,1.0,1.5,2.5)):
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.doc = doc
+        self.runner = runner
+        if runner is not None:
+            missing = [address for address in self.outputs if address not in runner.outputs]
+            if missing: raise ValueError(f"The runner does not read the outputs {missing}")
+        self.economics = economics
+        self.tolerance = tolerance
+        self.bounds = bounds
+        self.noise = noise
+        self.length_scales = tuple(length_scales)
+        self.X = np.empty((0,len(self.inputs)))
+        self.Y = np.empty((0,len(self.outputs)))
+        self.stats:Counter[str] = Counter()
+        self.lengthScale:float|None = None
+        self._selected_at = 0  # Training set size when the length scale was last picked
+        self._model = None
+
+    # Training set
+    def _vector(self, x) -> np.ndarray:
+        if isinstance(x,dict): x = [x[address] for address in self.inputs]
+        return np.asarray(x,dtype=np.float64).reshape(len(self.inputs))
+
+    def Record(self, x, y):
+        """
+        Adds the solved point x (an {address: value} dict or a vector in the order of inputs) with its outputs y (in the order of outputs, None for failed reads).
+        """
+        self.X = np.vstack([self.X,self._vector(x)])
+        self.Y = np.vstack([self.Y,[val if isinstance(val,(int,float)) else math.nan for val in y]])
+        self._model = None
+
+    def RecordResults(self, results, outputs:list|None=None) -> int:
+        """
+        Adds the successful ScenarioResults of results, whose outputs are read at the addresses outputs (default the runner's, else this surrogate's outputs). Returns the number added.
+        """
+        if outputs is None: outputs = self.runner.outputs if self.runner is not None else self.outputs
+        columns = [list(outputs).index(address) for address in self.outputs]
+        added = 0
+        for result in results:
+            if not result.ok: continue
+            self.Record(result.inputs,[result.outputs[j] for j in columns])
+            added += 1
+        return added
+
+    def __len__(self):
+        return len(self.X)
+
+    # Model
+    def _scale(self, X:np.ndarray) -> np.ndarray:
+        return (X-self._lower)/self._span
+
+    def Fit(self):
+        """
+        Fits the model to the recorded points without a failed output. Called by Predict when points were added since the last fit.
+        """
+        good = np.all(np.isfinite(self.Y),axis=1) & np.all(np.isfinite(self.X),axis=1)
+        X,Y = self.X[good],self.Y[good]
+        if not len(X): raise ValueError("No solved points to fit")
+        if self.bounds is not None:
+            self._lower = np.array([self.bounds[address][0] for address in self.inputs],dtype=np.float64)
+            upper = np.array([self.bounds[address][1] for address in self.inputs],dtype=np.float64)
+        else:
+            self._lower,upper = X.min(axis=0),X.max(axis=0)
+        self._span = np.where(upper > self._lower,upper-self._lower,1.0)
+        self._mean,self._std = Y.mean(axis=0),Y.std(axis=0)
+        self._std[self._std == 0] = 1.0
+        U,Z = self._scale(X),(Y-self._mean)/self._std
+        distances = np.sum((U[:,None,:]-U[None,:,:])**2,axis=2)
+        if self.lengthScale is None or len(X) >= 1.25*self._selected_at:
+            self.lengthScale = max(self.length_scales,key=lambda l: _likelihood(distances,Z,l,self.noise))
+            self._selected_at = len(X)
+        L,self._jitter = _cholesky(np.exp(-distances/(2*self.lengthScale**2)),self.noise)
+        Linv = np.linalg.inv(L)
+        self._model = (U,Linv.T@(Linv@Z),Linv)
+
+    def Predict(self, X) -> tuple[np.ndarray,np.ndarray]:
+        """
+        Mean and standard deviation of the outputs at the points X (a point, as for Record, or an array with a point per row), in the outputs' units.
+        """
+        if self._model is None: self.Fit()
+        U,alpha,Linv = self._model
+        single = isinstance(X,dict) or np.ndim(X) == 1
+        X = self._vector(X)[None,:] if single else np.asarray([self._vector(x) for x in X])
+        k = np.exp(-np.sum((self._scale(X)[:,None,:]-U[None,:,:])**2,axis=2)/(2*self.lengthScale**2))
+        v = k@Linv.T
+        mean = self._mean+(k@alpha)*self._std
+        std = np.sqrt(np.clip(1.0+self._jitter-np.sum(v*v,axis=1),0.0,None))[:,None]*self._std
+        return (mean[0],std[0]) if single else (mean,std)
+
+    def _trained(self) -> bool:
+        return bool(np.any(np.all(np.isfinite(self.Y),axis=1)))
+
+    def _certain(self, std:np.ndarray) -> np.ndarray:
+        return np.all(std <= self.tolerance*self._std,axis=-1)
+
+    # Queries
+    def _inputs(self, x:np.ndarray) -> dict:
+        return {address:float(val) for address,val in zip(self.inputs,x)}
+
+    def Query(self, x) -> Prediction:
+        """
+        Predicts x, or solves it on doc when the model is not certain enough (or has no points yet).
+        """
+        x = self._vector(x)
+        if self._trained():
+            values,std = self.Predict(x)
+            if self._certain(std):
+                self.stats["predicted"] += 1
+                return Prediction(values,std,False)
+        if self.doc is None:
+            if self.runner is None: raise RuntimeError("Neither a doc nor a runner to solve with")
+            return self.QueryMany([x])[0]
+        self.doc.ApplyInputs(self._inputs(x))
+        y = self.doc.Solve(self.outputs,self.economics)
+        self.Record(x,y)
+        self.stats["solved"] += 1
+        return Prediction(self.Y[-1].copy(),np.zeros(len(self.outputs)),True)
+
+    def QueryMany(self, X) -> list[Prediction]:
+        """
+        Query for many points, the uncertain ones being solved in one batch on the runner (or one by one on doc).
+        Points whose solve fails keep their prediction (NaN without a model).
+        """
+        X = np.asarray([self._vector(x) for x in X])
+        predictions:list[Prediction|None] = [None]*len(X)
+        if self._trained():
+            means,stds = self.Predict(X)
+            for i in np.flatnonzero(self._certain(stds)).tolist(): predictions[i] = Prediction(means[i],stds[i],False)
+            self.stats["predicted"] += sum(prediction is not None for prediction in predictions)
+        todo = [i for i,prediction in enumerate(predictions) if prediction is None]
+        if not todo: return predictions
+        if self.runner is None:
+            for i in todo:
+                try:
+                    predictions[i] = self.Query(X[i])
+                except RuntimeError:
+                    pass  # A failed write or solve, the point falls back to its prediction below
+        else:
+            columns = [self.runner.outputs.index(address) for address in self.outputs]
+            for result in self.runner.run([self._inputs(X[i]) for i in todo]):
+                if not result.ok: continue
+                i = todo[result.index]
+                self.Record(X[i],[result.outputs[j] for j in columns])
+                self.stats["solved"] += 1
+                predictions[i] = Prediction(self.Y[-1].copy(),np.zeros(len(self.outputs)),True)
+        for i in todo:
+            if predictions[i] is None:
+                values,std = self.Predict(X[i]) if self._trained() else (np.full(len(self.outputs),np.nan),np.full(len(self.outputs),np.inf))
+                predictions[i] = Prediction(values,std,False)
+        return predictions
+
+def _cholesky(K:np.ndarray, noise:float) -> tuple[np.ndarray,float]:
+    # Close points make K nearly singular, the jitter on the diagonal is raised until it factors
+    while True:
+        try:
+            return np.linalg.cholesky(K+noise*np.eye(len(K))),noise
+        except np.linalg.LinAlgError:
+            if noise >= 1.0: raise
+            noise *= 10
+
+def _likelihood(distances:np.ndarray, Z:np.ndarray, lengthScale:float, noise:float) -> float:
+    # Log marginal likelihood of the standardized outputs Z, summed over the outputs
+    try:
+        L = np.linalg.cholesky(np.exp(-distances/(2*lengthScale**2))+noise*np.eye(len(Z)))
+    except np.linalg.LinAlgError:
+        return -math.inf
+    Linv = np.linalg.inv(L)
+    W = Linv@Z
+    return float(-0.5*np.sum(W*W)-Z.shape[1]*np.sum(np.log(np.diag(L))))
@@ -0,0 +1,312 @@
+import concurrent.futures
+import functools
+import inspect
+import os
+import queue
+import signal
+import subprocess
+import threading
+import time
+from collections import Counter
+from typing import Callable, NamedTuple
+
+from ScenarioRunner import ServerRestarted
+from SuperProDesigner import CoInitialize, SuperProDesigner, SuperProDesignerDocument
+
+# Seconds a call may take before its COM server is considered hung, by SuperProDesignerDocument method ("start" for starting SuperPro Designer, "replay" for
+# reopening the case after a restart), None for no limit. Methods not listed get the default_deadline of the Supervisor.
+DEADLINES = {"start":120.0,"OpenDoc":300.0,"replay":600.0,"CloseApp":60.0,"SaveDoc":300.0,"DoMEBalances":3600.0,"DoEconomicCalculations":600.0,
+             "Solve":4200.0,"ScaleUpThroughput":600.0,"throughput_curve":None}
+DEFAULT_DEADLINE = 60.0
+
+# Image name of the SuperPro Designer COM server process
+DESIGNER_IMAGE = "Designer.exe"
+
+# Document methods returning objects that make COM calls later, on whatever thread uses them, only available through SupervisedDocument.Run
+UNSUPERVISED = frozenset({"Enumerator","Stream","Procedure","flowsheet"})
+
+_start_lock = threading.Lock()
+
+def StartDesigner() -> SuperProDesigner:
+    """
+    Default factory of Supervisor, starts SuperPro Designer and sets app.pid to the process id of its COM server
+    (None when it cannot be told apart from other instances started at the same time, it can then not be killed).
+    """
+    with _start_lock:
+        before = _designer_pids()
+        app = SuperProDesigner()
+        started = _designer_pids()-before
+    app.pid = started.pop() if len(started) == 1 else None
+    return app
+
+def _designer_pids() -> set[int]:
+    try:
+        import psutil
+    except ImportError:
+        if os.name != "nt": return set()
+        out = subprocess.run(["tasklist","/FI",f"IMAGENAME eq {DESIGNER_IMAGE}","/FO","CSV","/NH"],capture_output=True,text=True).stdout
+        return {int(line.split('","')[1]) for line in out.splitlines() if line.startswith('"')}
+    return {process.pid for process in psutil.process_iter(["name"]) if process.info["name"] == DESIGNER_IMAGE}
+
+def KillDesigner(app:SuperProDesigner) -> bool:
+    """
+    Default kill of Supervisor, terminates the process app.pid. Returns False when the process is not known.
+    """
+    pid = getattr(app,"pid",None)
+    if pid is None: return False
+    try:
+        os.kill(pid,signal.SIGTERM)  # TerminateProcess on Windows
+    except OSError:
+        pass  # Already gone
+    return True
+
+class _CallThread(threading.Thread):
+    """
+    The thread owning one SuperPro Designer instance (a single threaded apartment), running the calls queued as (future, call) in order.
+    A retired thread is abandoned to its current call and exits once that returns.
+    """
+    def __init__(self, apartment:Callable):
+        super().__init__(daemon=True,name="SuperProDesigner watchdog")
+        self.apartment = apartment
+        self.requests:queue.SimpleQueue = queue.SimpleQueue()
+        self.error:BaseException|None = None
+        self.retired = False
+        self.start()
+
+    def run(self):
+        try:
+            self.apartment()
+        except BaseException as e:
+            self.error = e
+        while True:
+            request = self.requests.get()
+            if request is None or self.retired: break
+            future,call = request
+            if not future.set_running_or_notify_cancel(): continue
+            try:
+                if self.error is not None: raise RuntimeError(f"COM apartment setup failed: {self.error!r}")
+                future.set_result(call())
+            except BaseException as e:
+                future.set_exception(e)
+
+    def Call(self, call:Callable, deadline:float|None):
+        """
+        Runs call on the thread and returns its result, raising concurrent.futures.TimeoutError when it takes longer than deadline seconds.
+        """
+        future = concurrent.futures.Future()
+        self.requests.put((future,call))
+        return future.result(deadline)
+
+    def Retire(self):
+        self.retired = True
+        self.requests.put(None)
+
+class RecoveryEvent(NamedTuple):
+    time:float  # time.time() when the failure was detected
+    method:str  # Method whose call hung or failed
+    cause:str  # "hang" (deadline overrun) or "crash" (the call failed and the COM server no longer answers)
+    error:str|None  # repr of the exception of a crash
+    downtime:float  # Seconds from the start of the failed call until the document was usable again
+    replayed:int  # Changes replayed on the reopened document
+
+class Supervisor:
+    """
+    Runs SuperPro Designer (made by factory) with the case case_path open on a thread of its own, every COM call having a deadline (deadlines by method name, over DEADLINES):
+
+        supervisor = Supervisor(case_path)
+        doc = supervisor.doc  # A SupervisedDocument, used like a SuperProDesignerDocument
+
+    When a call overruns its deadline, as when a modal dialog blocks the COM server, or fails with the COM server no longer answering,
+    the instance is killed (kill(app), KillDesigner by default) and replaced: the case is reopened and the changes made so far through the document are replayed (see SuperProDesignerDocument.ReplayFrom).
+    The call then raises ServerRestarted, the document being usable again, and ScenarioRunner retries the scenario (see OpenSupervised).
+    After max_restarts failed restarts in a row the call raises RuntimeError and the document is dead.
+    stats counts the "calls", "hangs", "crashes", "restarts", "failedRestarts", "unkilled" instances (whose process was not known) and "replayed" changes,
+    events lists the RecoveryEvents, downtime sums their downtime, and Report() sums it all up.
+    """
+    def __init__(self, case_path:str, factory:Callable=StartDesigner, kill:Callable=KillDesigner, deadlines:dict|None=None, default_deadline:float|None=DEFAULT_DEADLINE,
+                 probe_deadline:float=10.0, max_restarts:int=3, apartment:Callable=CoInitialize):
+        self.case_path = case_path
+        self.factory = factory
+        self.kill = kill
+        self.deadlines = dict(DEADLINES,**(deadlines or {}))
+        self.default_deadline = default_deadline
+        self.probe_deadline = probe_deadline
+        self.max_restarts = max_restarts
+        self.apartment = apartment
+        self.stats:Counter[str] = Counter()
+        self.events:list[RecoveryEvent] = []
+        self.downtime = 0.0
+        self.dead = False
+        self.app:SuperProDesigner|None = None
+        self._doc:SuperProDesignerDocument|None = None
+        self._thread:_CallThread|None = None
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        try:
+            self._start(None)
+        except BaseException:
+            self._kill()
+            raise
+        self.doc = SupervisedDocument(self)
+
+    def Deadline(self, method:str) -> float|None:
+        return self.deadlines.get(method,self.default_deadline)
+
+    def _start(self, old:SuperProDesignerDocument|None) -> int:
+        thread = self._thread = _CallThread(self.apartment)
+        app = self.app = thread.Call(self.factory,self.Deadline("start"))
+        doc = self._doc = thread.Call(lambda: app.OpenDoc(self.case_path),self.Deadline("OpenDoc"))
+        if old is None: return 0
+        return thread.Call(lambda: doc.ReplayFrom(old),self.Deadline("replay"))
+
+    def _kill(self):
+        thread,app = self._thread,self.app
+        self._thread = self.app = self._doc = None
+        if thread is not None: thread.Retire()
+        if app is None: return
+        try:
+            killed = self.kill(app)
+        except Exception:
+            killed = False
+        if not killed: self.stats["unkilled"] += 1
+
+    def _answers(self) -> bool:
+        thread,doc = self._thread,self._doc
+        try:
+            thread.Call(doc.IsCOMSimDataComplete,self.probe_deadline)
+            return True
+        except Exception:
+            return False
+
+    def _recover(self, old:SuperProDesignerDocument) -> int:
+        error = None
+        for _ in range(self.max_restarts):
+            self._kill()
+            try:
+                replayed = self._start(old)
+            except Exception as e:
+                self.stats["failedRestarts"] += 1
+                error = e
+                continue
+            self.stats["restarts"] += 1
+            self.stats["replayed"] += replayed
+            return replayed
+        self._kill()
+        self.dead = True
+        raise RuntimeError(f"Could not restart SuperPro Designer for {self.case_path}: {error!r}")
+
+    def Call(self, method:str, func:Callable, deadline=...):
+        """
+        Runs func(doc) on the COM thread within deadline seconds (by default the deadline of method), recovering the document when the call hangs or the COM server dies.
+        """
+        if deadline is ...: deadline = self.Deadline(method)
+        with self._lock:
+            if self.dead or self._thread is None: raise RuntimeError(f"The SuperPro Designer of {self.case_path} is {'dead' if self.dead else 'closed'}")
+            self.stats["calls"] += 1
+            start = time.monotonic()
+            doc = self._doc
+            try:
+                return self._thread.Call(functools.partial(func,doc),deadline)
+            except concurrent.futures.TimeoutError:
+                cause,error = "hang",None
+            except Exception as e:
+                if self._answers(): raise
+                cause,error = "crash",repr(e)
+            self.stats["hangs" if cause == "hang" else "crashes"] += 1
+            replayed = self._recover(doc)
+            downtime = time.monotonic()-start
+            self.downtime += downtime
+            self.events.append(RecoveryEvent(time.time(),method,cause,error,downtime,replayed))
+        what = f"hung for {deadline} s" if cause == "hang" else f"failed with {error}"
+        raise ServerRestarted(f"{method} {what}, SuperPro Designer was restarted and {replayed} changes replayed")
+
+    def HealthCheck(self) -> bool:
+        """
+        Recovers the document when its COM server does not answer IsCOMSimDataComplete within probe_deadline, e.g. between scenarios. Returns True if it answered.
+        """
+        with self._lock:
+            if self.dead or self._thread is None: return False
+            if self._answers(): return True
+            start,doc = time.monotonic(),self._doc
+            self.stats["hangs"] += 1
+            replayed = self._recover(doc)
+            downtime = time.monotonic()-start
+            self.downtime += downtime
+            self.events.append(RecoveryEvent(time.time(),"HealthCheck","hang",None,downtime,replayed))
+        return False
+
+    def Report(self) -> dict:
+        """
+        The stats with the "downtime" and the "availability" (share of the time since the supervisor was made that the document was usable).
+        """
+        elapsed = time.monotonic()-self._started
+        return dict(self.stats,downtime=self.downtime,availability=1.0-self.downtime/elapsed if elapsed > 0 else 1.0)
+
+    def close(self):
+        """
+        Closes SuperPro Designer without saving, killing it if it does not close within the deadline of "CloseApp".
+        """
+        with self._lock:
+            if self._thread is None: return
+            app = self.app
+            try:
+                self._thread.Call(lambda: (app.CloseAllDocs(False),app.CloseApp()),self.Deadline("CloseApp"))
+                self.app = None
+            except Exception:
+                pass
+            self._kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class _SupervisedApp:
+    """
+    Stands in for the COM application object of a SupervisedDocument: CloseApp closes the Supervisor.
+    """
+    def __init__(self, supervisor:Supervisor):
+        self.supervisor = supervisor
+
+    def CloseApp(self):
+        self.supervisor.close()
+
+class SupervisedDocument:
+    """
+    The document of a Supervisor: every SuperProDesignerDocument method runs on the COM thread with the deadline of its name and can raise ServerRestarted,
+    and the other attributes are those of the current document (doc, replaced on every restart).
+    Compound work that must run as one call, e.g. a doc.transaction() block, and the methods of UNSUPERVISED go through Run.
+    """
+    def __init__(self, supervisor:Supervisor):
+        self.supervisor = supervisor
+        self.app = SuperProDesigner(app=_SupervisedApp(supervisor),tables=supervisor.app.tables)
+
+    @property
+    def doc(self) -> SuperProDesignerDocument:
+        return self.supervisor._doc
+
+    def Run(self, func:Callable, *args, deadline=..., **kwargs):
+        """
+        Runs func(doc, *args, **kwargs) on the COM thread within deadline seconds (None for no limit, by default the deadline of the function's name).
+        """
+        return self.supervisor.Call(getattr(func,"__name__","Run"),lambda doc: func(doc,*args,**kwargs),deadline)
+
+    def __getattr__(self, name:str):
+        if name.startswith("__") or name in UNSUPERVISED: raise AttributeError(name)
+        attr = getattr(SuperProDesignerDocument,name,None)
+        if not inspect.isfunction(attr) or name.startswith("_"): return getattr(self.supervisor._doc,name)
+        if inspect.isgeneratorfunction(inspect.unwrap(attr)): raise AttributeError(name)
+        supervisor = self.supervisor
+        def method(*args, **kwargs):
+            return supervisor.Call(name,lambda doc: getattr(doc,name)(*args,**kwargs))
+        method.__name__ = name
+        setattr(self,name,method)
+        return method
+
+def OpenSupervised(case_path:str, factory:Callable=StartDesigner, kill:Callable=KillDesigner, **options) -> SupervisedDocument:
+    """
+    ScenarioRunner backend opening case_path under a Supervisor(case_path, factory, kill, **options),
+    e.g. functools.partial(OpenSupervised, deadlines={"Solve": 900}) or, on Linux, functools.partial(OpenSupervised, factory=FakeSuperProDesigner, kill=KillFakeApp).
+    """
+    return Supervisor(case_path,factory,kill,**options).doc
@@ -0,0 +1,125 @@
+"""
+Benchmarks of the SuperProDesigner wrapper layer against FakeDesigner, so they run without SuperPro Designer (and without comtypes).
+
+    python benchmarks/run.py --sizes 10 100 1000 --output results.json
+    python benchmarks/run.py --check                          # fail when over benchmarks/thresholds.json
+    python benchmarks/run.py --baseline old.json --max-regression 0.25
+
+With --latency 0 (the default) the time per COM call is the wrapper's own overhead.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from FakeDesigner import FakeSuperProDesigner
+from ScenarioRunner import RunScenario
+
+READ_VARS = ["massFlow_VID","volFlow_VID","temperature_VID","pressure_VID","isInputStream_VID"]
+
+def bench_enumerate(doc):
+    for list_key in ("flowsheet_CID.stream_LID","flowsheet_CID.unitProc_LID","flowsheet_CID.equipment_LID","flowsheet_CID.pureComp_LID"):
+        doc.EnumerateAll(list_key)
+
+def bench_read_loop(doc):
+    stream_vars = doc.app.stream_vars
+    for name in doc.EnumerateAll("flowsheet_CID.stream_LID"):
+        for key in READ_VARS: doc.GetStreamVarVal(name,stream_vars[key])
+
+def bench_snapshot(doc):
+    doc.Snapshot(streams=doc.EnumerateAll("flowsheet_CID.stream_LID"),stream_vars=READ_VARS)
+
+def bench_component_snapshot(doc):
+    doc.Snapshot(streams=doc.EnumerateAll("flowsheet_CID.stream_LID"),stream_vars=["componentMassFlow_VID"],components=doc.EnumerateAll("flowsheet_CID.pureComp_LID"))
+
+def bench_construct(doc):
+    for name in doc.EnumerateAll("flowsheet_CID.stream_LID"): doc.Stream(name)
+    for name in doc.EnumerateAll("flowsheet_CID.unitProc_LID"): doc.Procedure(name)
+
+def bench_bulk_write(doc):
+    massFlow = doc.app.stream_vars["massFlow_VID"]
+    for repeat in range(3):
+        for name in doc.EnumerateAll("flowsheet_CID.inStream_LID"): doc.SetStreamVarVal(name,massFlow,100.0+repeat)
+
+def bench_bulk_write_transaction(doc):
+    massFlow = doc.app.stream_vars["massFlow_VID"]
+    with doc.transaction(rollback=False):
+        for repeat in range(3):
+            for name in doc.EnumerateAll("flowsheet_CID.inStream_LID"): doc.SetStreamVarVal(name,massFlow,100.0+repeat)
+
+def bench_solve_loop(doc):
+    feed = doc.EnumerateAll("flowsheet_CID.inStream_LID")[0]
+    outputs = [("stream",name,"massFlow_VID") for name in doc.EnumerateAll("flowsheet_CID.outStream_LID")]
+    for i in range(10): RunScenario(doc,{("stream",feed,"massFlow_VID"):100.0+i},outputs)
+
+BENCHMARKS = {name[6:]:func for name,func in globals().items() if name.startswith("bench_")}
+
+def run(sizes:list[int], names:list[str], repeat:int, latency:float, solve_latency:float) -> dict:
+    results = {}
+    for size in sizes:
+        spd = FakeSuperProDesigner(n_streams=size,latency=latency,solve_latency=solve_latency)
+        for name in names:
+            best,calls = float("inf"),0
+            for _ in range(repeat):
+                # Every run gets a freshly opened document, so that no benchmark sees the values or caches left by another
+                doc = spd.OpenDoc("benchmark.spf")
+                start = time.perf_counter()
+                BENCHMARKS[name](doc)
+                best = min(best,time.perf_counter()-start)
+                calls = sum(doc.doc.calls.values())
+            results.setdefault(name,{})[str(size)] = {"seconds":best,"com_calls":calls,"us_per_call":1e6*best/calls if calls else None}
+    return results
+
+def check(results:dict, thresholds:dict, baseline:dict|None, max_regression:float) -> list[str]:
+    failures = []
+    for name,sizes in results.items():
+        limit = thresholds.get(name,{}).get("max_us_per_call")
+        for size,result in sizes.items():
+            if limit is not None and result["us_per_call"] is not None and result["us_per_call"] > limit:
+                failures.append(f"{name}[{size}]: {result['us_per_call']:.2f} us per COM call > {limit}")
+            expected = thresholds.get(name,{}).get("com_calls",{}).get(size)
+            if expected is not None and result["com_calls"] != expected:
+                failures.append(f"{name}[{size}]: {result['com_calls']} COM calls, expected {expected}")
+            old = (baseline or {}).get("results",{}).get(name,{}).get(size)
+            if old and result["seconds"] > old["seconds"]*(1+max_regression):
+                failures.append(f"{name}[{size}]: {result['seconds']:.4f} s is {result['seconds']/old['seconds']-1:.0%} slower than the baseline")
+            if old and result["com_calls"] > old["com_calls"]:
+                failures.append(f"{name}[{size}]: {result['com_calls']} COM calls, the baseline made {old['com_calls']}")
+    return failures
+
+def main(argv:list[str]|None=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__,formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes",type=int,nargs="+",default=[10,100,1000],help="Number of streams of the synthetic flowsheets (10 to 10000)")
+    parser.add_argument("--benchmarks",nargs="+",default=list(BENCHMARKS),choices=list(BENCHMARKS))
+    parser.add_argument("--repeat",type=int,default=3)
+    parser.add_argument("--latency",type=float,default=0.0,help="Seconds per simulated COM call")
+    parser.add_argument("--solve-latency",type=float,default=0.0,help="Seconds per simulated DoMEBalances")
+    parser.add_argument("--output",help="Write the results as JSON to this file instead of stdout")
+    parser.add_argument("--check",action="store_true",help="Fail when a result exceeds benchmarks/thresholds.json or makes another number of COM calls than it lists")
+    parser.add_argument("--thresholds",default=os.path.join(os.path.dirname(os.path.abspath(__file__)),"thresholds.json"))
+    parser.add_argument("--baseline",help="Results of an earlier run to compare against")
+    parser.add_argument("--max-regression",type=float,default=0.25,help="Allowed relative slowdown against the baseline")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes,args.benchmarks,args.repeat,args.latency,args.solve_latency)
+    report = {"config":{key:val for key,val in vars(args).items() if key in ("sizes","repeat","latency","solve_latency")},"results":results}
+    text = json.dumps(report,indent=2)
+    if args.output:
+        with open(args.output,'w',encoding='utf-8') as f: f.write(text)
+    else:
+        print(text)
+
+    thresholds = {}
+    if args.check:
+        with open(args.thresholds,encoding='utf-8') as f: thresholds = json.load(f)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline,encoding='utf-8') as f: baseline = json.load(f)
+    failures = check(results,thresholds,baseline,args.max_regression)
+    for failure in failures: print(failure,file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
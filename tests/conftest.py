@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from FakeDesigner import FakeSuperProDesigner
+
+@pytest.fixture
+def doc():
+    """
+    A document of a FakeSuperProDesigner on a synthetic flowsheet of 12 streams (S-0 to S-3 inputs, S-8 to S-11 outputs).
+    """
+    return FakeSuperProDesigner(n_streams=12).OpenDoc("case.spf")
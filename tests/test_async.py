@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from AsyncDesigner import AsyncSuperProDesigner
+from FakeDesigner import FakeSuperProDesigner
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+def designer() -> AsyncSuperProDesigner:
+    return AsyncSuperProDesigner(factory=FakeSuperProDesigner,apartment=lambda: None,n_streams=12)
+
+def test_identical_reads_are_coalesced():
+    async def main():
+        async with designer() as app:
+            adoc = await app.OpenDoc("case.spf")
+            massFlow = adoc.doc.app.stream_vars["massFlow_VID"]
+            await adoc.IsCOMSimDataComplete()  # Start from an empty queue
+            adoc.doc.doc.calls.clear()
+            coalesced = app._thread.coalesced
+            values = await asyncio.gather(*(adoc.GetStreamVarVal("S-0",massFlow) for _ in range(20)))
+            assert len(set(values)) == 1
+            assert adoc.doc.doc.calls["GetStreamVarVal"]+app._thread.coalesced-coalesced == 20
+            assert adoc.doc.doc.calls["GetStreamVarVal"] < 20
+    run(main())
+
+def test_writes_split_coalescing():
+    async def main():
+        async with designer() as app:
+            adoc = await app.OpenDoc("case.spf")
+            massFlow = adoc.doc.app.stream_vars["massFlow_VID"]
+            first,_,second = await asyncio.gather(adoc.GetStreamVarVal("S-0",massFlow),adoc.SetStreamVarVal("S-0",massFlow,77.0),adoc.GetStreamVarVal("S-0",massFlow))
+            assert second == 77.0 and first != 77.0
+    run(main())
+
+def test_coalesced_results_are_copies():
+    async def main():
+        async with designer() as app:
+            adoc = await app.OpenDoc("case.spf")
+            await adoc.IsCOMSimDataComplete()
+            coalesced = app._thread.coalesced
+            snapshots = await asyncio.gather(*(adoc.Snapshot(streams=("S-0","S-1"),stream_vars=("massFlow_VID",)) for _ in range(3)))
+            assert app._thread.coalesced > coalesced
+            snapshots[0]["stream"]["massFlow_VID"][0] = -1.0
+            assert all(snapshot["stream"]["massFlow_VID"][0] != -1.0 for snapshot in snapshots[1:])
+    run(main())
+
+def test_timeout():
+    async def main():
+        async with designer() as app:
+            adoc = await app.OpenDoc("case.spf")
+            with pytest.raises(asyncio.TimeoutError):
+                await adoc.run(lambda doc: __import__("time").sleep(0.5),timeout=0.05)
+    run(main())
@@ -0,0 +1,20 @@
+import os
+import sys
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),"benchmarks"))
+import run as benchmarks
+
+def test_benchmarks_do_not_depend_on_each_other():
+    alone = benchmarks.run([10],["bulk_write_transaction"],1,0.0,0.0)
+    after = benchmarks.run([10],["bulk_write","bulk_write_transaction"],2,0.0,0.0)
+    assert after["bulk_write_transaction"]["10"]["com_calls"] == alone["bulk_write_transaction"]["10"]["com_calls"]
+
+def test_transaction_benchmark_writes():
+    results = benchmarks.run([10],["bulk_write","bulk_write_transaction"],1,0.0,0.0)
+    # 3 input streams: the plain loop sends 3 x 3 writes, the transaction only the last value of each
+    assert results["bulk_write"]["10"]["com_calls"]-results["bulk_write_transaction"]["10"]["com_calls"] == 6
+
+def test_check_flags_call_count_changes():
+    results = {"bulk_write":{"10":{"seconds":0.001,"com_calls":20,"us_per_call":1.0}}}
+    assert benchmarks.check(results,{"bulk_write":{"com_calls":{"10":24}}},None,0.25)
+    assert not benchmarks.check(results,{"bulk_write":{"com_calls":{"10":20}}},None,0.25)
@@ -0,0 +1,40 @@
+import pytest
+
+RECIPE = {"C-0":("compMassFrac_VID",1.0),"C-1":("compMassFrac_VID",3.0),"Air":("compMassFrac_VID",4.0)}
+
+@pytest.fixture
+def mixture_doc(doc):
+    doc.doc._list("flowsheet_CID.stockMix_LID").append("Air")
+    return doc
+
+def test_set_compositions(mixture_doc):
+    doc = mixture_doc
+    counts = doc.set_compositions({"S-0":RECIPE})
+    assert counts["added"] == 3
+    assert sorted(doc.EnumerateAll("stream_CID.pureComp_LID","S-0")) == ["C-0","C-1"]
+    assert doc.EnumerateAll("stream_CID.stockMix_LID","S-0") == ("Air",)
+    compFrac = doc.app.stream_vars["compMassFrac_VID"]
+    assert doc.GetStreamVarVal("S-0",compFrac,"Air") == pytest.approx(0.5)
+    assert doc.IsInputStreamCompositionValid("S-0")
+
+def test_set_compositions_resends_nothing(mixture_doc):
+    doc = mixture_doc
+    doc.set_compositions({"S-0":RECIPE})
+    doc.doc.calls.clear()
+    counts = doc.set_compositions({"S-0":RECIPE})
+    # The stock mixture is read back like the pure components, so re-applying the recipe sends nothing
+    assert counts == {"removed":0,"added":0,"unchanged":3}
+    assert doc.doc.calls["AddIngredientToInputStream"] == 0
+    assert doc.doc.calls["RemoveIngredientFromInputStream"] == 0
+
+def test_set_compositions_removes_mixture(mixture_doc):
+    doc = mixture_doc
+    doc.set_compositions({"S-0":RECIPE})
+    counts = doc.set_compositions({"S-0":{"C-0":("compMassFrac_VID",1.0)}})
+    assert counts["removed"] == 2
+    assert doc.EnumerateAll("stream_CID.stockMix_LID","S-0") == ()
+    assert doc.EnumerateAll("stream_CID.pureComp_LID","S-0") == ("C-0",)
+
+def test_set_compositions_rejects_mixed_keys(doc):
+    with pytest.raises(ValueError):
+        doc.set_compositions({"S-0":{"C-0":("compMassFrac_VID",1.0),"C-1":("componentMassFlow_VID",1.0)}})
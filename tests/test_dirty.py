@@ -0,0 +1,81 @@
+import pytest
+
+FEED = ("stream","S-0","massFlow_VID")
+OUTPUTS = [("stream","S-11","massFlow_VID")]
+
+@pytest.fixture
+def solved(doc):
+    doc.Solve(OUTPUTS)
+    assert doc.dirty == frozenset()
+    doc.doc.calls.clear()
+    return doc
+
+def solves(doc) -> tuple[int,int]:
+    return doc.doc.calls["DoMEBalances"],doc.doc.calls["DoEconomicCalculations"]
+
+def test_new_document_is_dirty(doc):
+    assert doc.dirty == {"simulation","economics"}
+
+def test_var_classes(doc):
+    app = doc.app
+    assert app.VarClass("stream",app.stream_vars["massFlow_VID"]) == "simulation"
+    assert app.VarClass("stream",app.stream_vars["streamPrice_VID"]) == "economics"
+    assert app.VarClass("equipment",app.equipment_vars["description_VID"]) == "cosmetic"
+
+def test_cosmetic_write_leaves_document_clean(solved):
+    solved.ApplyInputs({("equipment","E-0","description_VID"):"Main reactor"})
+    assert solved.dirty == frozenset()
+    skipped = solved.solveStats["economicsSkipped"]
+    solved.Solve(OUTPUTS)
+    assert solves(solved) == (0,0)
+    assert solved.solveStats["economicsSkipped"] == skipped+1
+
+def test_economic_write_reruns_only_economics(solved):
+    solved.ApplyInputs({("stream","S-0","streamPrice_VID"):2.5})
+    assert solved.dirty == {"economics"}
+    solved.Solve(OUTPUTS)
+    assert solves(solved) == (0,1)
+    assert solved.dirty == frozenset()
+
+def test_simulation_write_reruns_both(solved):
+    solved.ApplyInputs({FEED:42.0})
+    assert solved.dirty == {"simulation","economics"}
+    solved.Solve(OUTPUTS)
+    assert solves(solved) == (1,1)
+    solved.Solve(OUTPUTS,economics=False)
+    assert solves(solved) == (1,1)
+
+def test_pending_transaction_writes_are_dirty(solved):
+    with solved.transaction(rollback=False):
+        solved.ApplyInputs({("equipment","E-0","equipPC_VID"):1e6})
+        assert solved.dirty == {"economics"}
+        solved.ApplyInputs({FEED:42.0})
+        assert solved.dirty == {"simulation","economics"}
+        assert solves(solved) == (0,0)
+        assert solved.ensure_solved()
+        assert solves(solved) == (1,0)
+
+def test_undo_marks_simulation_dirty(solved):
+    solved.StartUndoLog()
+    solved.ApplyInputs({FEED:42.0})
+    solved.Solve(OUTPUTS)
+    assert solved.Undo()
+    assert "simulation" in solved.dirty
+
+def test_ingredient_change_marks_simulation_dirty(solved):
+    compFlow = solved.app.stream_vars["componentMassFlow_VID"]
+    assert solved.AddIngredientToInputStream("S-0","C-4",compFlow,5.0)
+    assert solved.dirty == {"simulation","economics"}
+    solved.Solve(OUTPUTS)
+    assert solved.RemoveIngredientFromInputStream("S-0","C-4")
+    assert solved.dirty == {"simulation","economics"}
+
+def test_scale_up_marks_simulation_dirty(solved):
+    assert solved.ScaleUpThroughput(2.0)
+    assert solved.dirty == {"simulation","economics"}
+
+def test_failed_solve_stays_dirty(solved):
+    solved.ApplyInputs({FEED:42.0})
+    solved.doc.complete = False
+    with pytest.raises(RuntimeError): solved.Solve(OUTPUTS)
+    assert "simulation" in solved.dirty
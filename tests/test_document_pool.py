@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from DocumentPool import DocumentPool
+from FakeDesigner import FakeSuperProDesigner
+
+@pytest.fixture
+def case(tmp_path):
+    path = tmp_path/"case.spf"
+    path.write_bytes(b"case")
+    return str(path)
+
+def _pool(tmp_path, **options):
+    return DocumentPool(factory=lambda: FakeSuperProDesigner(n_streams=12),directory=str(tmp_path/"copies"),**options)
+
+def test_undo_reset(tmp_path, case):
+    with _pool(tmp_path) as pool:
+        with pool.Lease(case) as doc:
+            massFlow = doc.app.stream_vars["massFlow_VID"]
+            before = doc.GetStreamVarVal("S-0",massFlow)
+            doc.SetStreamVarVal("S-0",massFlow,before+50.0)
+        with pool.Lease(case) as again:
+            assert again is doc
+            assert again.GetStreamVarVal("S-0",massFlow) == before
+        assert pool.stats["undone"] == 2
+        assert pool.stats["reused"] == 1
+        assert pool.stats["opened"] == 1
+        assert pool.stats["reopened"] == 0
+
+def test_reopen_reset(tmp_path, case):
+    with _pool(tmp_path,reset="reopen") as pool:
+        with pool.Lease(case) as doc: pass
+        with pool.Lease(case) as again: assert again is not doc
+        assert pool.stats["reopened"] == 2
+        assert pool.stats["opened"] == 3
+        assert pool.stats["apps"] == 1
+
+def test_reopen_when_undo_impossible(tmp_path, case):
+    with _pool(tmp_path) as pool:
+        with pool.Lease(case) as doc:
+            doc.RemoveIngredientFromInputStream("S-0",doc.EnumerateAll("stream_CID.pureComp_LID","S-0")[0])
+        assert pool.stats["reopened"] == 1
+        assert pool.stats["undone"] == 0
+
+def test_failed_unhealthy_lease_drops_app(tmp_path, case):
+    with _pool(tmp_path) as pool:
+        with pytest.raises(RuntimeError):
+            with pool.Lease(case) as doc:
+                doc.app.app.Kill()
+                raise RuntimeError("lessee failed")
+        assert pool.stats["unhealthy"] == 1
+        assert pool.apps == 0
+        with pool.Lease(case): pass
+        assert pool.stats["apps"] == 2
+
+def test_idle_apps_closed_outside_lock(tmp_path, case):
+    with _pool(tmp_path,idle_timeout=0.0) as pool:
+        with pool.Lease(case) as doc: pass
+        app = doc.app.app
+        close,held = app.CloseApp,[]
+        def CloseApp():
+            # The pool's lock must be free for other threads while the instance closes
+            acquired = []
+            def probe():
+                acquired.append(pool._cond.acquire(blocking=False))
+                if acquired[0]: pool._cond.release()
+            thread = threading.Thread(target=probe)
+            thread.start()
+            thread.join()
+            held.append(not acquired[0])
+            close()
+        app.CloseApp = CloseApp
+        time.sleep(0.01)
+        with pool.Lease(case) as again: assert again is not doc
+        assert held == [False]
+        assert app.closed
+        assert pool.stats["evictedApps"] == 1
+        assert pool.apps == 1
+
+def test_lease_timeout(tmp_path, case):
+    with _pool(tmp_path) as pool:
+        with pool.Lease(case):
+            with pytest.raises(TimeoutError): pool.Lease(case,timeout=0.01)
@@ -0,0 +1,34 @@
+import pytest
+
+MIXTURES = "flowsheet_CID.stockMix_LID"
+
+@pytest.mark.parametrize("names",[[],["Air"],["Air","Brine","Media"]])
+def test_last_item_is_returned(doc, names):
+    doc.doc._list(MIXTURES).extend(names)
+    assert doc.EnumerateAll(MIXTURES) == tuple(names)
+    assert list(doc.Enumerator(doc.app.enum_vars["flowsheet_CID"]["stockMix_LID"])) == names
+    assert doc.EnumerateMany([MIXTURES])[MIXTURES] == tuple(names)
+
+def test_two_container_lists(doc):
+    assert doc.EnumerateAll("unitProc_CID.operation_LID","P-0") == tuple(doc.doc._list("unitProc_CID.operation_LID","P-0"))
+    assert len(doc.EnumerateAll("flowsheet_CID.stream_LID")) == 12
+
+def test_memo_is_reused(doc):
+    doc.EnumerateAll(MIXTURES,memo=True)
+    doc.doc._list(MIXTURES).append("Air")
+    assert doc.EnumerateAll(MIXTURES,memo=True) == ()
+    assert doc.EnumerateAll(MIXTURES) == ("Air",)
+
+def test_memo_invalidated_by_rename(doc):
+    streams = doc.EnumerateAll("flowsheet_CID.stream_LID",memo=True)
+    assert doc.RenameStream("S-0","Feed")
+    renamed = doc.EnumerateAll("flowsheet_CID.stream_LID",memo=True)
+    assert "Feed" in renamed and "S-0" not in renamed and len(renamed) == len(streams)
+    assert doc.EnumerateMany(["flowsheet_CID.stream_LID"],memo=True)["flowsheet_CID.stream_LID"] == renamed
+
+def test_memo_invalidated_by_solve(doc):
+    doc.EnumerateMany([MIXTURES],memo=True)
+    doc.doc._list(MIXTURES).append("Air")
+    assert doc.DoMEBalances()
+    assert doc.EnumerateAll(MIXTURES,memo=True) == ("Air",)
+    assert doc.EnumerateMany([MIXTURES],memo=True)[MIXTURES] == ("Air",)
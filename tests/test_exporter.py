@@ -0,0 +1,74 @@
+import csv
+import json
+
+import pytest
+
+from Exporter import CSVSink, Export, NDJSONSink, ParquetSink, SweepSink
+from ScenarioRunner import ScenarioResult
+
+A = ("stream","S-0","massFlow_VID")
+B = ("stream","S-1","massFlow_VID")
+OUT = ("stream","S-11","massFlow_VID")
+
+def read_csv(path) -> list[dict]:
+    with open(path,encoding='utf-8',newline='') as f: return list(csv.DictReader(f))
+
+def test_csv_rejects_unknown_columns(tmp_path):
+    with CSVSink(str(tmp_path/"rows.csv")) as sink:
+        sink.write({"a":1})
+        with pytest.raises(ValueError):
+            sink.write({"a":2,"b":3})
+
+def test_ndjson_takes_any_columns(tmp_path):
+    with NDJSONSink(str(tmp_path/"rows.ndjson")) as sink:
+        sink.write({"a":1})
+        sink.write({"b":2})
+    with open(tmp_path/"rows.ndjson",encoding='utf-8') as f: assert [json.loads(line) for line in f] == [{"a":1},{"b":2}]
+
+def test_sweep_with_declared_inputs_keeps_every_column(tmp_path):
+    path = str(tmp_path/"sweep.csv")
+    with SweepSink(CSVSink(path),[OUT],inputs=[A,B]) as sweep:
+        sweep.write(ScenarioResult(0,{A:1.0},[5.0],None,1))
+        sweep.write(ScenarioResult(1,{B:2.0},[6.0],None,1))
+    rows = read_csv(path)
+    assert rows[0]["in:stream:S-0:massFlow_VID"] == "1.0" and rows[0]["in:stream:S-1:massFlow_VID"] == ""
+    assert rows[1]["in:stream:S-1:massFlow_VID"] == "2.0" and rows[1]["out:stream:S-11:massFlow_VID"] == "6.0"
+
+def test_sweep_without_declared_inputs_raises_on_a_new_address(tmp_path):
+    with SweepSink(CSVSink(str(tmp_path/"sweep.csv")),[OUT]) as sweep:
+        sweep.write(ScenarioResult(0,{A:1.0},[5.0],None,1))
+        with pytest.raises(ValueError):
+            sweep.write(ScenarioResult(1,{B:2.0},[6.0],None,1))
+
+def test_sweep_completed_leaves_out_failures(tmp_path):
+    path = str(tmp_path/"sweep.csv")
+    with SweepSink(CSVSink(path),[OUT]) as sweep:
+        sweep.write(ScenarioResult(0,{A:1.0},[5.0],None,1))
+        sweep.write(ScenarioResult(1,{A:2.0},None,"RuntimeError()",3))
+    assert SweepSink(CSVSink(path),[OUT]).completed == {0}
+
+def test_parquet_types_are_pinned(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+    path = str(tmp_path/"sweep")
+    with SweepSink(ParquetSink(path,row_group_size=1),[OUT],inputs=[A]) as sweep:
+        sweep.write(ScenarioResult(0,{A:1.0},None,"RuntimeError()",1))  # All-null outputs in the first part
+        sweep.write(ScenarioResult(1,{A:2.0},[6.0],None,1))
+    table = pyarrow.parquet.read_table(path)
+    assert table.schema.field("out:stream:S-11:massFlow_VID").type == pa.float64()
+    assert table.column("out:stream:S-11:massFlow_VID").to_pylist() == [None,6.0]
+
+def test_parquet_needs_types_of_null_columns(tmp_path):
+    pytest.importorskip("pyarrow")
+    sink = ParquetSink(str(tmp_path/"rows"))
+    sink.write({"a":1.0,"b":None})
+    with pytest.raises(ValueError):
+        sink.flush()
+
+def test_export_resumes(doc, tmp_path):
+    path = str(tmp_path/"export.csv")
+    with CSVSink(path,row_group_size=7) as sink:
+        total = Export(doc,sink,what=("procedure",))
+    with CSVSink(path,row_group_size=7) as sink:
+        assert Export(doc,sink,what=("procedure",)) == 0
+    assert len(read_csv(path)) == total
@@ -0,0 +1,106 @@
+import pytest
+
+@pytest.fixture
+def flowsheet(doc):
+    flowsheet = doc.flowsheet
+    # Enumerate every kind of list once
+    flowsheet.streams,flowsheet.inputStreams,flowsheet.procedures,flowsheet.equipment,flowsheet.operations,flowsheet.procedureEquipment
+    flowsheet.streams["S-0"].components,flowsheet.equipment["E-0"].procedures
+    doc.doc.calls.clear()
+    return flowsheet
+
+def enumerations(flowsheet) -> int:
+    return flowsheet.doc.doc.calls["StartEnumeration"]
+
+def test_lists_are_enumerated_once(doc):
+    flowsheet = doc.flowsheet
+    assert list(flowsheet.streams) == [f"S-{i}" for i in range(12)]
+    assert list(flowsheet.inputStreams) == [f"S-{i}" for i in range(4)]
+    assert enumerations(flowsheet) == 2
+    flowsheet.streams,flowsheet.inputStreams
+    assert enumerations(flowsheet) == 2
+    assert flowsheet.refresh() == set() and enumerations(flowsheet) == 2
+
+def test_handles_are_shared(flowsheet):
+    assert flowsheet.streams["S-0"] is flowsheet.inputStreams["S-0"]
+    assert flowsheet.procedures["P-0"] is flowsheet.equipment["E-0"].procedures["P-0"]
+    assert flowsheet.operations[("P-0","Agitate-1")].procedure is flowsheet.procedures["P-0"]
+    assert flowsheet.procedures["P-0"].equipment is flowsheet.equipment["E-0"]
+
+def test_attributes_are_fetched_once(flowsheet):
+    stream = flowsheet.streams["S-0"]
+    assert stream.isInput and not stream.isOutput
+    calls = flowsheet.doc.doc.calls["GetStreamVarVal"]
+    assert stream.isInput and not stream.isOutput
+    assert flowsheet.doc.doc.calls["GetStreamVarVal"] == calls
+    assert flowsheet.outputStreams["S-11"].isOutput
+
+def test_procedure_equipment_from_index(doc):
+    flowsheet = doc.flowsheet
+    assert flowsheet.procedureEquipment["P-1"] == "E-1"
+    assert flowsheet.procedures["P-1"].equipment.name == "E-1"
+    assert doc.doc.calls["GetUPVarVal"] == 0
+
+def test_refresh_enumerates_only_dirty_lists(flowsheet):
+    assert flowsheet.doc.RenameOperation("P-0","Agitate-1","Mix-1")
+    assert flowsheet._dirty == {("unitProc_CID","operation_LID","P-0")}
+    assert flowsheet.refresh() == {("unitProc_CID","operation_LID","P-0")}
+    assert enumerations(flowsheet) == 1
+    assert flowsheet.refresh() == set() and enumerations(flowsheet) == 1
+
+def test_refresh_everything_picks_up_outside_edits(flowsheet):
+    flowsheet.doc.doc._list("flowsheet_CID.stream_LID").append("S-12")
+    assert "S-12" not in flowsheet.streams
+    assert flowsheet.refresh() == set()
+    assert flowsheet.refresh(everything=True) == {("flowsheet_CID","stream_LID",'')}
+    assert enumerations(flowsheet) == len(flowsheet._lists)
+    assert "S-12" in flowsheet.streams
+
+def test_rename_stream(flowsheet):
+    other = flowsheet.streams["S-1"]
+    components = flowsheet.streams["S-0"].components
+    assert flowsheet.doc.RenameStream("S-0","Feed")
+    assert list(flowsheet.streams)[0] == "Feed" and "S-0" not in flowsheet.streams
+    assert "Feed" in flowsheet.inputStreams and "S-0" not in flowsheet.inputStreams
+    feed = flowsheet.streams["Feed"]
+    assert feed.name == "Feed" and feed is flowsheet.inputStreams["Feed"]
+    assert feed.components == components
+    assert flowsheet.streams["S-1"] is other
+    # Lists of the old name are gone rather than enumerated again
+    assert ("stream_CID","pureComp_LID","S-0") not in flowsheet._lists
+    assert flowsheet.refresh() == set()
+
+def test_rename_procedure(flowsheet):
+    operations = flowsheet.procedures["P-0"].operations
+    assert flowsheet.doc.RenameProcedure("P-0","Fermentation")
+    procedure = flowsheet.procedures["Fermentation"]
+    assert "P-0" not in flowsheet.procedures and procedure.name == "Fermentation"
+    assert list(procedure.operations) == list(operations)
+    assert ("Fermentation","Agitate-1") in flowsheet.operations and ("P-0","Agitate-1") not in flowsheet.operations
+    assert flowsheet.operations[("Fermentation","Agitate-1")].procedure is procedure
+    assert flowsheet.equipment["E-0"].procedures == {"Fermentation":procedure}
+    assert flowsheet.procedureEquipment["Fermentation"] == "E-0" and "P-0" not in flowsheet.procedureEquipment
+    assert ("unitProc_CID","operation_LID","P-0") not in flowsheet._lists
+
+def test_rename_equipment(flowsheet):
+    procedure = flowsheet.procedures["P-0"]
+    assert procedure.equipment.name == "E-0"
+    assert flowsheet.doc.RenameEquipment("E-0","Fermentor")
+    assert "Fermentor" in flowsheet.equipment and "E-0" not in flowsheet.equipment
+    assert procedure.equipment.name == "Fermentor" and procedure.equipment is flowsheet.equipment["Fermentor"]
+    assert flowsheet.equipment["Fermentor"].procedures == {"P-0":procedure}
+    assert flowsheet.procedureEquipment["P-0"] == "Fermentor"
+    assert ("equipment_CID","unitProc_LID","E-0") not in flowsheet._lists
+
+def test_rename_operation(flowsheet):
+    procedure = flowsheet.procedures["P-0"]
+    assert flowsheet.doc.RenameOperation("P-0","Agitate-1","Mix-1")
+    assert list(procedure.operations) == ["Charge-1","Mix-1","Transfer Out-1"]
+    assert procedure.operations["Mix-1"].name == ("P-0","Mix-1")
+    assert ("P-0","Agitate-1") not in flowsheet.operations
+    # Other procedures keep their lists
+    assert enumerations(flowsheet) == 1
+
+def test_failed_rename_leaves_lists_clean(flowsheet):
+    assert not flowsheet.doc.RenameStream("S-0","S-1")
+    assert flowsheet._dirty == set()
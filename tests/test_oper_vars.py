@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+AGITATE = ("P-0","Agitate-1")
+
+def test_default_operations_and_variables(doc):
+    table = doc.GetOperVars()
+    assert table["names"] == tuple((f"P-{i}",oper) for i in range(4) for oper in ("Charge-1","Agitate-1","Transfer Out-1"))
+    assert table["components"] == ()
+    assert set(table) == {"names","components","startTime_VID","endTime_VID","processTime_VID"}
+    i = table["names"].index(AGITATE)
+    assert (table["startTime_VID"][i],table["processTime_VID"][i],table["endTime_VID"][i]) == (0.5,2.0,2.5)
+    assert table["processTime_VID"].shape == (12,)
+    # The operation lists are enumerated once
+    enumerations = doc.doc.calls["StartEnumeration"]
+    doc.GetOperVars()
+    assert doc.doc.calls["StartEnumeration"] == enumerations == 5
+
+def test_component_and_operation_type_variables(doc):
+    splits = doc.app.VarID("operation","componentSplits_VID")
+    for j,comp in enumerate(("C-0","C-1")): assert doc.SetOperVarVal(*AGITATE,splits,0.25*(j+1),comp)
+    ops = [AGITATE,("P-1","Agitate-1"),("P-0","Missing")]
+    table = doc.GetOperVars(ops,["componentSplits_VID","heatingDuty_VID","opDescr_VID"],components=["C-0","C-1"])
+    assert table["componentSplits_VID"].shape == (3,2) and table["heatingDuty_VID"].shape == (3,)
+    assert table["componentSplits_VID"][0].tolist() == [0.25,0.5]
+    assert np.isnan(table["componentSplits_VID"][2]).all() and np.isnan(table["heatingDuty_VID"][2])
+    assert doc.doc.calls["GetOperVarVal2"] == 6 and doc.doc.calls["GetOperVarVal"] == 6
+
+def test_text_variables(doc):
+    doc.SetOperVarVal(*AGITATE,doc.app.VarID("operation","opDescr_VID"),"Ferment")
+    column = doc.GetOperVars([AGITATE,("P-0","Missing")],["opDescr_VID"])["opDescr_VID"]
+    assert column.dtype == object and column.tolist() == ["Ferment",None]
+
+def test_unknown_variable_key(doc):
+    with pytest.raises(KeyError): doc.GetOperVars([AGITATE],["noSuchVar_VID"])
+
+@pytest.mark.parametrize("qualifier,method",[((),"OperVarVal"),(("C-0",),"OperVarVal2"),(("C-0","S-1"),"OperVarVal3")])
+def test_oper_var_qualifiers(doc, qualifier, method):
+    VarID = doc.app.VarID("operation","componentSplits_VID")
+    assert doc.SetOperVarVal(*AGITATE,VarID,0.75,*qualifier)
+    assert doc.doc.calls["Set"+method] == 1
+    key = qualifier[0] if len(qualifier) == 1 else tuple(qualifier) if qualifier else ''
+    assert doc.doc.values[("operation",AGITATE,VarID,key)] == 0.75
+    doc.EnableCache()
+    assert doc.GetOperVarVal(*AGITATE,VarID,*qualifier) == 0.75
+    assert doc.doc.calls["Get"+method] == 1
+    assert doc.GetOperVarVal(*AGITATE,VarID,*qualifier) == 0.75
+    assert doc.doc.calls["Get"+method] == 1
+    # Other qualifiers are other values
+    assert doc.GetOperVarVal(*AGITATE,VarID,"C-1") == 0.0
+
+def test_oper_var_failures(doc):
+    VarID = doc.app.VarID("operation","processTime_VID")
+    assert doc.GetOperVarVal("P-0","Missing",VarID) is False
+    assert doc.GetOperVarVal("P-0","Missing",VarID,"C-0","S-1") is False
+    assert not doc.SetOperVarVal("P-0","Missing",VarID,1.0)
+    assert not doc.SetOperVarVal(*AGITATE,VarID,None)
+    assert doc.doc.calls["SetOperVarVal"] == 1
+
+def test_operation_wrapper(doc):
+    operation = doc.Procedure("P-0").Operation("Agitate-1")
+    VarID = doc.app.VarID("operation","componentSplits_VID")
+    assert operation.SetOperVarVal(VarID,0.5,"C-0","S-1")
+    assert operation.GetOperVarVal(VarID,"C-0","S-1") == 0.5
+    assert doc.doc.calls["SetOperVarVal3"] == doc.doc.calls["GetOperVarVal3"] == 1
+
+def test_oper_var3_in_transaction(doc):
+    VarID = doc.app.VarID("operation","componentSplits_VID")
+    with doc.transaction(rollback=False):
+        assert doc.SetOperVarVal(*AGITATE,VarID,0.5,"C-0","S-1")
+        assert doc.GetOperVarVal(*AGITATE,VarID,"C-0","S-1") == 0.5
+        assert doc.doc.calls["SetOperVarVal3"] == doc.doc.calls["GetOperVarVal3"] == 0
+    assert doc.doc.calls["SetOperVarVal3"] == 1
+    assert doc.doc.values[("operation",AGITATE,VarID,("C-0","S-1"))] == 0.5
+
+def test_up_var_val2(doc):
+    VarID = doc.app.procedure_vars["cycleTime_VID"]
+    assert doc.SetUPVarVal2("P-0",VarID,4.5,"Main")
+    assert doc.doc.calls["SetUPVarVal2"] == 1 and doc.doc.values[("procedure","P-0",VarID,"Main")] == 4.5
+    assert doc.GetUPVarVal2("P-0",VarID,"Main") == 4.5
+    assert doc.GetUPVarVal("P-0",VarID) == 3.0
+    assert doc.doc.calls["GetUPVarVal2"] == doc.doc.calls["GetUPVarVal"] == 1
+    assert doc.GetUPVarVal2("Missing",VarID,"Main") is False
@@ -0,0 +1,31 @@
+import math
+
+import pytest
+
+from FakeDesigner import FakeSuperProDesigner, QuadraticModel
+from Optimizer import Objective, Optimizer, Variable
+
+TIME = ("operation",("P-0","Agitate-1"),"processTime_VID")
+OUTPUT = ("procedure","P-0","cycleTime_VID")
+
+def optimizer(**options) -> Optimizer:
+    doc = FakeSuperProDesigner(n_streams=12,model=QuadraticModel({("operation",("P-0","Agitate-1"),"processTime_VID"):(3.0,1.0)},output=("procedure","P-0","cycleTime_VID"))).OpenDoc("case.spf")
+    return Optimizer([Variable(TIME,0.0,10.0,1.0)],[Objective(OUTPUT)],doc=doc,**options)
+
+@pytest.mark.parametrize("method",["nelder-mead","pattern","gradient"])
+def test_finds_the_optimum(method):
+    result = optimizer().minimize(method)
+    assert result.status in ("converged","maxiter")
+    assert result.x[TIME] == pytest.approx(3.0,abs=0.05)
+    assert result.value == pytest.approx(1.0,abs=1e-2)
+
+def test_failed_solves_are_not_an_optimum():
+    opt = optimizer()
+    opt.doc.doc.complete = False  # Every DoMEBalances fails
+    result = opt.minimize("gradient")
+    assert result.status == "failed"
+    assert math.isinf(result.value)
+
+def test_budget():
+    result = optimizer(budget=3).minimize("nelder-mead")
+    assert result.status == "budget" and result.solves == 3
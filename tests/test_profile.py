@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from FakeDesigner import FakeCOMError
+from Profiler import ComProfile, ProfiledDoc
+
+def test_call_counts(doc):
+    massFlow = doc.app.stream_vars["massFlow_VID"]
+    with doc.profile() as p:
+        for name in ("S-0","S-1","S-2"): doc.GetStreamVarVal(name,massFlow)
+        doc.EnumerateAll("flowsheet_CID.stream_LID")
+        doc.DoMEBalances()
+    assert p.stats["GetStreamVarVal"].calls == doc.doc.calls["GetStreamVarVal"] == 3
+    assert p.stats["DoMEBalances"].calls == 1
+    # The end of an enumeration is no failure
+    assert p.stats["GetNextItemName"].calls == 13 and p.stats["GetNextItemName"].failures == 0
+    assert p.calls == 3+1+13+1
+    assert all(len(stats.durations) == stats.calls for stats in p.stats.values())
+    assert list(p.Summary())[0] == max(p.stats,key=lambda method: p.stats[method].total)
+
+def test_failures_keep_error_message(doc):
+    massFlow = doc.app.stream_vars["massFlow_VID"]
+    with doc.profile() as p:
+        assert doc.GetStreamVarVal("Missing",massFlow) is False
+        assert doc.GetStreamVarVal("Gone",massFlow) is False
+        assert doc.GetStreamVarVal("S-0",massFlow) is not False
+    stats = p.stats["GetStreamVarVal"]
+    assert (stats.calls,stats.failures) == (3,2)
+    assert stats.errors == {"Unknown stream Missing":1,"Unknown stream Gone":1}
+    # Reading the message is not itself recorded
+    assert "GetCOMErrorMsg" not in p.stats
+
+def test_exceptions_are_recorded(doc, monkeypatch):
+    def fail(): raise FakeCOMError("server gone")
+    monkeypatch.setattr(doc.doc,"SaveDoc",fail,raising=False)
+    with doc.profile() as p:
+        with pytest.raises(FakeCOMError): doc.SaveDoc()
+    assert p.stats["SaveDoc"].failures == 1
+    assert p.stats["SaveDoc"].errors == {repr(FakeCOMError("server gone")):1}
+
+def test_open_metrics(doc):
+    with doc.profile() as p:
+        doc.GetStreamVarVal("S-0",doc.app.stream_vars["massFlow_VID"])
+        doc.GetStreamVarVal("Missing",doc.app.stream_vars["massFlow_VID"])
+    text = p.OpenMetrics()
+    lines = text.splitlines()
+    assert text.endswith("# EOF\n")
+    assert 'spd_com_calls_total{method="GetStreamVarVal"} 2' in lines
+    assert 'spd_com_failures_total{method="GetStreamVarVal"} 1' in lines
+    assert 'spd_com_latency_seconds_count{method="GetStreamVarVal"} 2' in lines
+    assert sum(line.startswith('spd_com_latency_seconds{method="GetStreamVarVal",quantile=') for line in lines) == 3
+    assert "# TYPE spd_com_latency_seconds summary" in lines
+    assert p.OpenMetrics(prefix="x").startswith("# TYPE x_calls counter")
+
+def test_chrome_trace(doc, tmp_path):
+    with doc.profile(trace=True) as p:
+        doc.GetStreamVarVal("S-0",doc.app.stream_vars["massFlow_VID"])
+        doc.GetStreamVarVal("Missing",doc.app.stream_vars["massFlow_VID"])
+    path = tmp_path/"trace.json"
+    p.WriteChromeTrace(str(path))
+    trace = json.loads(path.read_text())
+    events = trace["traceEvents"]
+    assert [event["name"] for event in events] == ["GetStreamVarVal"]*2
+    assert [event["cat"] for event in events] == ["com","com,failed"]
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
+    assert events[0]["ts"] <= events[1]["ts"]
+
+def test_trace_is_bounded(doc):
+    with doc.profile(ComProfile(trace=True,max_events=2)) as p:
+        for _ in range(5): doc.GetStreamVarVal("S-0",doc.app.stream_vars["massFlow_VID"])
+    assert len(p.events) == 2 and p.stats["GetStreamVarVal"].calls == 5
+
+def test_no_wrapping_outside_profile(doc):
+    raw = doc.doc
+    with doc.profile() as p:
+        assert isinstance(doc.doc,ProfiledDoc)
+    assert doc.doc is raw
+    doc.GetStreamVarVal("S-0",doc.app.stream_vars["massFlow_VID"])
+    assert p.calls == 0
+
+def test_nested_profiles_accumulate(doc):
+    massFlow = doc.app.stream_vars["massFlow_VID"]
+    total = ComProfile()
+    with doc.profile(total):
+        doc.GetStreamVarVal("S-0",massFlow)
+        with doc.profile() as inner:
+            doc.GetStreamVarVal("S-1",massFlow)
+        doc.GetStreamVarVal("S-2",massFlow)
+    with doc.profile(total):
+        doc.GetStreamVarVal("S-3",massFlow)
+    assert inner.calls == 1 and total.calls == 4
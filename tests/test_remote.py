@@ -0,0 +1,53 @@
+import pytest
+
+from FakeDesigner import OpenFakeCase
+from RemoteDesigner import DocumentServer, ServerPool
+
+AUTHKEY = b"test"
+
+def _backend(case_path:str):
+    if case_path == "bad.spf": raise ValueError(f"Cannot open {case_path}")
+    return OpenFakeCase(case_path,n_streams=12)
+
+@pytest.fixture
+def server():
+    server = DocumentServer(("127.0.0.1",0),AUTHKEY,backend=_backend)
+    server.start()
+    yield server
+    server.close()
+
+def test_remote_document(server):
+    pool = ServerPool([(*server.address,1)],AUTHKEY)
+    doc = pool("case.spf")
+    massFlow = doc.app.stream_vars["massFlow_VID"]
+    assert doc.SetStreamVarVal("S-0",massFlow,42.0)
+    assert doc.GetStreamVarVal("S-0",massFlow) == 42.0
+    assert doc.Batch([("GetStreamVarVal",("S-0",massFlow))]) == [42.0]
+    doc.app.CloseApp()
+    assert pool.busy[server.address] == 0
+    pool.close()
+
+def test_failed_open_frees_the_slot(server):
+    pool = ServerPool([(*server.address,2)],AUTHKEY)
+    for _ in range(3):
+        with pytest.raises(ValueError): pool("bad.spf")
+        assert pool.busy[server.address] == 0
+    # The server answered, so it is neither marked down nor failing and its connection is reused
+    assert pool.failures[server.address] == 0
+    assert server.connections == 1
+    docs = [pool("case.spf"),pool("case.spf")]
+    assert pool.busy[server.address] == 2
+    with pytest.raises(RuntimeError): pool("case.spf")
+    for doc in docs: doc.app.CloseApp()
+    assert pool.busy[server.address] == 0
+    assert server.connections == 2
+    pool.close()
+
+def test_unreachable_server_is_skipped(server):
+    pool = ServerPool([("127.0.0.1",1,4),(*server.address,1)],AUTHKEY)
+    doc = pool("case.spf")
+    assert doc.address == server.address
+    assert pool.failures[("127.0.0.1",1)] == 1
+    assert pool.busy == {("127.0.0.1",1):0,server.address:1}
+    doc.app.CloseApp()
+    pool.close()
@@ -0,0 +1,91 @@
+import functools
+import itertools
+import random
+
+import pytest
+
+from FakeDesigner import OpenFakeCase
+from ScenarioPlanner import PlanScenarios, RunPlanChunk
+from ScenarioRunner import ScenarioRunner
+
+A = ("stream","S-0","massFlow_VID")
+B = ("stream","S-1","massFlow_VID")
+C = ("stream","S-2","temperature_VID")
+OUTPUTS = [("stream","S-11","massFlow_VID")]
+
+def grid() -> list[dict]:
+    scenarios = [{A:a,B:b,C:c} for a,b,c in itertools.product([10.0,20.0,30.0],[1.0,2.0],[25.0,50.0])]
+    random.Random(0).shuffle(scenarios)
+    return scenarios
+
+def writes(plan) -> list[int]:
+    return [len(step) for step in plan.steps]
+
+def test_gray_order_on_full_grid():
+    scenarios = grid()
+    plan = PlanScenarios(scenarios)
+    assert sorted(plan.order) == list(range(len(scenarios)))
+    # After the first scenario every one changes a single value
+    assert writes(plan) == [3]+[1]*(len(scenarios)-1)
+    for k in range(1,len(plan)):
+        previous,current = scenarios[plan.order[k-1]],scenarios[plan.order[k]]
+        assert plan.steps[k] == {address:val for address,val in current.items() if previous[address] != val}
+    assert plan.expectedWrites == 3+len(scenarios)-1
+    assert plan.naiveWrites == 3*len(scenarios)
+
+def test_greedy_order():
+    scenarios = [{A:1.0,B:1.0},{A:5.0,B:5.0},{A:1.0,B:2.0}]
+    plan = PlanScenarios(scenarios)
+    assert plan.order == [0,2,1]
+    assert writes(plan) == [2,1,2]
+    assert plan.expectedWrites == 5
+
+def test_baseline_fills_left_out_addresses():
+    plan = PlanScenarios([{A:1.0,B:7.0},{A:2.0}],baseline={A:0.0,B:3.0})
+    assert plan.scenarios == [{A:1.0,B:7.0},{A:2.0,B:3.0}]
+    # The baseline already holds B of the second scenario, so it goes first
+    assert plan.order == [1,0]
+    assert plan.steps == [{A:2.0},{A:1.0,B:7.0}]
+
+def test_chunks_start_from_baseline():
+    plan = PlanScenarios(grid(),chunks=3)
+    assert [len(chunk) for chunk in plan.chunks] == [4,4,4]
+    assert [writes(plan)[chunk[0]] for chunk in plan.chunks] == [3,3,3]
+    assert plan.expectedWrites == 3*(3+3)
+
+def test_chunks_need_baseline_for_partial_scenarios():
+    with pytest.raises(ValueError): PlanScenarios([{A:1.0},{B:2.0}],chunks=2)
+    plan = PlanScenarios([{A:1.0},{B:2.0}],baseline={A:0.0,B:0.0},chunks=2)
+    assert len(plan.chunks) == 2
+
+def test_run():
+    scenarios = grid()
+    plan = PlanScenarios(scenarios)
+    doc = OpenFakeCase("case.spf",n_streams=12)
+    results = list(plan.Run(doc,OUTPUTS))
+    assert [result.index for result in results] == plan.order
+    assert all(result.ok for result in results)
+    assert plan.actualWrites == plan.expectedWrites
+    expected = OpenFakeCase("case.spf",n_streams=12)
+    for result in results:
+        expected.ApplyInputs(scenarios[result.index])
+        assert result.outputs == expected.Solve(OUTPUTS)
+
+def test_run_parallel():
+    scenarios = grid()
+    plan = PlanScenarios(scenarios,chunks=4)
+    runner = ScenarioRunner("case.spf",OUTPUTS,backend=functools.partial(OpenFakeCase,n_streams=12),task=RunPlanChunk,processes=False,max_workers=2)
+    results = sorted(plan.RunParallel(runner))
+    assert [result.index for result in results] == list(range(len(scenarios)))
+    assert all(result.ok for result in results)
+    # A chunk following another on the same worker can find values already in place
+    assert plan.actualWrites <= plan.expectedWrites
+    expected = OpenFakeCase("case.spf",n_streams=12)
+    for result in results:
+        expected.ApplyInputs(scenarios[result.index])
+        assert result.outputs == expected.Solve(OUTPUTS)
+    assert plan.Report()["chunks"] == 4
+
+def test_run_parallel_needs_plan_task():
+    runner = ScenarioRunner("case.spf",OUTPUTS,backend=functools.partial(OpenFakeCase,n_streams=12),processes=False)
+    with pytest.raises(ValueError): list(PlanScenarios(grid()).RunParallel(runner))
@@ -0,0 +1,69 @@
+import functools
+
+from FakeDesigner import FakeFaults, OpenFakeCase
+from ScenarioRunner import ScenarioRunner
+
+FEED = ("stream","S-0","massFlow_VID")
+OUTPUTS = [("stream","S-11","massFlow_VID")]
+
+def runner(backend=None, **options) -> ScenarioRunner:
+    options = {"processes":False,"max_workers":2,"poll_interval":0.05,**options}
+    return ScenarioRunner("case.spf",OUTPUTS,backend=backend or functools.partial(OpenFakeCase,n_streams=12),**options)
+
+def expected(flows) -> dict:
+    doc = OpenFakeCase("case.spf",n_streams=12)
+    return {i:doc.Solve(OUTPUTS) for i,flow in enumerate(flows) if doc.ApplyInputs({FEED:flow}) is not None}
+
+def test_results():
+    flows = [10.0,20.0,30.0,40.0,50.0]
+    results = sorted(runner().run([{FEED:flow} for flow in flows]))
+    assert [result.index for result in results] == list(range(5))
+    assert all(result.ok and result.attempts == 1 for result in results)
+    assert {result.index:result.outputs for result in results} == expected(flows)
+
+def test_skip():
+    results = list(runner().run([{FEED:1.0},{FEED:2.0},{FEED:3.0}],skip=[0,2]))
+    assert [result.index for result in results] == [1]
+
+def test_scenario_error_is_not_retried():
+    r = runner()
+    results = sorted(r.run([{("stream","nope","massFlow_VID"):1.0},{FEED:2.0}]))
+    assert not results[0].ok and results[0].attempts == 1 and "nope" in results[0].error
+    assert results[1].ok
+    assert r.restarts == 0
+
+def test_dead_worker_is_replaced_and_scenario_retried():
+    faults = FakeFaults()
+    faults.Crash("DoMEBalances")
+    r = runner(functools.partial(OpenFakeCase,n_streams=12,faults=faults),max_workers=1)
+    results = sorted(r.run([{FEED:10.0},{FEED:20.0}]))
+    assert all(result.ok for result in results)
+    assert [result.attempts for result in results] == [2,1]
+    assert r.restarts == 1
+    assert {result.index:result.outputs for result in results} == expected([10.0,20.0])
+
+def test_retries_run_out():
+    faults = FakeFaults()
+    faults.Crash("DoMEBalances",3)
+    r = runner(functools.partial(OpenFakeCase,n_streams=12,faults=faults),max_workers=1,retries=2)
+    [result] = r.run([{FEED:10.0}])
+    assert not result.ok and result.attempts == 3 and "RPC server" in result.error
+    assert r.restarts == 3
+
+def test_backend_failing_to_open():
+    def backend(case_path):
+        raise OSError("no licence")
+    [result] = runner(backend,max_workers=1,retries=1).run([{FEED:10.0}])
+    assert not result.ok and result.attempts == 2 and "no licence" in result.error
+
+def test_kept_workers():
+    with runner(max_workers=1) as r:
+        assert sorted(r.run([{FEED:1.0}]))[0].ok
+        worker = r._idle[0]
+        assert sorted(r.run([{FEED:2.0}]))[0].ok
+        assert r._idle == [worker]
+    assert not r._idle
+
+def test_processes():
+    results = list(runner(processes=True).run([{FEED:10.0},{FEED:20.0}]))
+    assert sorted(result.index for result in results if result.ok) == [0,1]
@@ -0,0 +1,13 @@
+import numpy as np
+
+from SuperProDesigner import Numbers
+
+def test_schedule_table(doc):
+    schedule = doc.schedule()
+    occupancy = schedule.Occupancy()
+    assert set(occupancy) == set(doc.EnumerateAll("flowsheet_CID.equipment_LID"))
+    assert all(0.0 <= row["utilization"] for row in occupancy.values())
+
+def test_numbers():
+    assert np.array_equal(Numbers(np.array([1,2])),[1.0,2.0])
+    assert np.array_equal(Numbers(np.array([1.5,None,"x",True],dtype=object)),[1.5,np.nan,np.nan,1.0],equal_nan=True)
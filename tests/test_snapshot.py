@@ -0,0 +1,60 @@
+import math
+
+import numpy as np
+
+def test_matches_single_reads(doc):
+    streams = ["S-0","S-9","Missing"]
+    snapshot = doc.Snapshot(streams=streams,stream_vars=["massFlow_VID","componentMassFlow_VID"],components=["C-0","C-1"],
+                            procedures=["P-0","P-1"],procedure_vars=["cycleTime_VID","equipmentName_VID"],equipment=["E-0","Missing"],equipment_vars=["description_VID"])
+    table = snapshot["stream"]
+    assert table["names"] == tuple(streams) and table["components"] == ("C-0","C-1")
+    massFlow,compFlow = doc.app.stream_vars["massFlow_VID"],doc.app.stream_vars["componentMassFlow_VID"]
+    for i,name in enumerate(streams[:2]):
+        assert table["massFlow_VID"][i] == doc.GetStreamVarVal(name,massFlow)
+        for j,comp in enumerate(("C-0","C-1")): assert table["componentMassFlow_VID"][i,j] == doc.GetStreamVarVal(name,compFlow,comp)
+    assert np.isnan(table["massFlow_VID"][2]) and np.isnan(table["componentMassFlow_VID"][2]).all()
+    assert list(snapshot["procedure"]["equipmentName_VID"]) == ["E-0","E-1"]
+    assert snapshot["procedure"]["cycleTime_VID"].tolist() == [3.0,3.0]
+    # Text columns hold None for failed reads
+    assert snapshot["equipment"]["description_VID"].tolist() == ["Equipment 0",None]
+
+def test_reuses_one_buffer_per_call(doc):
+    doc.Snapshot(streams=["S-0","S-1"],stream_vars=["massFlow_VID","temperature_VID"])
+    assert doc.doc.calls["GetStreamVarVal"] == 4
+    assert doc.Snapshot() == {}
+
+def test_sees_pending_transaction_writes(doc):
+    massFlow = doc.app.stream_vars["massFlow_VID"]
+    with doc.transaction():
+        doc.SetStreamVarVal("S-0",massFlow,42.0)
+        assert doc.Snapshot(streams=["S-0"],stream_vars=["massFlow_VID"])["stream"]["massFlow_VID"][0] == 42.0
+        assert doc.doc.calls["SetStreamVarVal"] == 0 and doc.doc.calls["GetStreamVarVal"] == 0
+
+def test_uses_value_cache(doc):
+    doc.EnableCache()
+    first = doc.Snapshot(streams=["S-0","S-1"],stream_vars=["massFlow_VID"])
+    assert doc.cache.misses == 2
+    second = doc.Snapshot(streams=["S-0","S-1"],stream_vars=["massFlow_VID"])
+    assert doc.doc.calls["GetStreamVarVal"] == 2 and doc.cache.hits == 2
+    assert (first["stream"]["massFlow_VID"] == second["stream"]["massFlow_VID"]).all()
+    assert doc.GetStreamVarVal("S-0",doc.app.stream_vars["massFlow_VID"]) == first["stream"]["massFlow_VID"][0]
+    assert doc.doc.calls["GetStreamVarVal"] == 2
+
+def test_set_compositions_in_transaction(doc):
+    compFlow = doc.app.stream_vars["componentMassFlow_VID"]
+    current = {comp:doc.GetStreamVarVal("S-0",compFlow,comp) for comp in doc.EnumerateAll("stream_CID.pureComp_LID","S-0")}
+    recipe = {comp:("componentMassFlow_VID",val) for comp,val in current.items()}
+    comp = next(iter(current))
+    with doc.transaction():
+        doc.SetStreamVarVal("S-0",compFlow,current[comp]+5.0,comp)
+        # The recipe restores the value the buffered write changed, so that one is sent again
+        assert doc.set_compositions({"S-0":recipe}) == {"removed":0,"added":1,"unchanged":len(current)-1}
+    assert math.isclose(doc.doc.values[("stream","S-0",compFlow,comp)],current[comp])
+
+def test_ingredient_change_flushes_transaction(doc):
+    compFlow = doc.app.stream_vars["componentMassFlow_VID"]
+    with doc.transaction():
+        doc.SetStreamVarVal("S-0",compFlow,5.0,"C-4")
+        assert doc.AddIngredientToInputStream("S-0","C-4",compFlow,7.0)
+        assert doc.doc.calls["SetStreamVarVal"] == 1
+    assert doc.doc.values[("stream","S-0",compFlow,"C-4")] == 7.0
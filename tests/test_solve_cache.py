@@ -0,0 +1,94 @@
+import itertools
+
+import pytest
+
+import SolveCache as solve_cache_module
+from FakeDesigner import FakeSuperProDesigner
+from SolveCache import SolveCache
+
+FEED = ("stream","S-0","massFlow_VID")
+OUTPUTS = [("stream","S-11","massFlow_VID"),("stream","S-10","massFlow_VID")]
+
+@pytest.fixture
+def case(tmp_path):
+    path = tmp_path/"case.spf"
+    path.write_bytes(b"case")
+    return str(path)
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SolveCache(str(tmp_path/"solves.db"))
+    yield cache
+    cache.close()
+
+def open_doc(case, cache):
+    doc = FakeSuperProDesigner(n_streams=12).OpenDoc(case)
+    doc.EnableSolveCache(cache)
+    return doc
+
+def solve(case, cache, inputs:dict, outputs=OUTPUTS, economics=True):
+    doc = open_doc(case,cache)
+    doc.ApplyInputs(inputs)
+    values = doc.Solve(outputs,economics)
+    return values,doc.doc.calls["DoMEBalances"]
+
+def test_hit_returns_stored_outputs_without_solving(case, cache):
+    values,solves = solve(case,cache,{FEED:42.0})
+    assert solves == 1 and cache.misses == 1
+    again,solves = solve(case,cache,{FEED:42.0})
+    assert solves == 0 and cache.hits == 1
+    assert again == values
+
+def test_changed_input_misses(case, cache):
+    values,_ = solve(case,cache,{FEED:42.0})
+    other,solves = solve(case,cache,{FEED:43.0})
+    assert solves == 1 and cache.hits == 0
+    assert other != values
+
+def test_write_order_and_economics_are_part_of_the_key(case, cache):
+    solve(case,cache,{FEED:42.0,("stream","S-1","massFlow_VID"):5.0})
+    _,solves = solve(case,cache,{("stream","S-1","massFlow_VID"):5.0,FEED:42.0})
+    assert solves == 1
+    _,solves = solve(case,cache,{FEED:42.0,("stream","S-1","massFlow_VID"):5.0},economics=False)
+    assert solves == 1
+    assert cache.hits == 0
+
+def test_missing_output_misses(case, cache):
+    solve(case,cache,{FEED:42.0},outputs=OUTPUTS[:1])
+    _,solves = solve(case,cache,{FEED:42.0})
+    assert solves == 1 and cache.hits == 0
+
+def test_changed_case_file_misses(case, cache):
+    solve(case,cache,{FEED:42.0})
+    with open(case,'ab') as f: f.write(b" edited")
+    _,solves = solve(case,cache,{FEED:42.0})
+    assert solves == 1 and cache.hits == 0
+
+def test_pending_transaction_writes_are_keyed(case, cache):
+    doc = open_doc(case,cache)
+    with doc.transaction(rollback=False):
+        doc.ApplyInputs({FEED:42.0})
+        values = doc.Solve(OUTPUTS)
+    again,solves = solve(case,cache,{FEED:42.0})
+    assert solves == 0 and again == values
+
+def test_size_eviction(tmp_path, monkeypatch):
+    clock = itertools.count(1000)
+    monkeypatch.setattr(solve_cache_module.time,"time",lambda: float(next(clock)))
+    cache = SolveCache(str(tmp_path/"small.db"),max_bytes=200)
+    outputs = [("stream","S-11","massFlow_VID")]
+    for key in ("a","b","c"): cache.Put(key,outputs,[1.5])
+    size = cache._db.execute("SELECT size FROM solves WHERE key = 'a'").fetchone()[0]
+    assert 3*size <= 200
+    assert cache.Get("a",outputs) == [1.5]  # a is now the most recently used
+    for key in ("d","e","f","g"): cache.Put(key,outputs,[2.5])
+    kept = {key for key, in cache._db.execute("SELECT key FROM solves")}
+    assert sum(size for _ in kept) <= 200
+    assert "a" in kept and "b" not in kept and "g" in kept
+    assert cache.Get("b",outputs) is None
+    cache.close()
+
+def test_needs_a_file_name(cache):
+    doc = FakeSuperProDesigner(n_streams=12).OpenDoc("case.spf")
+    doc.fileName = None
+    with pytest.raises(ValueError): doc.EnableSolveCache(cache)
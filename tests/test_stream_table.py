@@ -0,0 +1,30 @@
+import pickle
+
+import numpy as np
+
+def test_columns_and_rows(doc):
+    table = doc.stream_table()
+    assert len(table) == 12
+    row = table["S-0"]
+    assert row.massFlow == row["massFlow_VID"] == doc.GetStreamVarVal("S-0",doc.app.stream_vars["massFlow_VID"])
+    assert table.Column("isInputStream_VID").dtype == bool
+
+def test_select(doc):
+    table = doc.stream_table()
+    inputs = table.Select(isInputStream=True)
+    assert inputs.names == ("S-0","S-1","S-2","S-3")
+    assert np.isclose(inputs.Column("massFlow_VID").sum(),table.Select(isOutputStream=True).Column("massFlow_VID").sum())
+
+def test_failed_reads_are_nan(doc):
+    from StreamTable import StreamTable
+    table = StreamTable.FromSnapshot({"names":["A","B"],"massFlow_VID":np.array([1.0,None],dtype=object)})
+    assert np.isnan(table.Column("massFlow_VID")[1])
+
+def test_pickle_leaves_the_document(doc):
+    table = pickle.loads(pickle.dumps(doc.stream_table()))
+    assert table.doc is None and len(table) == 12
+
+def test_component_balances(doc):
+    flows = doc.component_flow_matrix()
+    assert flows.IsClosed()
+    assert np.allclose(flows.StreamResiduals(),0.0)
@@ -0,0 +1,97 @@
+import functools
+import math
+
+import numpy as np
+import pytest
+
+from FakeDesigner import FakeSuperProDesigner, OpenFakeCase, QuadraticModel
+from ScenarioRunner import ScenarioRunner
+from Surrogate import Surrogate, _cholesky
+
+TIME = ("operation",("P-0","Agitate-1"),"processTime_VID")
+OUTPUT = ("procedure","P-0","cycleTime_VID")
+FEED = ("stream","S-0","massFlow_VID")
+MODEL = QuadraticModel({TIME:(3.0,1.0)},output=OUTPUT)
+
+def true(x:float) -> float:
+    return 1.0+(x-3.0)**2
+
+def surrogate(**options) -> Surrogate:
+    doc = FakeSuperProDesigner(n_streams=12,model=MODEL).OpenDoc("case.spf")
+    return Surrogate([TIME],[OUTPUT],doc=doc,**{"tolerance":0.02,"bounds":{TIME:(0.0,10.0)},**options})
+
+def trained(**options) -> Surrogate:
+    s = surrogate(**options)
+    for x in np.linspace(0.0,10.0,21): s.Record({TIME:x},[true(x)])
+    return s
+
+def test_first_query_solves():
+    s = surrogate()
+    values,std,solved = s.Query({TIME:5.0})
+    assert solved and values[0] == pytest.approx(true(5.0)) and std[0] == 0.0
+    assert len(s) == 1 and s.stats == {"solved":1}
+
+def test_predicts_within_training_range():
+    s = trained()
+    values,std,solved = s.Query({TIME:4.25})
+    assert not solved
+    assert values[0] == pytest.approx(true(4.25),rel=1e-3)
+    assert std[0] <= 0.02*np.std([true(x) for x in np.linspace(0.0,10.0,21)])
+    assert s.stats["predicted"] == 1
+
+def test_query_many_splits_certain_and_solved():
+    s = trained()
+    predictions = s.QueryMany([{TIME:4.25},{TIME:25.0},{TIME:6.75}])
+    assert [prediction.solved for prediction in predictions] == [False,True,False]
+    assert predictions[1].values[0] == pytest.approx(true(25.0))
+    assert s.stats == {"predicted":2,"solved":1}
+    assert len(s) == 22
+
+def test_query_many_keeps_predictions_of_failed_solves():
+    s = trained()
+    s.doc.doc.complete = False  # Every DoMEBalances fails
+    predictions = s.QueryMany([{TIME:4.25},{TIME:25.0}])
+    assert [prediction.solved for prediction in predictions] == [False,False]
+    assert np.isfinite(predictions[1].values[0]) and predictions[1].std[0] > 0
+    assert s.stats["solved"] == 0
+
+def test_query_many_without_model_fails_to_nan():
+    s = surrogate()
+    s.doc.doc.complete = False
+    [prediction] = s.QueryMany([{TIME:4.0}])
+    assert not prediction.solved and math.isnan(prediction.values[0]) and math.isinf(prediction.std[0])
+
+def test_failed_outputs_are_not_fitted():
+    s = trained()
+    s.Record({TIME:4.25},[None])
+    s.Fit()
+    assert len(s._model[0]) == 21
+
+def test_cholesky_jitter():
+    K = np.ones((3,3))  # Three identical points
+    L,jitter = _cholesky(K,1e-20)
+    assert jitter > 1e-20
+    assert np.allclose(L@L.T,K+jitter*np.eye(3))
+    with pytest.raises(np.linalg.LinAlgError): _cholesky(np.array([[1.0,3.0],[3.0,1.0]]),1e-6)  # Indefinite, no jitter up to 1 helps
+
+def test_duplicate_points_fit():
+    s = surrogate()
+    for _ in range(3): s.Record({TIME:2.0},[true(2.0)])
+    s.Record({TIME:4.0},[true(4.0)])
+    values,_ = s.Predict({TIME:2.0})
+    assert values[0] == pytest.approx(true(2.0),rel=1e-3)
+    assert s._jitter >= s.noise
+
+def test_runner_columns():
+    outputs = [FEED,OUTPUT]
+    runner = ScenarioRunner("case.spf",outputs,backend=functools.partial(OpenFakeCase,n_streams=12,model=MODEL),processes=False,max_workers=2)
+    s = Surrogate([TIME],[OUTPUT],runner=runner,tolerance=0.02,bounds={TIME:(0.0,10.0)})
+    with runner:
+        assert s.RecordResults(runner.run([{TIME:x} for x in (0.0,5.0,10.0)])) == 3
+        assert sorted(s.Y[:,0]) == pytest.approx(sorted(true(x) for x in (0.0,5.0,10.0)))
+        [prediction] = s.QueryMany([{TIME:25.0}])
+    assert prediction.solved and prediction.values[0] == pytest.approx(true(25.0))
+
+def test_runner_must_read_outputs():
+    runner = ScenarioRunner("case.spf",[FEED],backend=functools.partial(OpenFakeCase,n_streams=12),processes=False)
+    with pytest.raises(ValueError): Surrogate([TIME],[OUTPUT],runner=runner)
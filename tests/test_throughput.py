@@ -0,0 +1,72 @@
+import functools
+
+import numpy as np
+import pytest
+
+from FakeDesigner import OpenFakeCase
+from ScenarioRunner import RunThroughput, ScenarioRunner
+
+OUTPUTS = [("stream","S-11","massFlow_VID")]
+
+def test_throughput_curve(doc):
+    massFlow = doc.app.stream_vars["massFlow_VID"]
+    base = doc.Solve(OUTPUTS)[0]
+    curve = doc.throughput_curve([2.0,1.0,0.5],OUTPUTS)
+    assert curve[:,0] == pytest.approx([2*base,base,0.5*base])
+    assert doc.GetStreamVarVal("S-0",massFlow) == pytest.approx(OpenFakeCase("case.spf",n_streams=12).GetStreamVarVal("S-0",massFlow))
+
+def test_throughput_curve_restores_exactly(doc):
+    doc.SetStreamVarVal("S-0",doc.app.stream_vars["massFlow_VID"],50.0)
+    applied = dict(doc._applied)
+    # Factors whose product does not come back to 1.0 exactly in floating point
+    doc.throughput_curve([0.1,0.7,1.3,3.0],OUTPUTS)
+    assert doc.throughputFactor == 1.0
+    assert doc._applied == applied
+
+def test_throughput_curve_keeps_earlier_scaling(doc):
+    doc.ScaleUpThroughput(2.0)
+    applied = dict(doc._applied)
+    doc.throughput_curve([1.0,3.0],OUTPUTS)
+    assert doc.throughputFactor == 2.0
+    assert doc._applied == applied
+
+def test_throughput_curve_without_restore(doc):
+    doc.throughput_curve([3.0],OUTPUTS,restore=False)
+    assert doc.throughputFactor == 3.0
+    assert [entry[0] for entry in doc._applied] == ["scaleUpThroughput"]
+
+def test_throughput_curve_needs_outputs(doc):
+    with pytest.raises(ValueError):
+        doc.throughput_curve([1.0,2.0])
+
+def test_throughput_curve_on_runner(doc):
+    runner = ScenarioRunner("case.spf",OUTPUTS,backend=functools.partial(OpenFakeCase,n_streams=12),task=RunThroughput,processes=False,max_workers=2)
+    with runner:
+        curve = doc.throughput_curve([1.0,2.0,4.0],runner=runner)
+    assert np.allclose(curve,doc.throughput_curve([1.0,2.0,4.0],OUTPUTS))
+
+def test_scalings_stay_distinct_when_the_log_shrinks(doc):
+    compFrac,compFlow = doc.app.stream_vars["compMassFrac_VID"],doc.app.stream_vars["componentMassFlow_VID"]
+    assert doc.AddIngredientToInputStream("S-0","C-4",compFrac,0.1)
+    assert doc.AddIngredientToInputStream("S-0","C-4",compFlow,5.0)
+    assert doc.ScaleUpThroughput(2.0)
+    # Removing the ingredient drops its two entries, the next scaling must not take the key of the first
+    assert doc.RemoveIngredientFromInputStream("S-0","C-4")
+    assert doc.ScaleUpThroughput(3.0)
+    assert doc.throughputFactor == 6.0
+    assert sorted(val for entry,val in doc.applied.items() if entry[0] == "scaleUpThroughput") == [2.0,3.0]
+    reopened = OpenFakeCase("case.spf",n_streams=12)
+    reopened.Replay(doc.applied)
+    assert reopened.throughputFactor == 6.0
+
+def test_throughput_curve_failed_restore(doc):
+    scale,calls = doc.doc.ScaleUpThroughput,[]
+    def ScaleUpThroughput(VarID, val):
+        calls.append(val)
+        if len(calls) == 3:
+            doc.doc.error = "Throughput is locked"
+            return False
+        return scale(VarID,val)
+    doc.doc.ScaleUpThroughput = ScaleUpThroughput
+    with pytest.raises(RuntimeError,match="Throughput is locked"): doc.throughput_curve([2.0,3.0],OUTPUTS)
+    assert doc.throughputFactor == pytest.approx(3.0)
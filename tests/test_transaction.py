@@ -0,0 +1,50 @@
+import pytest
+
+def test_writes_are_coalesced(doc):
+    massFlow = doc.app.stream_vars["massFlow_VID"]
+    with doc.transaction() as transaction:
+        for val in (10.0,20.0,30.0):
+            for name in ("S-0","S-1"): doc.SetStreamVarVal(name,massFlow,val)
+        assert doc.GetStreamVarVal("S-0",massFlow) == 30.0  # Reads see the buffered value
+        assert doc.doc.calls["SetStreamVarVal"] == 0
+    assert (transaction.buffered,transaction.flushed,transaction.skipped) == (6,2,0)
+    assert doc.doc.calls["SetStreamVarVal"] == 2
+    assert doc.doc.values[("stream","S-0",massFlow,'')] == 30.0
+
+def test_current_values_are_skipped(doc):
+    massFlow = doc.app.stream_vars["massFlow_VID"]
+    current = doc.GetStreamVarVal("S-0",massFlow)
+    with doc.transaction() as transaction:
+        doc.SetStreamVarVal("S-0",massFlow,current)
+    assert (transaction.flushed,transaction.skipped) == (0,1)
+    assert doc.doc.calls["SetStreamVarVal"] == 0
+
+def test_flush_before_solve(doc):
+    massFlow = doc.app.stream_vars["massFlow_VID"]
+    with doc.transaction():
+        doc.SetStreamVarVal("S-0",massFlow,50.0)
+        doc.DoMEBalances()
+        assert doc.doc.calls["SetStreamVarVal"] == 1
+
+def test_rollback_restores_values_and_log(doc):
+    massFlow = doc.app.stream_vars["massFlow_VID"]
+    doc.ApplyInputs({("stream","S-1","massFlow_VID"):5.0})
+    applied = dict(doc._applied)
+    old = doc.GetStreamVarVal("S-0",massFlow)
+    doc.doc.complete = False
+    with pytest.raises(RuntimeError):
+        with doc.transaction():
+            doc.SetStreamVarVal("S-0",massFlow,old+1.0)
+            doc.SetStreamVarVal("S-1",massFlow,7.0)
+    assert doc.doc.values[("stream","S-0",massFlow,'')] == old
+    assert doc.doc.values[("stream","S-1",massFlow,'')] == 5.0
+    assert doc._applied == applied and list(doc._applied) == list(applied)
+
+def test_block_error_drops_writes(doc):
+    massFlow = doc.app.stream_vars["massFlow_VID"]
+    with pytest.raises(ValueError):
+        with doc.transaction():
+            doc.SetStreamVarVal("S-0",massFlow,99.0)
+            raise ValueError()
+    assert doc.doc.calls["SetStreamVarVal"] == 0
+    assert not doc._applied
@@ -0,0 +1,50 @@
+from SuperProDesigner import ValueCache
+
+def test_reads_are_cached(doc):
+    cache = doc.EnableCache()
+    massFlow = doc.app.stream_vars["massFlow_VID"]
+    first = doc.GetStreamVarVal("S-0",massFlow)
+    assert doc.GetStreamVarVal("S-0",massFlow) == first
+    assert doc.doc.calls["GetStreamVarVal"] == 1
+    assert (cache.hits,cache.misses) == (1,1)
+
+def test_solve_and_writes_invalidate(doc):
+    cache = doc.EnableCache()
+    massFlow,temperature = doc.app.stream_vars["massFlow_VID"],doc.app.stream_vars["temperature_VID"]
+    doc.GetStreamVarVal("S-0",massFlow)
+    doc.GetStreamVarVal("S-0",temperature)
+    doc.SetStreamVarVal("S-0",massFlow,42.0)
+    assert not cache.values  # The whole object is dropped
+    doc.GetStreamVarVal("S-11",massFlow)
+    doc.DoMEBalances()
+    assert not cache.values
+
+def test_stream_rename_rekeys(doc):
+    cache = doc.EnableCache()
+    massFlow = doc.app.stream_vars["massFlow_VID"]
+    val = doc.GetStreamVarVal("S-0",massFlow)
+    assert doc.RenameStream("S-0","Feed")
+    assert ("stream","S-0",massFlow,'') not in cache.values
+    assert cache.values[("stream","Feed",massFlow,'')] == val
+    assert doc.GetStreamVarVal("Feed",massFlow) == val
+    assert doc.doc.calls["GetStreamVarVal"] == 1
+
+def test_procedure_rename_moves_operations():
+    cache = ValueCache()
+    cache.Put(("procedure","P-1",1,''),3.0)
+    cache.Put(("operation",("P-1","Charge-1"),2,''),0.5)
+    cache.Put(("operation",("P-2","Charge-1"),2,''),0.7)
+    cache.Put(("equipment","E-1",3,''),"P-1")  # A value naming the procedure
+    cache.Rename("procedure","P-1","Reactor")
+    assert cache.values == {("procedure","Reactor",1,''):3.0,("operation",("Reactor","Charge-1"),2,''):0.5,("operation",("P-2","Charge-1"),2,''):0.7}
+    cache.DropObject("operation",("Reactor","Charge-1"))
+    assert ("operation",("Reactor","Charge-1"),2,'') not in cache.values
+
+def test_lru_eviction():
+    cache = ValueCache(maxsize=2)
+    cache.Put(("stream","A",1,''),1.0)
+    cache.Put(("stream","B",1,''),2.0)
+    cache.Get(("stream","A",1,''))
+    cache.Put(("stream","C",1,''),3.0)
+    assert list(cache.values) == [("stream","A",1,''),("stream","C",1,'')]
+    cache.DropObject("stream","B")  # Evicted keys are unindexed
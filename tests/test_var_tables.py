@@ -0,0 +1,82 @@
+import os
+import sys
+import types
+
+import pytest
+
+import SuperProDesigner as spd
+from FakeDesigner import FakeApplication, FakeTables, FakeTypeLib
+from SuperProDesigner import LoadVarTables, SaveVarTables, SuperProDesigner
+
+@pytest.fixture
+def tlb(tmp_path):
+    path = tmp_path/"Designer.tlb"
+    path.write_bytes(b"typelib")
+    return str(path)
+
+@pytest.fixture
+def no_comtypes(monkeypatch):
+    # A None entry makes every import of comtypes raise ImportError
+    for name in ("comtypes","comtypes.client","comtypes.automation"): monkeypatch.setitem(sys.modules,name,None)
+
+@pytest.fixture
+def fake_comtypes(monkeypatch):
+    # comtypes.client.GetModule standing in for loading the type library, counting its calls
+    loads = []
+    client = types.ModuleType("comtypes.client")
+    client.GetModule = lambda path: loads.append(path) or FakeTypeLib()
+    package = types.ModuleType("comtypes")
+    package.client = client
+    monkeypatch.setitem(sys.modules,"comtypes",package)
+    monkeypatch.setitem(sys.modules,"comtypes.client",client)
+    return loads
+
+def test_save_load_round_trip(tmp_path, no_comtypes):
+    tables = FakeTables()
+    path = str(tmp_path/"tables.json")
+    SaveVarTables(tables,path)
+    loaded = LoadVarTables(cache_file=path)
+    assert loaded == tables
+    assert all(isinstance(ids,tuple) for lists in loaded["enum_vars"].values() for ids in lists.values())
+
+def test_cache_file_of_another_version(tmp_path, monkeypatch):
+    path = str(tmp_path/"tables.json")
+    SaveVarTables(FakeTables(),path)
+    monkeypatch.setattr(spd,"_TABLES_VERSION",spd._TABLES_VERSION+1)
+    with pytest.raises(ValueError): LoadVarTables(cache_file=path)
+
+def test_cache_dir(tmp_path, tlb, fake_comtypes, monkeypatch):
+    cache_dir = str(tmp_path/"cache")
+    tables = LoadVarTables(tlb,cache_dir)
+    assert fake_comtypes == [tlb] and tables == FakeTables()
+    assert len(os.listdir(cache_dir)) == 1
+    # A warm start reads the cache without the type library, or comtypes
+    for name in ("comtypes","comtypes.client"): monkeypatch.setitem(sys.modules,name,None)
+    assert LoadVarTables(tlb,cache_dir) == tables
+
+def test_cache_invalidated_by_tlb_mtime(tmp_path, tlb, fake_comtypes):
+    cache_dir = str(tmp_path/"cache")
+    LoadVarTables(tlb,cache_dir)
+    LoadVarTables(tlb,cache_dir)
+    assert len(fake_comtypes) == 1
+    stat = os.stat(tlb)
+    os.utime(tlb,ns=(stat.st_atime_ns,stat.st_mtime_ns+10**9))
+    LoadVarTables(tlb,cache_dir)
+    assert len(fake_comtypes) == 2
+    LoadVarTables(tlb,cache_dir)
+    assert len(fake_comtypes) == 2
+
+def test_cache_invalidated_by_version(tmp_path, tlb, fake_comtypes, monkeypatch):
+    cache_dir = str(tmp_path/"cache")
+    LoadVarTables(tlb,cache_dir)
+    monkeypatch.setattr(spd,"_TABLES_VERSION",spd._TABLES_VERSION+1)
+    LoadVarTables(tlb,cache_dir)
+    assert len(fake_comtypes) == 2
+    # The new version gets a cache file of its own
+    assert len(os.listdir(cache_dir)) == 2
+
+def test_wrapping_an_app_needs_no_comtypes(no_comtypes):
+    app = SuperProDesigner(app=FakeApplication(n_streams=6),tables=FakeTables())
+    doc = app.OpenDoc("case.spf")
+    assert doc.GetStreamVarVal("S-0",app.stream_vars["isInputStream_VID"])
+    assert app.tables == FakeTables()
@@ -0,0 +1,106 @@
+import functools
+
+import pytest
+
+from FakeDesigner import FakeFaults, FakeSuperProDesigner, KillFakeApp, OpenFakeCase
+from ScenarioRunner import ScenarioRunner, ServerRestarted
+from Watchdog import OpenSupervised, Supervisor
+
+FEED = ("stream","S-0","massFlow_VID")
+OUTPUTS = [("stream","S-11","massFlow_VID")]
+
+def supervisor(faults:FakeFaults, **options) -> Supervisor:
+    options = {"deadlines":{"Solve":0.5},"max_restarts":2,**options}
+    return Supervisor("case.spf",functools.partial(FakeSuperProDesigner,n_streams=12,faults=faults),KillFakeApp,**options)
+
+def test_hang_restarts_and_replays():
+    faults = FakeFaults()
+    with supervisor(faults) as s:
+        doc = s.doc
+        doc.ApplyInputs({FEED:42.0})
+        first = s.app
+        faults.Hang("DoMEBalances")
+        with pytest.raises(ServerRestarted): doc.Solve(OUTPUTS)
+        assert first.app.dead and s.app is not first
+        assert s.stats["hangs"] == 1 and s.stats["restarts"] == 1 and s.stats["replayed"] == 1
+        [event] = s.events
+        assert event.cause == "hang" and event.method == "Solve" and event.replayed == 1
+        assert doc.ReadOutputs([FEED]) == [42.0]
+        assert len(doc.Solve(OUTPUTS)) == 1
+        assert s.Report()["downtime"] == s.downtime > 0
+
+def test_crash_restarts_and_replays():
+    faults = FakeFaults()
+    with supervisor(faults) as s:
+        doc = s.doc
+        doc.ApplyInputs({FEED:42.0})
+        faults.Crash("DoMEBalances")
+        with pytest.raises(ServerRestarted): doc.Solve(OUTPUTS)
+        assert s.stats["crashes"] == 1 and s.stats["restarts"] == 1
+        assert s.events[0].cause == "crash" and "RPC server" in s.events[0].error
+        expected = OpenFakeCase("case.spf",n_streams=12)
+        expected.ApplyInputs({FEED:42.0})
+        assert doc.Solve(OUTPUTS) == expected.Solve(OUTPUTS)
+
+def test_call_errors_are_not_restarts():
+    with supervisor(FakeFaults()) as s:
+        with pytest.raises(RuntimeError): s.doc.ApplyInputs({("stream","nope","massFlow_VID"):1.0})
+        assert s.stats["restarts"] == 0 and not s.events
+
+def test_undo_after_restart():
+    faults = FakeFaults()
+    with supervisor(faults) as s:
+        doc = s.doc
+        doc.ApplyInputs({("stream","S-1","massFlow_VID"):7.0})
+        doc.StartUndoLog()
+        before = doc.ReadOutputs([FEED])
+        doc.ApplyInputs({FEED:42.0})
+        faults.Crash("DoMEBalances")
+        with pytest.raises(ServerRestarted): doc.Solve(OUTPUTS)
+        assert s.stats["replayed"] == 2
+        assert doc.Undo()
+        assert doc.ReadOutputs([FEED]) == before
+        assert doc.ReadOutputs([("stream","S-1","massFlow_VID")]) == [7.0]
+
+def test_dead_after_failed_restarts():
+    faults = FakeFaults()
+    s = supervisor(faults)
+    faults.Crash("DoMEBalances")
+    faults.Crash("OpenDoc",2)
+    with pytest.raises(RuntimeError,match="Could not restart"): s.doc.Solve(OUTPUTS)
+    assert s.dead
+    assert s.stats["failedRestarts"] == 2 and s.stats["restarts"] == 0
+    with pytest.raises(RuntimeError,match="dead"): s.doc.ReadOutputs([FEED])
+    assert not s.HealthCheck()
+
+def test_health_check_recovers_hung_server():
+    faults = FakeFaults()
+    with supervisor(faults,probe_deadline=0.2) as s:
+        faults.Hang("IsCOMSimDataComplete")
+        assert not s.HealthCheck()
+        assert s.stats["hangs"] == 1 and s.stats["restarts"] == 1
+        assert s.HealthCheck()
+
+def test_replay_from(doc):
+    doc.ApplyInputs({("stream","S-1","massFlow_VID"):7.0})
+    doc.StartUndoLog()
+    doc.ApplyInputs({FEED:42.0})
+    with doc.transaction(rollback=False):
+        doc.ApplyInputs({("stream","S-2","massFlow_VID"):3.0})
+        reopened = FakeSuperProDesigner(n_streams=12).OpenDoc("case.spf")
+        assert reopened.ReplayFrom(doc) == 3
+    assert reopened.applied == doc.applied
+    assert reopened.ReadOutputs([FEED,("stream","S-2","massFlow_VID")]) == [42.0,3.0]
+    assert reopened.Undo()
+    assert reopened.ReadOutputs([("stream","S-1","massFlow_VID")]) == [7.0]
+    assert list(reopened.applied) == [doc._key(("stream","S-1","massFlow_VID"))]
+
+def test_runner_retries_restarted_scenario():
+    faults = FakeFaults()
+    faults.Crash("DoMEBalances")
+    backend = functools.partial(OpenSupervised,factory=functools.partial(FakeSuperProDesigner,n_streams=12,faults=faults),kill=KillFakeApp)
+    runner = ScenarioRunner("case.spf",OUTPUTS,backend=backend,processes=False,max_workers=1,poll_interval=0.05)
+    results = sorted(runner.run([{FEED:10.0},{FEED:20.0}]))
+    assert all(result.ok for result in results)
+    assert [result.attempts for result in results] == [2,1]
+    assert runner.restarts == 1